@@ -2,10 +2,11 @@ from typing import Any, Dict
 
 from fastapi import APIRouter, Depends, HTTPException
 from pydantic import BaseModel
-from sqlmodel import Session, select
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
 
 from ..db.session import get_session
-from ..db.models import Item
+from ..db.models import Item, Scan
 from ..mcp_tools import generate_remediation
 
 
@@ -18,17 +19,17 @@ class ItemActionRequest(BaseModel):
 
 
 @router.post("/{item_id}/action")
-async def item_action(item_id: int, payload: ItemActionRequest, session: Session = Depends(get_session)) -> Dict[str, Any]:
+async def item_action(item_id: int, payload: ItemActionRequest, session: AsyncSession = Depends(get_session)) -> Dict[str, Any]:
     statement = select(Item).where(Item.id == item_id)
-    item = session.exec(statement).first()
+    item = (await session.exec(statement)).first()
     if not item:
         raise HTTPException(status_code=404, detail="Item not found")
 
     if payload.action != "draft_email":
         raise HTTPException(status_code=400, detail="Unsupported action")
 
-    result = await generate_remediation.generate_remediation(
-        item_id=str(item.id),
-        tone=payload.tone or "polite",
-    )
-    return result
+    scan = (await session.exec(select(Scan).where(Scan.id == item.scan_id))).first()
+    if not scan:
+        raise HTTPException(status_code=404, detail="Scan not found")
+
+    return await generate_remediation.remediation_for_item(session, item, scan, tone=payload.tone or "polite")
@@ -1,206 +1,209 @@
-from typing import Any, Dict
-
-from fastapi import APIRouter, HTTPException
+import asyncio
+import json
+import logging
+import math
+import os
+import random
+import time
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+import httpx
+from fastapi import APIRouter, Depends, HTTPException, Response
+from fastapi.responses import StreamingResponse
+from jsonschema.exceptions import best_match
 from pydantic import BaseModel
-import jsonschema
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from ..core.rate_limit import RateLimitExceeded, limiter
+from ..core.resilience import CircuitOpen, DeadlineExceeded, resilience
+from ..core.tool_cache import tool_cache
+from ..core.tool_dispatch import call_connector, inflight
+from ..db.models import ToolCall
+from ..db.session import async_session, get_session
+from ..mcp_tools.registry import registry
 
-from ..mcp_tools import (
-    search_web,
-    search_social,
-    check_breach,
-    score_risk,
-    generate_remediation,
-    reverse_image_search,
-)
 
+logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
 
-TOOL_SCHEMAS: Dict[str, Dict[str, Any]] = {
-    "searchWeb": {
-        "input_schema": {
-            "type": "object",
-            "properties": {
-                "query": {"type": "string"},
-                "limit": {"type": "integer"},
-            },
-            "required": ["query"],
-        },
-        "output_schema": {
-            "type": "array",
-            "items": {
-                "type": "object",
-                "properties": {
-                    "title": {"type": "string"},
-                    "snippet": {"type": "string"},
-                    "url": {"type": "string"},
-                    "date": {"type": "string"},
-                },
-                "required": ["title", "snippet", "url"],
-            },
-        },
-    },
-    "reverseImageSearch": {
-        "input_schema": {
-            "type": "object",
-            "properties": {
-                "image_hash": {"type": "string"},
-            },
-            "required": ["image_hash"],
-        },
-        "output_schema": {
-            "type": "array",
-            "items": {
-                "type": "object",
-                "properties": {
-                    "url": {"type": "string"},
-                    "similarity": {"type": "number"},
-                    "context": {"type": "string"},
-                },
-                "required": ["url", "similarity"],
-            },
-        },
-    },
-    "searchSocial": {
-        "input_schema": {
-            "type": "object",
-            "properties": {
-                "service": {"type": "string"},
-                "query": {"type": "string"},
-                "limit": {"type": "integer"},
-            },
-            "required": ["service", "query"],
-        },
-        "output_schema": {
-            "type": "array",
-            "items": {
-                "type": "object",
-                "properties": {
-                    "id": {"type": "string"},
-                    "text": {"type": "string"},
-                    "url": {"type": "string"},
-                    "timestamp": {"type": "string"},
-                    "meta": {"type": "object"},
-                },
-                "required": ["id", "text", "url"],
-            },
-        },
-    },
-    "checkBreach": {
-        "input_schema": {
-            "type": "object",
-            "properties": {"email": {"type": "string"}},
-            "required": ["email"],
-        },
-        "output_schema": {
-            "type": "object",
-            "properties": {
-                "pwned": {"type": "boolean"},
-                "breaches": {"type": "array"},
-            },
-            "required": ["pwned", "breaches"],
-        },
-    },
-    "scoreRisk": {
-        "input_schema": {
-            "type": "object",
-            "properties": {"items": {"type": "array"}},
-            "required": ["items"],
-        },
-        "output_schema": {
-            "type": "array",
-            "items": {
-                "type": "object",
-                "properties": {
-                    "item_id": {"type": "string"},
-                    "risk_score": {"type": "number"},
-                    "category": {"type": "string"},
-                    "explanation": {"type": "string"},
-                },
-                "required": ["item_id", "risk_score", "category"],
-            },
-        },
-    },
-    "generateRemediation": {
-        "input_schema": {
-            "type": "object",
-            "properties": {
-                "item_id": {"type": "string"},
-                "tone": {"type": "string"},
-            },
-            "required": ["item_id"],
-        },
-        "output_schema": {
-            "type": "object",
-            "properties": {
-                "draft_email": {"type": "string"},
-                "steps": {"type": "array", "items": {"type": "string"}},
-                "settings_links": {
-                    "type": "array",
-                    "items": {"type": "string"},
-                },
-            },
-            "required": ["draft_email", "steps", "settings_links"],
-        },
-    },
-}
+# Fraction of `/mcp/call` results checked against the tool's output schema.
+# 1.0 in development; lower it in production, where tool output shapes are
+# stable and validating every (possibly large) result is pure overhead.
+MCP_OUTPUT_VALIDATION_RATE = float(os.getenv("MCP_OUTPUT_VALIDATION_RATE", "1.0"))
+
+# POST /mcp/call_batch: calls accepted per request, and run at the same time.
+MCP_BATCH_MAX_CALLS = int(os.getenv("MCP_BATCH_MAX_CALLS", "100"))
+MCP_BATCH_CONCURRENCY = max(1, int(os.getenv("MCP_BATCH_CONCURRENCY", "8")))
 
 
 class ToolCallRequest(BaseModel):
     tool: str
     args: Dict[str, Any]
+    bypass_cache: bool = False
 
 
 @router.get("/tools")
-async def list_tools() -> Dict[str, Any]:
-    tools = [
-        {
-            "name": name,
-            "input_schema": spec["input_schema"],
-            "output_schema": spec["output_schema"],
-        }
-        for name, spec in TOOL_SCHEMAS.items()
-    ]
-    return {"tools": tools}
+async def list_tools() -> Response:
+    return Response(content=registry.listing, media_type="application/json")
 
 
-@router.post("/call")
-async def call_tool(request: ToolCallRequest) -> Dict[str, Any]:
+@router.get("/stats")
+async def dispatch_stats() -> Dict[str, Any]:
+    """Counters for the tool result cache, in-flight call coalescing,
+    provider rate limiting (including time spent queued for a token) and
+    circuit breakers/hedging (this process)."""
+
+    return {
+        "cache": tool_cache.stats(),
+        "singleflight": inflight.stats(),
+        "rate_limits": limiter.stats(),
+        "resilience": resilience.stats(),
+    }
+
+
+async def _run_call(request: ToolCallRequest) -> Tuple[Any, Optional[ToolCall]]:
+    """Validate and dispatch one tool call.
+
+    Returns the result and, for a fresh connector response, the ToolCall row
+    to log so it can serve later cache lookups. Raises HTTPException for
+    unknown tools, invalid args/output, provider rate limiting (429), open
+    circuits (503), provider errors (502) and timeouts (504).
+    """
+
     tool_name = request.tool
     args = request.args
 
-    if tool_name not in TOOL_SCHEMAS:
+    spec = registry.get(tool_name)
+    if spec is None:
         raise HTTPException(status_code=400, detail=f"Unknown tool: {tool_name}")
 
-    schemas = TOOL_SCHEMAS[tool_name]
-
     # Validate input args
-    try:
-        jsonschema.validate(instance=args, schema=schemas["input_schema"])
-    except jsonschema.ValidationError as exc:
-        raise HTTPException(status_code=400, detail=f"Invalid args for {tool_name}: {exc.message}")
-
-    # Dispatch to tool implementation
-    if tool_name == "searchWeb":
-        result = await search_web.search_web(**args)
-    elif tool_name == "searchSocial":
-        result = await search_social.search_social(**args)
-    elif tool_name == "checkBreach":
-        result = await check_breach.check_breach(**args)
-    elif tool_name == "scoreRisk":
-        result = await score_risk.score_risk(**args.get("items", []))
-    elif tool_name == "generateRemediation":
-        result = await generate_remediation.generate_remediation(**args)
-    elif tool_name == "reverseImageSearch":
-        result = await reverse_image_search.reverse_image_search(**args)
+    error = best_match(spec.input_validator.iter_errors(args))
+    if error is not None:
+        raise HTTPException(status_code=400, detail=f"Invalid args for {tool_name}: {error.message}")
+
+    # Connectors go through the cross-scan result cache.
+    log_row = None
+    if spec.connector:
+        started = time.perf_counter()
+        try:
+            outcome = await call_connector(tool_name, args, db_cache=True, bypass_cache=request.bypass_cache)
+        except RateLimitExceeded as exc:
+            headers = {"Retry-After": str(math.ceil(exc.retry_after))} if exc.retry_after is not None else None
+            raise HTTPException(status_code=429, detail=str(exc), headers=headers)
+        except CircuitOpen as exc:
+            raise HTTPException(status_code=503, detail=str(exc), headers={"Retry-After": str(math.ceil(exc.retry_in))})
+        except (DeadlineExceeded, TimeoutError, httpx.TimeoutException) as exc:
+            raise HTTPException(status_code=504, detail=f"{tool_name} timed out")
+        except httpx.HTTPError as exc:
+            # Not str(exc): it can carry the request URL, with the caller's identifiers.
+            reason = exc.response.status_code if isinstance(exc, httpx.HTTPStatusError) else type(exc).__name__
+            raise HTTPException(status_code=502, detail=f"{tool_name} provider error ({reason})")
+        result = outcome.result
+        if outcome.cache_key is not None:
+            log_row = ToolCall(
+                tool_name=tool_name,
+                args_json=json.dumps(args),
+                response_json=json.dumps(result),
+                duration_ms=int((time.perf_counter() - started) * 1000),
+                cache_key=outcome.cache_key,
+            )
     else:
-        raise HTTPException(status_code=400, detail=f"Tool not implemented: {tool_name}")
+        result = await spec.func(**args)
 
     # Validate output
-    try:
-        jsonschema.validate(instance=result, schema=schemas["output_schema"])
-    except jsonschema.ValidationError as exc:
-        raise HTTPException(status_code=500, detail=f"Tool output invalid for {tool_name}: {exc.message}")
+    if MCP_OUTPUT_VALIDATION_RATE >= 1.0 or random.random() < MCP_OUTPUT_VALIDATION_RATE:
+        error = best_match(spec.output_validator.iter_errors(result))
+        if error is not None:
+            raise HTTPException(status_code=500, detail=f"Tool output invalid for {tool_name}: {error.message}")
+
+    return result, log_row
+
 
+@router.post("/call")
+async def call_tool(request: ToolCallRequest, session: AsyncSession = Depends(get_session)) -> Dict[str, Any]:
+    result, log_row = await _run_call(request)
+    if log_row is not None:
+        session.add(log_row)
+        await session.commit()
     return {"result": result}
+
+
+class ToolCallBatchRequest(BaseModel):
+    calls: List[ToolCallRequest]
+    # Stream one NDJSON line per call as it finishes instead of one JSON body.
+    stream: bool = False
+
+
+async def _run_batch_call(
+    index: int, request: ToolCallRequest, limit: asyncio.Semaphore
+) -> Tuple[Dict[str, Any], Optional[ToolCall]]:
+    async with limit:
+        try:
+            result, log_row = await _run_call(request)
+        except HTTPException as exc:
+            return {"index": index, "ok": False, "status": exc.status_code, "error": exc.detail}, None
+        except Exception as exc:
+            logger.exception("Batched call to %s failed", request.tool)
+            return {"index": index, "ok": False, "status": 500, "error": str(exc) or type(exc).__name__}, None
+    return {"index": index, "ok": True, "result": result}, log_row
+
+
+async def _log_tool_calls(session: AsyncSession, rows: List[ToolCall]) -> None:
+    if rows:
+        session.add_all(rows)
+        await session.commit()
+
+
+async def _log_tool_calls_in_new_session(rows: List[ToolCall]) -> None:
+    if rows:
+        async with async_session() as session:
+            await _log_tool_calls(session, rows)
+
+
+@router.post("/call_batch", response_model=None)
+async def call_tool_batch(
+    batch: ToolCallBatchRequest, session: AsyncSession = Depends(get_session)
+) -> Dict[str, Any] | StreamingResponse:
+    """Run several tool calls concurrently (at most MCP_BATCH_CONCURRENCY at a time).
+
+    Each call is validated and dispatched exactly as by `POST /mcp/call`; a
+    failing call does not fail the batch. Results come back in request
+    order as `{"results": [...]}`, each `{"index", "ok", "result"}` or
+    `{"index", "ok": false, "status", "error"}`. With `stream`, the same
+    objects are sent as NDJSON lines in completion order.
+    """
+
+    if len(batch.calls) > MCP_BATCH_MAX_CALLS:
+        raise HTTPException(status_code=400, detail=f"At most {MCP_BATCH_MAX_CALLS} calls per batch")
+
+    limit = asyncio.Semaphore(MCP_BATCH_CONCURRENCY)
+
+    if not batch.stream:
+        outcomes = await asyncio.gather(*(_run_batch_call(i, call, limit) for i, call in enumerate(batch.calls)))
+        await _log_tool_calls(session, [row for _, row in outcomes if row is not None])
+        return {"results": [entry for entry, _ in outcomes]}
+
+    async def _lines() -> AsyncIterator[str]:
+        tasks = [asyncio.create_task(_run_batch_call(i, call, limit)) for i, call in enumerate(batch.calls)]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                entry, _ = await next_done
+                yield json.dumps(entry) + "\n"
+        finally:
+            # The client may have disconnected mid-stream: stop the calls
+            # still running, but log every call that did complete.
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            rows = [
+                task.result()[1]
+                for task in tasks
+                if not task.cancelled() and task.exception() is None and task.result()[1] is not None
+            ]
+            # The request's session may already be closed once streaming starts.
+            await asyncio.shield(_log_tool_calls_in_new_session(rows))
+
+    return StreamingResponse(_lines(), media_type="application/x-ndjson")
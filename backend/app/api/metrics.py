@@ -0,0 +1,154 @@
+import time
+from typing import Any, Awaitable, Callable, Dict, MutableMapping
+
+from fastapi import APIRouter, Depends, Response
+from sqlalchemy import func
+from sqlmodel import col, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from ..core.job_queue import STATUS_PENDING, STATUS_RUNNING
+from ..core.metrics import CONTENT_TYPE, HTTP_REQUEST_SECONDS, registry, since
+from ..core.rate_limit import limiter
+from ..core.resilience import resilience
+from ..core.tool_cache import tool_cache
+from ..core.tool_dispatch import inflight
+from ..db.models import Scan
+from ..db.session import get_session
+
+
+router = APIRouter()
+
+Scope = MutableMapping[str, Any]
+Message = MutableMapping[str, Any]
+
+SCAN_QUEUE_DEPTH = registry.gauge("scan_queue_depth", "Scans waiting for a worker (all workers).")
+SCANS_IN_FLIGHT = registry.gauge("scans_in_flight", "Scans being run by a worker (all workers).")
+TOOL_CACHE_LOOKUPS = registry.counter(
+    "tool_cache_lookups_total", "Tool result cache lookups by result.", ("result",)
+)
+TOOL_CACHE_ENTRIES = registry.gauge("tool_cache_entries", "Entries in the in-memory tool result cache.")
+TOOL_CACHE_BYTES = registry.gauge("tool_cache_bytes", "Approximate size of the in-memory tool result cache.")
+SINGLEFLIGHT_CALLS = registry.counter(
+    "singleflight_calls_total", "Connector calls that led or joined an identical in-flight call.", ("role",)
+)
+RATE_LIMIT_QUEUE_SECONDS = registry.counter(
+    "rate_limit_queue_seconds_total", "Time spent waiting for a provider rate-limit token.", ("provider", "key")
+)
+RATE_LIMIT_THROTTLED = registry.counter(
+    "rate_limit_throttled_total", "Throttled (429) provider responses.", ("provider", "key")
+)
+RATE_LIMIT_RATE = registry.gauge(
+    "rate_limit_requests_per_second", "Current adaptive request rate.", ("provider", "key")
+)
+PROVIDER_CIRCUIT_OPEN = registry.gauge(
+    "provider_circuit_open", "1 while a provider's circuit is open or half-open.", ("provider",)
+)
+PROVIDER_CIRCUIT_REJECTED = registry.counter(
+    "provider_circuit_rejected_total", "Calls failed fast by an open circuit.", ("provider",)
+)
+PROVIDER_HEDGED = registry.counter(
+    "provider_hedged_requests_total", "Duplicate requests sent for slow provider calls.", ("provider",)
+)
+
+
+def _collect() -> None:
+    cache = tool_cache.stats()
+    for result in ("memory_hits", "db_hits", "misses", "bypassed"):
+        TOOL_CACHE_LOOKUPS.set(result, value=cache[result])
+    TOOL_CACHE_ENTRIES.set(value=cache["entries"])
+    TOOL_CACHE_BYTES.set(value=cache["bytes"])
+
+    flights = inflight.stats()
+    SINGLEFLIGHT_CALLS.set("leader", value=flights["leaders"])
+    SINGLEFLIGHT_CALLS.set("collapsed", value=flights["collapsed"])
+
+    for name, bucket in limiter.stats().items():
+        provider, key = name.split(":", 1)
+        RATE_LIMIT_QUEUE_SECONDS.set(provider, key, value=bucket["queue_seconds_total"])
+        RATE_LIMIT_THROTTLED.set(provider, key, value=bucket["throttled"])
+        RATE_LIMIT_RATE.set(provider, key, value=bucket["rate"])
+
+    for provider, stats in resilience.stats().items():
+        PROVIDER_CIRCUIT_OPEN.set(provider, value=0 if stats["circuit"] == "closed" else 1)
+        PROVIDER_CIRCUIT_REJECTED.set(provider, value=stats["rejected"])
+        PROVIDER_HEDGED.set(provider, value=stats["hedged"])
+
+
+registry.add_collector(_collect)
+
+
+def _route_template(scope: Scope) -> str:
+    """Path template of the matched route, e.g. `/scans/{scan_id}`.
+
+    Depending on the FastAPI version, a route from an included router knows
+    either its full path or only the part after the router's prefix; the
+    (static) prefix is then the request path's leading segments.
+    """
+
+    route = scope.get("route")
+    if route is None:
+        return "unmatched"
+    path: str = getattr(route, "path", "")
+    segments = scope["path"].split("/")
+    prefix = "/".join(segments[: len(segments) - path.count("/")])
+    return prefix + path
+
+
+class MetricsMiddleware:
+    """Record `http_request_duration_seconds` per route template.
+
+    Plain ASGI (no BaseHTTPMiddleware) to keep per-request overhead to a
+    timer read. Time is taken at response start, so long-lived SSE streams
+    report their time to first byte.
+    """
+
+    def __init__(self, app: Callable[[Scope, Any, Any], Awaitable[None]]) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Any, send: Callable[[Message], Awaitable[None]]) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        observed = False
+
+        def _observe(status: int) -> None:
+            nonlocal observed
+            observed = True
+            HTTP_REQUEST_SECONDS.observe(since(started), scope["method"], _route_template(scope), str(status))
+
+        async def _send(message: Message) -> None:
+            if message["type"] == "http.response.start" and not observed:
+                _observe(message["status"])
+            await send(message)
+
+        try:
+            await self.app(scope, receive, _send)
+        except Exception:
+            if not observed:
+                _observe(500)
+            raise
+
+
+@router.get("/metrics")
+async def metrics(session: AsyncSession = Depends(get_session)) -> Response:
+    """Prometheus text format metrics for this process.
+
+    Scan queue depth and in-flight scans come from the DB, so they cover
+    every worker; everything else is this process's counters. Standalone
+    workers expose theirs on WORKER_METRICS_PORT.
+    """
+
+    counts: Dict[str, int] = dict(
+        (
+            await session.exec(
+                select(Scan.status, func.count())
+                .where(col(Scan.status).in_((STATUS_PENDING, STATUS_RUNNING)))
+                .group_by(Scan.status)
+            )
+        ).all()
+    )
+    SCAN_QUEUE_DEPTH.set(value=counts.get(STATUS_PENDING, 0))
+    SCANS_IN_FLIGHT.set(value=counts.get(STATUS_RUNNING, 0))
+    return Response(content=registry.render(), media_type=CONTENT_TYPE)
@@ -4,6 +4,7 @@ from fastapi import APIRouter
 from pydantic import BaseModel
 
 from ..core import planner_service
+from ..core.plan_cache import plan_cache
 
 
 router = APIRouter()
@@ -24,3 +25,10 @@ async def get_plan(request: PlannerRequest) -> Dict[str, Any]:
 
     plan = await planner_service.get_plan(state=request.state, goal=request.goal or "produce_risk_report")
     return plan
+
+
+@router.get("/cache")
+async def plan_cache_stats() -> Dict[str, Any]:
+    """Hit-rate counters of the planner's plan cache (this process)."""
+
+    return plan_cache.stats()
@@ -1,17 +1,55 @@
-from typing import Any, Dict, List
+import asyncio
+import json
+import os
+from typing import Any, AsyncIterator, Dict, List, Literal
 
-from fastapi import APIRouter, Depends, HTTPException
-from pydantic import BaseModel
-from sqlmodel import Session, select
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Response
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, Field
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
 
-from ..db.session import get_session
-from ..db.models import Scan, Item
-from ..core.scan_runner import run_scan_once
+from ..db.session import async_session, get_session
+from ..db.models import Scan, Item, ScanTrace
+from ..db.pagination import InvalidCursor, decode_cursor, keyset_after, next_cursor
+from ..core import job_queue, tracing
+from ..core.image_index import IMAGE_HASH_PATTERN
+from ..core.scan_events import (
+    ITEM_LIST_FIELDS,
+    broker,
+    format_sse,
+    item_payload,
+    latest_event_id,
+    read_events,
+)
 from ..core.auth_utils import decode_token
 
 
 router = APIRouter()
 
+# With no events for this long, the SSE stream re-reads the scan status and
+# any events it missed from the DB (covers workers that died without
+# publishing a final status, and events from other processes without
+# Postgres NOTIFY) and sends a keep-alive comment.
+SSE_STATUS_POLL_SECONDS = float(os.getenv("SSE_STATUS_POLL_SECONDS", "5"))
+# Streams end (with a `timeout` event) after this long without events, e.g.
+# for a scan that is never run, and after this long in total.
+SSE_IDLE_TIMEOUT_SECONDS = float(os.getenv("SSE_IDLE_TIMEOUT_SECONDS", "300"))
+SSE_MAX_STREAM_SECONDS = float(os.getenv("SSE_MAX_STREAM_SECONDS", "3600"))
+
+_TERMINAL_STATUSES = (job_queue.STATUS_COMPLETED, job_queue.STATUS_FAILED)
+
+ITEMS_PAGE_SIZE = int(os.getenv("ITEMS_PAGE_SIZE", "100"))
+ITEMS_MAX_PAGE_SIZE = int(os.getenv("ITEMS_MAX_PAGE_SIZE", "500"))
+
+# Sort key -> (column, natural direction descending?, id tie-break descending?),
+# matching the composite indexes on Item. The opposite order walks the same
+# index backwards.
+_ITEM_SORTS = {
+    "risk_score": (Item.risk_score, True, False),
+    "created_at": (Item.created_at, False, False),
+}
+
 
 class Seeds(BaseModel):
     # Free-text query describing what the user wants scanned/searches for.
@@ -21,18 +59,21 @@ class Seeds(BaseModel):
     email: str | None = None
     usernames: list[str] | None = None
     phones: list[str] | None = None
-    # Optional image hash used for reverse image search.
-    image_hash: str | None = None
+    # Optional image hash used for reverse image search: a 64-bit perceptual
+    # hash (16 hex digits) or the image's SHA-256.
+    image_hash: str | None = Field(None, pattern=IMAGE_HASH_PATTERN)
 
 
 class CreateScanRequest(BaseModel):
     seeds: Seeds
+    # Skip the cross-scan tool result cache (e.g. for an explicit rescan).
+    bypass_cache: bool = False
 
 
 @router.post("")
 async def create_scan(
     payload: CreateScanRequest,
-    session: Session = Depends(get_session),
+    session: AsyncSession = Depends(get_session),
     authorization: str | None = None,
 ) -> Dict[str, Any]:
     user_id = None
@@ -40,57 +81,236 @@ async def create_scan(
         token = authorization.split(" ", 1)[1]
         user_id = decode_token(token)
 
-    scan = Scan(seeds_json=payload.seeds.json(), status="pending", user_id=user_id)
+    scan = Scan(
+        seeds_json=payload.seeds.json(),
+        status=job_queue.STATUS_CREATED,
+        user_id=user_id,
+        bypass_cache=payload.bypass_cache,
+    )
     session.add(scan)
-    session.commit()
-    session.refresh(scan)
+    await session.commit()
+    await session.refresh(scan)
     return {"scan_id": scan.id}
 
 
 @router.get("/{scan_id}")
-async def get_scan(scan_id: int, session: Session = Depends(get_session)) -> Dict[str, Any]:
+async def get_scan(scan_id: int, session: AsyncSession = Depends(get_session)) -> Dict[str, Any]:
     statement = select(Scan).where(Scan.id == scan_id)
-    scan = session.exec(statement).first()
+    scan = (await session.exec(statement)).first()
     if not scan:
         raise HTTPException(status_code=404, detail="Scan not found")
     return {
         "scan_id": scan.id,
         "status": scan.status,
+        "partial": scan.partial,
         "seeds_json": scan.seeds_json,
         "created_at": scan.created_at,
         "updated_at": scan.updated_at,
     }
 
 
-@router.post("/{scan_id}/run")
-async def run_scan(scan_id: int, session: Session = Depends(get_session)) -> Dict[str, Any]:
-    result = await run_scan_once(scan_id=scan_id, session=session)
-    return result
+@router.post("/{scan_id}/run", status_code=202)
+async def run_scan(scan_id: int, session: AsyncSession = Depends(get_session)) -> Dict[str, Any]:
+    """Queue the scan for a worker and return immediately.
+
+    Poll `GET /scans/{scan_id}` for the status. Re-running a finished scan
+    queues it again; a scan that is already queued or running is left as is.
+    """
+
+    scan = (await session.exec(select(Scan).where(Scan.id == scan_id))).first()
+    if not scan:
+        raise HTTPException(status_code=404, detail="Scan not found")
+    await job_queue.enqueue_scan(session, scan)
+    return {"scan_id": scan.id, "status": scan.status}
 
 
 @router.get("/{scan_id}/items")
-async def list_scan_items(scan_id: int, session: Session = Depends(get_session)) -> List[Dict[str, Any]]:
-    statement = select(Item).where(Item.scan_id == scan_id)
-    items = session.exec(statement).all()
-    return [
-        {
-            "id": item.id,
-            "category": item.category,
-            "source": item.source,
-            "title": item.title,
-            "snippet": item.snippet,
-            "url": item.url,
-            "confidence": item.confidence,
-            "risk_score": item.risk_score,
-        }
-        for item in items
-    ]
+async def list_scan_items(
+    scan_id: int,
+    response: Response,
+    session: AsyncSession = Depends(get_session),
+    limit: int = Query(ITEMS_PAGE_SIZE, ge=1, le=ITEMS_MAX_PAGE_SIZE),
+    cursor: str | None = None,
+    sort: Literal["risk_score", "created_at"] = "created_at",
+    order: Literal["asc", "desc"] | None = None,
+    category: str | None = None,
+    source: str | None = None,
+    min_risk_score: float | None = None,
+) -> List[Dict[str, Any]]:
+    """One page of a scan's items (list-view fields only).
+
+    Keyset-paginated: when more items exist, the `X-Next-Cursor` response
+    header holds the `cursor` for the next page. `sort=risk_score` defaults
+    to highest first, `sort=created_at` to oldest first; `order` overrides.
+    Keep the same sort, order and filters while following a cursor.
+    """
+
+    column, natural_desc, id_desc = _ITEM_SORTS[sort]
+    descending = natural_desc if order is None else order == "desc"
+    if descending != natural_desc:
+        id_desc = not id_desc
+
+    columns = [getattr(Item, field) for field in ITEM_LIST_FIELDS]
+    if sort not in ITEM_LIST_FIELDS:
+        columns.append(column)  # needed for the next cursor
+    statement = select(*columns).where(Item.scan_id == scan_id)
+    if category is not None:
+        statement = statement.where(Item.category == category)
+    if source is not None:
+        statement = statement.where(Item.source == source)
+    if min_risk_score is not None:
+        statement = statement.where(Item.risk_score >= min_risk_score)
+    if cursor:
+        try:
+            value, last_id = decode_cursor(cursor, is_datetime=sort == "created_at")
+        except InvalidCursor:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        statement = statement.where(keyset_after(column, Item.id, value, last_id, descending, id_desc))
+
+    statement = statement.order_by(
+        column.desc() if descending else column.asc(),
+        Item.id.desc() if id_desc else Item.id.asc(),  # type: ignore[union-attr]
+    ).limit(limit + 1)
+    rows = (await session.exec(statement)).all()
+
+    next_page = next_cursor(rows, limit, sort)
+    if next_page:
+        response.headers["X-Next-Cursor"] = next_page
+    return [item_payload(row) for row in rows[:limit]]
+
+
+async def _read_status(scan_id: int) -> str | None:
+    async with async_session() as session:
+        return (await session.exec(select(Scan.status).where(Scan.id == scan_id))).first()
+
+
+@router.get("/{scan_id}/events")
+async def stream_scan_events(
+    scan_id: int, last_event_id: str | None = Header(None, alias="Last-Event-ID")
+) -> StreamingResponse:
+    """Server-sent events for a scan's progress.
+
+    Events: `status`, `plan`, `tool_started`, `tool_finished` (with
+    `duration_ms`), `items` (unscored, as each tool returns), `scores` (the
+    persisted, scored items) and a final `status` of completed/failed, after
+    which the stream ends. Events are pushed as they are published (from
+    other processes via Postgres NOTIFY); each carries an `id`, and a
+    reconnect with `Last-Event-ID` first replays what it missed. A stream
+    idle for SSE_IDLE_TIMEOUT_SECONDS, or open for SSE_MAX_STREAM_SECONDS,
+    ends with a `timeout` event.
+    """
+
+    if await _read_status(scan_id) is None:
+        raise HTTPException(status_code=404, detail="Scan not found")
+    try:
+        replay_after = int(last_event_id) if last_event_id else None
+    except ValueError:
+        replay_after = None
+
+    async def _events() -> AsyncIterator[str]:
+        # Subscribe before reading the DB so nothing published in between is
+        # lost; anything delivered twice is skipped by id.
+        queue = broker.subscribe(scan_id)
+        try:
+            async with async_session() as session:
+                if replay_after is None:
+                    last_id = await latest_event_id(session, scan_id)
+                    missed = []
+                else:
+                    last_id = replay_after
+                    missed = await read_events(session, scan_id, last_id)
+                status = (await session.exec(select(Scan.status).where(Scan.id == scan_id))).first()
+
+            for row in missed:
+                last_id = row.id  # type: ignore[assignment]
+                yield format_sse(row.event, json.loads(row.data_json), row.id)
+            yield format_sse("status", {"status": status})
+            if status in _TERMINAL_STATUSES:
+                return
+
+            loop = asyncio.get_running_loop()
+            deadline = loop.time() + SSE_MAX_STREAM_SECONDS
+            idle = 0.0
+            while True:
+                try:
+                    events = [await asyncio.wait_for(queue.get(), SSE_STATUS_POLL_SECONDS)]
+                except asyncio.TimeoutError:
+                    idle += SSE_STATUS_POLL_SECONDS
+                    async with async_session() as session:
+                        events = await read_events(session, scan_id, last_id)
+                        if not events:
+                            status = (await session.exec(select(Scan.status).where(Scan.id == scan_id))).first()
+
+                for row in events:
+                    if row.id <= last_id:  # type: ignore[operator]
+                        continue
+                    idle = 0.0
+                    last_id = row.id  # type: ignore[assignment]
+                    data = json.loads(row.data_json)
+                    yield format_sse(row.event, data, row.id)
+                    if row.event == "status" and data.get("status") in _TERMINAL_STATUSES:
+                        return
+                if events and loop.time() < deadline:
+                    continue
+
+                if not events and status in _TERMINAL_STATUSES:
+                    yield format_sse("status", {"status": status})
+                    return
+                if idle >= SSE_IDLE_TIMEOUT_SECONDS or loop.time() >= deadline:
+                    yield format_sse("timeout", {"status": status})
+                    return
+                yield ": keep-alive\n\n"
+        finally:
+            broker.unsubscribe(scan_id, queue)
+
+    return StreamingResponse(
+        _events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.get("/{scan_id}/trace")
+async def get_scan_trace(
+    scan_id: int,
+    session: AsyncSession = Depends(get_session),
+    format: Literal["waterfall", "otlp"] = "waterfall",
+    trace_id: str | None = None,
+) -> Dict[str, Any]:
+    """Span timings of a traced run of the scan (the latest by default).
+
+    Only sampled or slow runs are recorded (TRACE_SAMPLE_RATE,
+    TRACE_SLOW_SCAN_MS). `format=otlp` returns an OTLP/JSON export body
+    that can be posted to a collector's `/v1/traces`.
+    """
+
+    scan = (await session.exec(select(Scan.id).where(Scan.id == scan_id))).first()
+    if scan is None:
+        raise HTTPException(status_code=404, detail="Scan not found")
+    statement = select(ScanTrace).where(ScanTrace.scan_id == scan_id)
+    if trace_id is not None:
+        statement = statement.where(ScanTrace.trace_id == trace_id)
+    statement = statement.order_by(ScanTrace.id.desc()).limit(1)  # type: ignore[union-attr]
+    trace = (await session.exec(statement)).first()
+    if trace is None:
+        raise HTTPException(status_code=404, detail="No trace recorded for this scan")
+
+    spans = json.loads(trace.spans_json)
+    if format == "otlp":
+        return tracing.to_otlp(trace.trace_id, spans)
+    return {
+        "scan_id": scan_id,
+        "trace_id": trace.trace_id,
+        "duration_ms": trace.duration_ms,
+        "created_at": trace.created_at,
+        "spans": tracing.waterfall(spans),
+    }
 
 
 @router.get("/items/{item_id}")
-async def get_item(item_id: int, session: Session = Depends(get_session)) -> Dict[str, Any]:
+async def get_item(item_id: int, session: AsyncSession = Depends(get_session)) -> Dict[str, Any]:
     statement = select(Item).where(Item.id == item_id)
-    item = session.exec(statement).first()
+    item = (await session.exec(statement)).first()
     if not item:
         raise HTTPException(status_code=404, detail="Item not found")
     return {
@@ -0,0 +1,448 @@
+"""Offline breach index (used by checkBreach as a stand-in for HIBP).
+
+    python -m app.core.breach_index ingest dump.txt --name ExampleBreach --date 2023-06-01 \\
+        --details "..." --data-classes "Email addresses,Passwords"
+    python -m app.core.breach_index lookup alice@example.com      # or --file users.txt
+    python -m app.core.breach_index range 1E4C9                   # HIBP-style k-anonymity range
+
+Dumps are text files with one email address or SHA-1 hex digest (of the
+lowercased email) per line. Set BREACH_INDEX_PATH to the index directory.
+One process ingests at a time; readers switch to a new build on their next
+lookup.
+"""
+
+import argparse
+import hashlib
+import json
+import math
+import mmap
+import os
+import shutil
+import struct
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+
+BREACH_INDEX_PATH = os.getenv("BREACH_INDEX_PATH", "")
+# Bloom filter size per record: 10 bits gives ~1% false positives.
+BREACH_INDEX_BLOOM_BITS = int(os.getenv("BREACH_INDEX_BLOOM_BITS", "10"))
+
+# Records are 20-byte SHA-1 digests plus the breach they appear in, sorted.
+RECORD = np.dtype([("hash", "S20"), ("breach", "<u4")])
+
+# HIBP's range model: the first 5 hex characters (20 bits) of the digest.
+PREFIX_CHARS = 5
+_PREFIX_BITS = PREFIX_CHARS * 4
+_PREFIXES = 1 << _PREFIX_BITS
+
+# Ingest sorts through this many partitions (by the digest's first byte), so
+# memory use is about 1/256th of the index plus one input chunk.
+_PARTITIONS = 256
+_INGEST_CHUNK = 1_000_000
+# Readers look for a newer build at most this often.
+_REFRESH_SECONDS = 1.0
+_HEX = frozenset("0123456789abcdef")
+_U64 = (1 << 64) - 1
+_BOUNDS = struct.Struct("<QQ")
+_BREACH_ID = struct.Struct("<I")
+
+
+def email_digest(email: str) -> bytes:
+    return hashlib.sha1(email.strip().lower().encode("utf-8")).digest()
+
+
+def _line_digest(line: str) -> Optional[bytes]:
+    """Digest for a dump line: an email, or a SHA-1 hex digest (optionally `:count`)."""
+
+    text = line.strip()
+    if "@" in text:
+        return email_digest(text)
+    text = text.split(":", 1)[0].lower()
+    if len(text) == 40 and _HEX.issuperset(text):
+        return bytes.fromhex(text)
+    return None
+
+
+def _map(path: Path) -> mmap.mmap:
+    with path.open("rb") as f:
+        mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    # Lookups touch a page or two at random; don't read ahead from disk around them.
+    if hasattr(mmap, "MADV_RANDOM"):
+        mapped.madvise(mmap.MADV_RANDOM)
+    return mapped
+
+
+def _digest_rows(digests: List[bytes], breach_id: int) -> np.ndarray:
+    rows = np.empty(len(digests), dtype=RECORD)
+    rows["hash"] = np.frombuffer(b"".join(digests), dtype="S20")
+    rows["breach"] = breach_id
+    return rows
+
+
+def _digest_bytes(hashes: np.ndarray) -> np.ndarray:
+    return np.ascontiguousarray(hashes).view(np.uint8).reshape(-1, 20)
+
+
+def _prefixes(hashes: np.ndarray) -> np.ndarray:
+    b = _digest_bytes(hashes).astype(np.uint32)
+    return (b[:, 0] << 12) | (b[:, 1] << 4) | (b[:, 2] >> 4)
+
+
+def _bloom_positions(hashes: np.ndarray, bits: int, k: int) -> np.ndarray:
+    """Bit positions of each digest (double hashing over two 64-bit slices of it)."""
+
+    b = _digest_bytes(hashes)
+    h1 = np.ascontiguousarray(b[:, 4:12]).view("<u8").ravel()
+    h2 = np.ascontiguousarray(b[:, 12:20]).view("<u8").ravel() | np.uint64(1)
+    steps = np.arange(k, dtype=np.uint64)
+    # uint64 arithmetic wraps; the same on every platform.
+    return (h1[:, None] + steps[None, :] * h2[:, None]) % np.uint64(bits)
+
+
+class BreachIndex:
+    """SHA-1 breach records in a sorted, memory-mapped file.
+
+    A build lives in its own directory, named in `CURRENT`:
+
+    - `records.bin`: `RECORD`s sorted by digest (one per breach it is in).
+    - `prefix.u64`: where each 5-hex-char prefix's records start, so a
+      lookup is one bucket slice plus a binary search within it.
+    - `bloom.u8`: Bloom filter over the digests; most lookups of addresses
+      that aren't in any breach stop there, touching k bits.
+    - `breaches.json`: breach metadata in checkBreach's format, by id.
+
+    Nothing is loaded up front; lookups read a few pages of the mapped files.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = Path(path)
+        self.path.mkdir(parents=True, exist_ok=True)
+        self._current_path = self.path / "CURRENT"
+        self._version: Tuple[int, int] = (-1, -1)
+        self._next_refresh = 0.0
+        self.bloom_negatives = 0
+        self._reload()
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    def _current_version(self) -> Tuple[int, int]:
+        # `CURRENT` is replaced, never rewritten: a new build has a new inode
+        # (or, if one is reused, a new mtime).
+        try:
+            stat = self._current_path.stat()
+        except FileNotFoundError:
+            return (0, 0)
+        return (stat.st_ino, stat.st_mtime_ns)
+
+    def _reload(self) -> None:
+        self._version = self._current_version()
+        # Point lookups read the mmaps directly (cheaper than numpy calls per
+        # key); bulk lookups and ingest use numpy views of the same pages.
+        self._records_mm: Any = b""
+        self._prefix_mm: Any = b""
+        self._bloom_mm: Any = b""
+        self._bloom_bits = self._bloom_hashes = 0
+        self.breaches: List[Dict[str, Any]] = []
+        self.build: Optional[str] = None
+        if self._current_path.exists():
+            build = self.path / self._current_path.read_text(encoding="utf-8").strip()
+            meta = json.loads((build / "meta.json").read_text(encoding="utf-8"))
+            self.breaches = json.loads((build / "breaches.json").read_text(encoding="utf-8"))
+            if meta["records"]:
+                self._records_mm = _map(build / "records.bin")
+                self._prefix_mm = _map(build / "prefix.u64")
+                self._bloom_mm = _map(build / "bloom.u8")
+                self._bloom_bits, self._bloom_hashes = meta["bloom_bits"], meta["bloom_hashes"]
+            self.build = build.name
+        self._records = np.frombuffer(self._records_mm, dtype=RECORD)
+        self._prefix = np.frombuffer(self._prefix_mm, dtype="<u8") if self._prefix_mm else np.zeros(_PREFIXES + 1, dtype="<u8")
+        self._bloom = np.frombuffer(self._bloom_mm, dtype=np.uint8)
+
+    def refresh(self, force: bool = False) -> None:
+        """Switch to a newer build (e.g. ingested by another process).
+
+        Checks at most every _REFRESH_SECONDS unless forced.
+        """
+
+        now = time.monotonic()
+        if not force and now < self._next_refresh:
+            return
+        self._next_refresh = now + _REFRESH_SECONDS
+        if self._current_version() != self._version:
+            self._reload()
+
+    def _may_contain(self, hashes: np.ndarray) -> np.ndarray:
+        if not self._bloom_bits:
+            return np.zeros(len(hashes), dtype=bool)
+        positions = _bloom_positions(hashes, self._bloom_bits, self._bloom_hashes)
+        bits = self._bloom[positions >> np.uint64(3)] >> (positions & np.uint64(7)).astype(np.uint8)
+        return (bits & 1).all(axis=1)
+
+    def _may_contain_one(self, digest: bytes) -> bool:
+        """`_may_contain` for a single digest, in plain Python."""
+
+        if not self._bloom_bits:
+            return False
+        h1 = int.from_bytes(digest[4:12], "little")
+        h2 = int.from_bytes(digest[12:20], "little") | 1
+        for step in range(self._bloom_hashes):
+            position = ((h1 + step * h2) & _U64) % self._bloom_bits
+            if not self._bloom_mm[position >> 3] >> (position & 7) & 1:
+                return False
+        return True
+
+    def _bucket(self, prefix: int) -> np.ndarray:
+        return self._records[int(self._prefix[prefix]) : int(self._prefix[prefix + 1])]
+
+    def _breach_ids(self, digest: bytes) -> List[int]:
+        """Binary search for `digest` within its prefix bucket."""
+
+        if not self._records_mm:
+            return []
+        mm, size = self._records_mm, RECORD.itemsize
+        lo, end = _BOUNDS.unpack_from(self._prefix_mm, (int.from_bytes(digest[:3], "big") >> 4) * 8)
+        hi = end
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if mm[mid * size : mid * size + 20] < digest:
+                lo = mid + 1
+            else:
+                hi = mid
+        ids: List[int] = []
+        while lo < end and mm[lo * size : lo * size + 20] == digest:
+            ids.append(_BREACH_ID.unpack_from(mm, lo * size + 20)[0])
+            lo += 1
+        return ids
+
+    def lookup_digests(self, digests: List[bytes]) -> List[List[Dict[str, Any]]]:
+        """Breaches for each SHA-1 digest (in checkBreach's `breaches` format)."""
+
+        self.refresh()
+        if not digests:
+            return []
+        maybe = self._may_contain(np.frombuffer(b"".join(digests), dtype="S20"))
+        self.bloom_negatives += int(len(digests) - maybe.sum())
+        return [
+            [self.breaches[i] for i in self._breach_ids(digest)] if hit else []
+            for digest, hit in zip(digests, maybe)
+        ]
+
+    def lookup(self, email: str) -> List[Dict[str, Any]]:
+        self.refresh()
+        digest = email_digest(email)
+        if not self._may_contain_one(digest):
+            self.bloom_negatives += 1
+            return []
+        return [self.breaches[i] for i in self._breach_ids(digest)]
+
+    def lookup_many(self, emails: Iterable[str]) -> Dict[str, List[Dict[str, Any]]]:
+        """Breaches per email for a whole list, with one vectorized Bloom pass."""
+
+        emails = list(dict.fromkeys(emails))
+        results = self.lookup_digests([email_digest(email) for email in emails])
+        return dict(zip(emails, results))
+
+    def range(self, prefix: str) -> Dict[str, List[str]]:
+        """Digest suffixes (35 hex chars) under a 5-hex-char prefix, with their breach names.
+
+        The k-anonymity model of HIBP's range API: a client sends only the
+        prefix and matches its full digest locally.
+        """
+
+        self.refresh()
+        prefix = prefix.strip().lower()
+        if len(prefix) != PREFIX_CHARS or not _HEX.issuperset(prefix):
+            raise ValueError(f"prefix must be {PREFIX_CHARS} hex characters")
+        suffixes: Dict[str, List[str]] = {}
+        for row in self._bucket(int(prefix, 16)):
+            suffix = row["hash"].ljust(20, b"\0").hex()[PREFIX_CHARS:]
+            suffixes.setdefault(suffix, []).append(self.breaches[int(row["breach"])]["name"])
+        return suffixes
+
+    def ingest(self, breach: Dict[str, Any], lines: Iterable[str]) -> Dict[str, int]:
+        """Add the emails/digests in `lines` as members of `breach` and publish a new build.
+
+        `breach` is checkBreach's format (name, date, details, url,
+        data_classes); ingesting under an existing name adds to it and
+        updates its metadata. Unparseable lines are skipped.
+        """
+
+        self.refresh(force=True)
+        breaches = list(self.breaches)
+        names = [b["name"] for b in breaches]
+        if breach["name"] in names:
+            breach_id = names.index(breach["name"])
+            breaches[breach_id] = breach
+        else:
+            breach_id = len(breaches)
+            breaches.append(breach)
+
+        build = self.path / f"build-{time.time_ns()}"
+        parts_dir = build / "partitions"
+        parts_dir.mkdir(parents=True)
+        added = skipped = 0
+        partitions = [(parts_dir / f"{p:02x}").open("wb") for p in range(_PARTITIONS)]
+        try:
+            for digests, chunk_skipped in self._chunks(lines):
+                skipped += chunk_skipped
+                if not digests:
+                    continue
+                rows = _digest_rows(digests, breach_id)
+                first = _digest_bytes(rows["hash"])[:, 0]
+                order = np.argsort(first, kind="stable")
+                bounds = np.searchsorted(first[order], np.arange(_PARTITIONS + 1))
+                rows = rows[order]
+                for p in np.flatnonzero(np.diff(bounds)):
+                    partitions[p].write(rows[bounds[p] : bounds[p + 1]].tobytes())
+                added += len(rows)
+        finally:
+            for f in partitions:
+                f.close()
+
+        records = self._write_build(build, parts_dir, len(self._records) + added)
+        (build / "breaches.json").write_text(json.dumps(breaches, ensure_ascii=False), encoding="utf-8")
+        shutil.rmtree(parts_dir)
+
+        tmp = self._current_path.with_suffix(".tmp")
+        tmp.write_text(build.name, encoding="utf-8")
+        os.replace(tmp, self._current_path)
+        previous = self.build
+        # The previous build stays for readers that haven't switched yet.
+        for old in self.path.glob("build-*"):
+            if old.name not in (build.name, previous):
+                shutil.rmtree(old, ignore_errors=True)
+        self._reload()
+        return {"added": added, "skipped": skipped, "records": records}
+
+    @staticmethod
+    def _chunks(lines: Iterable[str]) -> Iterator[Tuple[List[bytes], int]]:
+        digests: List[bytes] = []
+        skipped = 0
+        for line in lines:
+            digest = _line_digest(line)
+            if digest is None:
+                skipped += bool(line.strip())
+                continue
+            digests.append(digest)
+            if len(digests) >= _INGEST_CHUNK:
+                yield digests, skipped
+                digests, skipped = [], 0
+        yield digests, skipped
+
+    def _write_build(self, build: Path, parts_dir: Path, max_records: int) -> int:
+        """Merge the current records with the partitioned new ones into `build`."""
+
+        bloom_bits = max(64, math.ceil(max_records * BREACH_INDEX_BLOOM_BITS / 8) * 8)
+        bloom_hashes = max(1, round(BREACH_INDEX_BLOOM_BITS * math.log(2)))
+        bloom = np.zeros(bloom_bits // 8, dtype=np.uint8)
+        counts = np.zeros(_PREFIXES, dtype=np.int64)
+        records = 0
+        prefixes_per_partition = _PREFIXES // _PARTITIONS
+        with (build / "records.bin").open("wb") as out:
+            for p in range(_PARTITIONS):
+                existing = self._records[
+                    int(self._prefix[p * prefixes_per_partition]) : int(self._prefix[(p + 1) * prefixes_per_partition])
+                ]
+                new = np.fromfile(parts_dir / f"{p:02x}", dtype=RECORD)
+                if not len(existing) and not len(new):
+                    continue
+                # Sorted by digest, then breach; a digest listed twice in one
+                # breach is stored once.
+                rows = np.unique(np.concatenate([np.asarray(existing), new]))
+                out.write(rows.tobytes())
+                records += len(rows)
+                first = p * prefixes_per_partition
+                counts[first : first + prefixes_per_partition] = np.bincount(
+                    _prefixes(rows["hash"]) - first, minlength=prefixes_per_partition
+                )
+                positions = _bloom_positions(rows["hash"], bloom_bits, bloom_hashes).ravel()
+                np.bitwise_or.at(bloom, positions >> np.uint64(3), (1 << (positions & np.uint64(7))).astype(np.uint8))
+
+        prefix = np.zeros(_PREFIXES + 1, dtype="<u8")
+        np.cumsum(counts, out=prefix[1:])
+        prefix.tofile(build / "prefix.u64")
+        bloom.tofile(build / "bloom.u8")
+        meta = {"records": records, "bloom_bits": bloom_bits, "bloom_hashes": bloom_hashes}
+        (build / "meta.json").write_text(json.dumps(meta), encoding="utf-8")
+        return records
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "records": len(self._records),
+            "breaches": len(self.breaches),
+            "bloom_bits": self._bloom_bits,
+            "bloom_negatives": self.bloom_negatives,
+        }
+
+
+_index: Optional[BreachIndex] = None
+
+
+def get_breach_index() -> Optional[BreachIndex]:
+    """The index at BREACH_INDEX_PATH, or None when no local index is configured."""
+
+    global _index
+    if _index is None and BREACH_INDEX_PATH:
+        _index = BreachIndex(BREACH_INDEX_PATH)
+    return _index
+
+
+def _read_lines(name: str) -> Iterator[str]:
+    if name == "-":
+        yield from sys.stdin
+        return
+    with open(name, "r", encoding="utf-8", errors="replace") as f:
+        yield from f
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Manage the offline breach index.")
+    parser.add_argument("--path", default=BREACH_INDEX_PATH, help="index directory (BREACH_INDEX_PATH)")
+    commands = parser.add_subparsers(dest="command", required=True)
+    ingest = commands.add_parser("ingest", help="add a dump (emails or SHA-1 hex per line; - for stdin)")
+    ingest.add_argument("file")
+    ingest.add_argument("--name", required=True)
+    ingest.add_argument("--date", default="")
+    ingest.add_argument("--details", default="")
+    ingest.add_argument("--url", default="")
+    ingest.add_argument("--data-classes", default="", help="comma-separated")
+    lookup = commands.add_parser("lookup", help="print breaches per email as JSON lines")
+    lookup.add_argument("emails", nargs="*")
+    lookup.add_argument("--file", help="one email per line; - for stdin")
+    prefix = commands.add_parser("range")
+    prefix.add_argument("prefix")
+    commands.add_parser("stats")
+    opts = parser.parse_args()
+
+    if not opts.path:
+        parser.error("--path or BREACH_INDEX_PATH is required")
+    index = BreachIndex(opts.path)
+    if opts.command == "ingest":
+        breach = {
+            "name": opts.name,
+            "date": opts.date,
+            "details": opts.details,
+            "url": opts.url,
+            "data_classes": [c.strip() for c in opts.data_classes.split(",") if c.strip()],
+        }
+        print(json.dumps(index.ingest(breach, _read_lines(opts.file))))
+    elif opts.command == "lookup":
+        emails = list(opts.emails)
+        if opts.file:
+            emails.extend(line.strip() for line in _read_lines(opts.file) if line.strip())
+        for email, breaches in index.lookup_many(emails).items():
+            print(json.dumps({"email": email, "pwned": bool(breaches), "breaches": breaches}, ensure_ascii=False))
+    elif opts.command == "range":
+        for suffix, names in index.range(opts.prefix).items():
+            print(f"{suffix.upper()}:{','.join(names)}")
+    else:
+        print(json.dumps(index.stats()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,36 @@
+import os
+from typing import Dict
+
+
+def tool_int_map(env_name: str, defaults: Dict[str, int], minimum: int = 0) -> Dict[str, int]:
+    """Per-tool integer settings from a `tool=value,tool=value` env var.
+
+    e.g. `TOOL_CONCURRENCY=searchWeb=4,checkBreach=1`. Entries in the env var
+    override `defaults`; malformed entries are ignored.
+    """
+
+    values = dict(defaults)
+    for part in os.getenv(env_name, "").split(","):
+        if "=" not in part:
+            continue
+        name, raw = part.split("=", 1)
+        try:
+            values[name.strip()] = max(minimum, int(raw))
+        except ValueError:
+            continue
+    return values
+
+
+def tool_float_map(env_name: str, defaults: Dict[str, float], minimum: float = 0.0) -> Dict[str, float]:
+    """Like `tool_int_map`, for fractional settings (e.g. requests/second)."""
+
+    values = dict(defaults)
+    for part in os.getenv(env_name, "").split(","):
+        if "=" not in part:
+            continue
+        name, raw = part.split("=", 1)
+        try:
+            values[name.strip()] = max(minimum, float(raw))
+        except ValueError:
+            continue
+    return values
@@ -0,0 +1,324 @@
+import json
+import os
+import re
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+import numpy as np
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from ..db.models import Item, Scan
+
+
+DEDUP_ENABLED = os.getenv("DEDUP_ENABLED", "true").lower() == "true"
+# Two title+snippet fingerprints within this many differing bits are the same result.
+DEDUP_SIMHASH_MAX_DISTANCE = max(0, int(os.getenv("DEDUP_SIMHASH_MAX_DISTANCE", "3")))
+# How many of the user's most recent stored items are checked for near-duplicates.
+DEDUP_HISTORY_LIMIT = max(0, int(os.getenv("DEDUP_HISTORY_LIMIT", "5000")))
+
+# Query parameters that only identify the click, never the page.
+_TRACKING_PARAMS = {
+    "fbclid",
+    "gclid",
+    "dclid",
+    "msclkid",
+    "mc_cid",
+    "mc_eid",
+    "igshid",
+    "ref",
+    "ref_src",
+    "_hsenc",
+    "_hsmi",
+}
+_TRACKING_PREFIXES = ("utm_",)
+_DEFAULT_PORTS = {"http": 80, "https": 443}
+# Categories whose results on one page are told apart only by the fragment,
+# e.g. HIBP's https://haveibeenpwned.com/PwnedWebsites#<Breach> per breach.
+# Their rows only ever match each other; all other categories match across
+# connectors (a page found by both searchWeb and searchSocial is one result).
+_FRAGMENT_CATEGORIES = {"breach"}
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+# Shorter texts ("Breach", a bare URL) fingerprint too coarsely to compare.
+_MIN_SIMHASH_TOKENS = 4
+_SHINGLE_SIZE = 3
+# Stored past-scan provenance per item is capped so metadata stays small.
+_MAX_SEEN_IN = 10
+
+_SIMHASH_BITS = 64
+
+
+def canonicalize_url(url: str, keep_fragment: bool = False) -> str:
+    """Normalize a result URL so the same page compares equal across providers.
+
+    Lowercases scheme and host, treats http/https and a leading `www.` as
+    the same site, drops default ports, fragments (unless `keep_fragment`),
+    tracking parameters and a trailing slash, and sorts the remaining query
+    parameters. Returns "" for values that aren't absolute http(s) URLs.
+    """
+
+    if not url:
+        return ""
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    if scheme not in _DEFAULT_PORTS or not parts.hostname:
+        return ""
+
+    host = parts.hostname.lower().rstrip(".")
+    if host.startswith("www."):
+        host = host[4:]
+    try:
+        port = parts.port
+    except ValueError:
+        port = None
+    if port and port != _DEFAULT_PORTS[scheme]:
+        host = f"{host}:{port}"
+
+    path = re.sub(r"/{2,}", "/", parts.path or "/")
+    if len(path) > 1:
+        path = path.rstrip("/")
+
+    query = sorted(
+        (k, v)
+        for k, v in parse_qsl(parts.query, keep_blank_values=True)
+        if k.lower() not in _TRACKING_PARAMS and not k.lower().startswith(_TRACKING_PREFIXES)
+    )
+    return urlunsplit(("https", host, path, urlencode(query), parts.fragment if keep_fragment else ""))
+
+
+def _normalize_for_simhash(text: str) -> Optional[str]:
+    tokens = _TOKEN_RE.findall(text.lower())
+    if len(tokens) < _MIN_SIMHASH_TOKENS:
+        return None
+    return " ".join(tokens)
+
+
+def _mix64(x: np.ndarray) -> np.ndarray:
+    """splitmix64 finalizer: spreads each key's bits evenly over all 64 bits."""
+
+    x = (x ^ (x >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    x = (x ^ (x >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    return x ^ (x >> np.uint64(31))
+
+
+def simhashes(texts: List[str]) -> List[Optional[int]]:
+    """64-bit SimHash of each text over character 3-grams, as signed ints (fit BIGINT).
+
+    Text is lowercased and reduced to its words first, so punctuation,
+    whitespace and encoding variants of the same snippet land within a few
+    bits. Texts too short to fingerprint meaningfully get None. The whole
+    batch is hashed and voted on in a handful of NumPy calls.
+    """
+
+    normalized = [_normalize_for_simhash(text) for text in texts]
+    present = [n for n in normalized if n]
+    if not present:
+        return [None] * len(texts)
+
+    # Code points of all texts back to back; a shingle starts at every
+    # position except the last two of each text (it would span two texts).
+    points = np.frombuffer("".join(present).encode("utf-32-le"), dtype="<u4").astype(np.uint64)
+    lengths = np.array([len(n) for n in present])
+    ends = np.cumsum(lengths)
+    valid = np.ones(len(points) - _SHINGLE_SIZE + 1, dtype=bool)
+    for tail in range(1, _SHINGLE_SIZE):
+        valid[ends[ends - tail < len(valid)] - tail] = False
+
+    # 21 bits per code point, so a 3-char shingle packs into one uint64 key.
+    keys = points[:-2] << np.uint64(42) | points[1:-1] << np.uint64(21) | points[2:]
+    hashes = _mix64(keys[valid])
+
+    # One row of 64 bits (least significant first) per shingle; a bit is set
+    # in a fingerprint when most of that text's shingles have it set.
+    bits = np.unpackbits(hashes.astype("<u8").view(np.uint8).reshape(-1, 8), axis=1, bitorder="little")
+    sizes = lengths - (_SHINGLE_SIZE - 1)
+    starts = np.concatenate(([0], np.cumsum(sizes)[:-1]))
+    majority = np.add.reduceat(bits, starts, axis=0, dtype=np.int64) * 2 > sizes[:, None]
+    packed = np.packbits(majority, axis=1, bitorder="little").view("<i8").ravel().tolist()
+
+    values = iter(packed)
+    return [next(values) if n else None for n in normalized]
+
+
+def simhash(text: str) -> Optional[int]:
+    """SimHash of a single text; see `simhashes`."""
+
+    return simhashes([text])[0]
+
+
+def hamming_distance(a: int, b: int) -> int:
+    return bin((a ^ b) & ((1 << _SIMHASH_BITS) - 1)).count("1")
+
+
+class SimHashIndex:
+    """Finds stored fingerprints within `max_distance` bits of a query.
+
+    Fingerprints are split into `max_distance + 1` bands; two fingerprints
+    that close must agree exactly on at least one band (pigeonhole), so only
+    fingerprints sharing a band value are compared.
+    """
+
+    def __init__(self, max_distance: int) -> None:
+        self.max_distance = max_distance
+        bands = max_distance + 1
+        width = -(-_SIMHASH_BITS // bands)
+        self._bands: List[Tuple[int, int]] = [
+            (start, (1 << min(width, _SIMHASH_BITS - start)) - 1) for start in range(0, _SIMHASH_BITS, width)
+        ]
+        self._tables: List[Dict[int, List[Tuple[int, Any]]]] = [{} for _ in self._bands]
+
+    def _keys(self, value: int) -> Iterable[Tuple[int, int]]:
+        unsigned = value & ((1 << _SIMHASH_BITS) - 1)
+        for i, (shift, mask) in enumerate(self._bands):
+            yield i, unsigned >> shift & mask
+
+    def add(self, value: int, ref: Any) -> None:
+        for i, key in self._keys(value):
+            self._tables[i].setdefault(key, []).append((value, ref))
+
+    def find(self, value: int) -> Optional[Any]:
+        """Ref of the closest stored fingerprint within range, or None."""
+
+        best: Optional[Tuple[int, Any]] = None
+        for i, key in self._keys(value):
+            for other, ref in self._tables[i].get(key, ()):
+                distance = hamming_distance(value, other)
+                if distance <= self.max_distance and (best is None or distance < best[0]):
+                    best = (distance, ref)
+        return best[1] if best is not None else None
+
+
+def _metadata(row: Dict[str, Any]) -> Dict[str, Any]:
+    try:
+        meta = json.loads(row.get("metadata_json") or "{}")
+    except ValueError:
+        meta = {}
+    return meta if isinstance(meta, dict) else {"result": meta}
+
+
+def _provenance(row: Dict[str, Any]) -> Dict[str, Any]:
+    return {"category": row["category"], "source": row["source"], "url": row["url"], "title": row["title"]}
+
+
+def fingerprint_rows(rows: List[Dict[str, Any]]) -> None:
+    """Set `canonical_url` and `simhash` on Item rows in place."""
+
+    fingerprints = simhashes([f"{row.get('title', '')} {row.get('snippet', '')}" for row in rows])
+    for row, fingerprint in zip(rows, fingerprints):
+        keep_fragment = row.get("category") in _FRAGMENT_CATEGORIES
+        row["canonical_url"] = canonicalize_url(row.get("url", ""), keep_fragment) or None
+        row["simhash"] = fingerprint
+
+
+def _match_pool(category: str) -> str:
+    """Rows only match rows in the same pool: one per fragment category, one for the rest."""
+
+    return category if category in _FRAGMENT_CATEGORIES else ""
+
+
+def merge_duplicates(rows: List[Dict[str, Any]], max_distance: int = DEDUP_SIMHASH_MAX_DISTANCE) -> List[Dict[str, Any]]:
+    """Collapse rows for the same result into one, in first-seen order.
+
+    Rows match on canonical URL, or on near-identical title+snippet when the
+    SimHash fingerprints are within `max_distance` bits, whichever connector
+    found them; breach rows only match other breach rows. The first row of a
+    group is kept, takes the group's highest confidence, and lists every
+    contributing result under `provenance` in its metadata. Rows must have
+    been through `fingerprint_rows`.
+    """
+
+    by_url: Dict[Tuple[str, str], Dict[str, Any]] = {}
+    near: Dict[str, SimHashIndex] = {}
+    groups: Dict[int, List[Dict[str, Any]]] = {}
+    kept: List[Dict[str, Any]] = []
+
+    for row in rows:
+        pool, url, fp = _match_pool(row["category"]), row["canonical_url"], row["simhash"]
+        primary = by_url.get((pool, url)) if url else None
+        if primary is None and fp is not None and pool in near:
+            primary = near[pool].find(fp)
+
+        if primary is None:
+            kept.append(row)
+            groups[id(row)] = [row]
+            primary = row
+        else:
+            groups[id(primary)].append(row)
+            primary["confidence"] = max(primary["confidence"], row["confidence"])
+
+        # Index the duplicate's keys too, so a third variant can match either.
+        if url:
+            by_url.setdefault((pool, url), primary)
+        if fp is not None:
+            near.setdefault(pool, SimHashIndex(max_distance)).add(fp, primary)
+
+    for row in kept:
+        group = groups[id(row)]
+        if len(group) > 1:
+            meta = _metadata(row)
+            meta["provenance"] = [_provenance(member) for member in group]
+            row["metadata_json"] = json.dumps(meta)
+    return kept
+
+
+async def annotate_seen(session: AsyncSession, scan: Scan, rows: List[Dict[str, Any]]) -> None:
+    """Record in each row's metadata which of the user's earlier scans already found it.
+
+    Matches items (pooled as in `merge_duplicates`) on canonical URL against
+    all of the user's items, and on near-identical text against the most recent
+    `DEDUP_HISTORY_LIMIT`.
+    Earlier scans are separate reports, so their rows are left alone.
+    """
+
+    if scan.user_id is None or not rows:
+        return
+
+    previous = (
+        select(Item.id, Item.scan_id, Item.category, Item.canonical_url, Item.simhash)
+        .join(Scan, Scan.id == Item.scan_id)  # type: ignore[arg-type]
+        .where(Scan.user_id == scan.user_id, Item.scan_id != scan.id)
+    )
+
+    matches: Dict[int, set] = {}
+    urls = {row["canonical_url"] for row in rows if row["canonical_url"]}
+    if urls:
+        by_url: Dict[Tuple[str, str], set] = {}
+        for item_id, scan_id, category, url, _ in await session.exec(previous.where(Item.canonical_url.in_(urls))):  # type: ignore[union-attr]
+            by_url.setdefault((_match_pool(category), url), set()).add((scan_id, item_id))
+        for row in rows:
+            key = (_match_pool(row["category"]), row["canonical_url"])
+            if key in by_url:
+                matches.setdefault(id(row), set()).update(by_url[key])
+
+    if DEDUP_HISTORY_LIMIT and any(row["simhash"] is not None for row in rows):
+        near: Dict[str, SimHashIndex] = {}
+        recent = previous.where(Item.simhash.is_not(None)).order_by(Item.id.desc()).limit(DEDUP_HISTORY_LIMIT)  # type: ignore[union-attr]
+        for item_id, scan_id, category, _, fp in await session.exec(recent):
+            near.setdefault(_match_pool(category), SimHashIndex(DEDUP_SIMHASH_MAX_DISTANCE)).add(fp, (scan_id, item_id))
+        for row in rows:
+            pool = _match_pool(row["category"])
+            if row["simhash"] is not None and pool in near:
+                hit = near[pool].find(row["simhash"])
+                if hit is not None:
+                    matches.setdefault(id(row), set()).add(hit)
+
+    for row in rows:
+        seen = matches.get(id(row))
+        if seen:
+            meta = _metadata(row)
+            meta["seen_in"] = [
+                {"scan_id": scan_id, "item_id": item_id} for scan_id, item_id in sorted(seen, reverse=True)[:_MAX_SEEN_IN]
+            ]
+            row["metadata_json"] = json.dumps(meta)
+
+
+async def dedupe_scan_rows(session: AsyncSession, scan: Scan, rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """The scan pipeline's dedup stage: fingerprint, merge within the scan, flag repeats."""
+
+    fingerprint_rows(rows)
+    if not DEDUP_ENABLED:
+        return rows
+    rows = merge_duplicates(rows)
+    await annotate_seen(session, scan, rows)
+    return rows
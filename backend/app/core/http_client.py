@@ -0,0 +1,76 @@
+import logging
+import os
+import ssl
+from typing import Dict, Union
+from urllib.parse import urlsplit
+
+import httpx
+
+
+logger = logging.getLogger(__name__)
+
+HTTP_TIMEOUT_SECONDS = float(os.getenv("HTTP_TIMEOUT_SECONDS", "10"))
+HTTP_CONNECT_TIMEOUT_SECONDS = float(os.getenv("HTTP_CONNECT_TIMEOUT_SECONDS", "5"))
+HTTP_MAX_CONNECTIONS_PER_HOST = int(os.getenv("HTTP_MAX_CONNECTIONS_PER_HOST", "20"))
+HTTP_MAX_KEEPALIVE_PER_HOST = int(os.getenv("HTTP_MAX_KEEPALIVE_PER_HOST", "10"))
+HTTP_KEEPALIVE_EXPIRY_SECONDS = float(os.getenv("HTTP_KEEPALIVE_EXPIRY_SECONDS", "60"))
+HTTP2_ENABLED = os.getenv("HTTP2_ENABLED", "false").lower() == "true"
+
+
+def _http2_available() -> bool:
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+class HttpClientPool:
+    """App-scoped keep-alive connection pools, one `httpx.AsyncClient` per host.
+
+    A client per origin gives every provider its own connection limit, so a
+    burst of Serper calls can't starve HIBP of connections. Connections stay
+    open between calls, so repeat requests skip the TCP + TLS handshake.
+    Clients are created lazily and all closed by `aclose()` on shutdown.
+    """
+
+    def __init__(self, verify: Union[bool, str, ssl.SSLContext] = True) -> None:
+        self._clients: Dict[str, httpx.AsyncClient] = {}
+        self.verify = verify
+        self.http2 = HTTP2_ENABLED and _http2_available()
+        if HTTP2_ENABLED and not self.http2:
+            logger.warning("HTTP2_ENABLED is set but the 'h2' package is not installed; using HTTP/1.1")
+
+    def client(self, base_url: str) -> httpx.AsyncClient:
+        parts = urlsplit(base_url)
+        origin = f"{parts.scheme}://{parts.netloc}"
+        client = self._clients.get(origin)
+        if client is None or client.is_closed:
+            client = httpx.AsyncClient(
+                base_url=origin,
+                http2=self.http2,
+                verify=self.verify,
+                timeout=httpx.Timeout(HTTP_TIMEOUT_SECONDS, connect=HTTP_CONNECT_TIMEOUT_SECONDS),
+                limits=httpx.Limits(
+                    max_connections=HTTP_MAX_CONNECTIONS_PER_HOST,
+                    max_keepalive_connections=HTTP_MAX_KEEPALIVE_PER_HOST,
+                    keepalive_expiry=HTTP_KEEPALIVE_EXPIRY_SECONDS,
+                ),
+            )
+            self._clients[origin] = client
+        return client
+
+    async def aclose(self) -> None:
+        clients = list(self._clients.values())
+        self._clients.clear()
+        for client in clients:
+            await client.aclose()
+
+
+pool = HttpClientPool()
+
+
+def get_http_client(base_url: str) -> httpx.AsyncClient:
+    """Shared pooled client for `base_url`'s origin; use relative paths with it."""
+
+    return pool.client(base_url)
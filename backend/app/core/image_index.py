@@ -0,0 +1,321 @@
+"""Local index of 64-bit perceptual image hashes (used by reverseImageSearch).
+
+    python -m app.core.image_index import corpus.jsonl   # {"hash": "<16 hex>", "url": ..., "context": ...}
+    python -m app.core.image_index query 8f3c0a1b2c3d4e5f --max-distance 8
+    python -m app.core.image_index rebuild
+
+Set IMAGE_INDEX_PATH to the index directory. One process writes at a time;
+readers pick up new entries and rebuilds on their next query.
+"""
+
+import argparse
+import json
+import os
+import sys
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+
+IMAGE_INDEX_PATH = os.getenv("IMAGE_INDEX_PATH", "")
+IMAGE_INDEX_MAX_DISTANCE = int(os.getenv("IMAGE_INDEX_MAX_DISTANCE", "8"))
+IMAGE_INDEX_MAX_RESULTS = int(os.getenv("IMAGE_INDEX_MAX_RESULTS", "20"))
+# Entries added since the last rebuild are scanned linearly; past this many,
+# `add` rebuilds the bucket tables.
+IMAGE_INDEX_DELTA_MAX = int(os.getenv("IMAGE_INDEX_DELTA_MAX", "200000"))
+
+HASH_BITS = 64
+# Accepted `image_hash` values: a perceptual hash as `parse_hash` reads it,
+# or a SHA-256 of the image file (64 hex digits, what the dashboard sends),
+# which has no perceptual neighbours and matches nothing in the index.
+IMAGE_HASH_PATTERN = r"^\s*((0[xX])?[0-9a-fA-F]{16}|[0-9a-fA-F]{64})\s*$"
+# Multi-index hashing: the hash is split into 4 16-bit substrings, each with
+# its own bucket table. Two hashes within distance k agree within k // 4 on
+# at least one substring, so probing the buckets within that radius of each
+# of the query's substrings finds every match.
+_TABLES = 4
+_SUB_BITS = HASH_BITS // _TABLES
+_SUB_MASK = (1 << _SUB_BITS) - 1
+_BUCKETS = 1 << _SUB_BITS
+
+_RECORD_CHUNK = 100_000
+
+if hasattr(np, "bitwise_count"):
+    _popcount = np.bitwise_count
+else:  # numpy < 2.0
+    _BYTE_BITS = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+    def _popcount(values: np.ndarray) -> np.ndarray:  # type: ignore[misc]
+        return _BYTE_BITS[values.view(np.uint8).reshape(-1, 8)].sum(axis=1, dtype=np.uint8)
+
+
+def parse_hash(value: str) -> int:
+    """A perceptual hash given as 16 hex digits (optionally 0x-prefixed)."""
+
+    text = value.strip().lower()
+    if text.startswith("0x"):
+        text = text[2:]
+    if len(text) != HASH_BITS // 4:
+        raise ValueError(f"image_hash must be a {HASH_BITS}-bit hash as {HASH_BITS // 4} hex digits")
+    try:
+        return int(text, 16)
+    except ValueError:
+        raise ValueError(f"image_hash must be a {HASH_BITS}-bit hash as {HASH_BITS // 4} hex digits") from None
+
+
+@lru_cache(maxsize=None)
+def _ball(radius: int) -> np.ndarray:
+    """Every substring mask with at most `radius` bits set."""
+
+    masks = np.arange(_BUCKETS, dtype=np.uint32)
+    return masks[_popcount(masks) <= radius]
+
+
+def _map(path: Path, dtype: str, count: Optional[int] = None) -> np.ndarray:
+    itemsize = np.dtype(dtype).itemsize
+    available = path.stat().st_size // itemsize if path.exists() else 0
+    count = available if count is None else min(count, available)
+    if count == 0:
+        return np.empty(0, dtype=dtype)
+    return np.memmap(path, dtype=dtype, mode="r", shape=(count,))
+
+
+class ImageHashIndex:
+    """Hamming-radius search over 64-bit hashes, persisted as memory-mapped files.
+
+    Files in the index directory:
+
+    - `hashes.u64`, `offsets.u64`, `records.jsonl`: append-only entries
+      (hash, byte offset of its JSON record, the record).
+    - `table<t>.order.u32`, `table<t>.starts.u32`: per substring, entry ids
+      sorted by substring value and where each value's bucket starts.
+    - `meta.json`: how many entries the tables cover.
+
+    Only the pages a query touches are read, so opening a large index is
+    instant and processes share it through the page cache.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = Path(path)
+        self.path.mkdir(parents=True, exist_ok=True)
+        self._hashes_path = self.path / "hashes.u64"
+        self._offsets_path = self.path / "offsets.u64"
+        self._records_path = self.path / "records.jsonl"
+        self._meta_path = self.path / "meta.json"
+        self._version: Tuple[int, int] = (-1, -1)
+        self._reload()
+
+    def __len__(self) -> int:
+        return self.count
+
+    def _files_version(self) -> Tuple[int, int]:
+        hashes = self._hashes_path.stat().st_size if self._hashes_path.exists() else 0
+        meta = self._meta_path.stat().st_mtime_ns if self._meta_path.exists() else 0
+        return hashes, meta
+
+    def _reload(self) -> None:
+        self._version = self._files_version()
+        # Records and offsets are written before hashes, so every hash has both.
+        self._hashes = _map(self._hashes_path, "<u8")
+        self.count = len(self._hashes)
+        self._offsets = _map(self._offsets_path, "<u8", self.count)
+
+        self.indexed = 0
+        self._tables: List[Tuple[np.ndarray, np.ndarray]] = []
+        if self._meta_path.exists():
+            meta = json.loads(self._meta_path.read_text(encoding="utf-8"))
+            self.indexed = min(int(meta.get("indexed", 0)), self.count)
+        if self.indexed:
+            for t in range(_TABLES):
+                order = _map(self.path / f"table{t}.order.u32", "<u4")
+                starts = _map(self.path / f"table{t}.starts.u32", "<u4")
+                self._tables.append((order, starts))
+
+    def refresh(self) -> None:
+        """Pick up entries added (or tables rebuilt) by another process."""
+
+        if self._files_version() != self._version:
+            self._reload()
+
+    def add(self, hashes: Sequence[int], records: Iterable[Dict[str, Any]]) -> None:
+        """Append entries; each record is returned with matches (e.g. url, context)."""
+
+        values = np.asarray(hashes, dtype=np.uint64)
+        offsets = np.empty(len(values), dtype="<u8")
+        written = 0
+        with self._records_path.open("ab") as f:
+            position = f.tell()
+            chunk: List[bytes] = []
+            for record in records:
+                if written == len(values):
+                    raise ValueError("More records than hashes")
+                line = json.dumps(record, separators=(",", ":"), ensure_ascii=False).encode("utf-8") + b"\n"
+                offsets[written] = position
+                position += len(line)
+                written += 1
+                chunk.append(line)
+                if len(chunk) >= _RECORD_CHUNK:
+                    f.write(b"".join(chunk))
+                    chunk.clear()
+            f.write(b"".join(chunk))
+        if written != len(values):
+            raise ValueError("Every hash needs a record")
+        with self._offsets_path.open("ab") as f:
+            offsets.tofile(f)
+        with self._hashes_path.open("ab") as f:
+            values.astype("<u8").tofile(f)
+
+        self._reload()
+        if self.count - self.indexed > IMAGE_INDEX_DELTA_MAX:
+            self.rebuild()
+
+    def rebuild(self) -> None:
+        """Re-sort the bucket tables over every entry (seconds for 10M entries)."""
+
+        self.refresh()
+        hashes = np.asarray(self._hashes)
+        for t in range(_TABLES):
+            substrings = ((hashes >> np.uint64(t * _SUB_BITS)) & np.uint64(_SUB_MASK)).astype(np.uint16)
+            order = np.argsort(substrings, kind="stable").astype("<u4")
+            starts = np.zeros(_BUCKETS + 1, dtype="<u4")
+            np.cumsum(np.bincount(substrings, minlength=_BUCKETS), out=starts[1:])
+            for name, array in (("order", order), ("starts", starts)):
+                target = self.path / f"table{t}.{name}.u32"
+                tmp = target.with_suffix(".tmp")
+                array.tofile(tmp)
+                os.replace(tmp, target)
+        # Written last: until then readers keep using the old coverage (the
+        # new tables only add entries, which dedup in `search` absorbs).
+        tmp = self._meta_path.with_suffix(".tmp")
+        tmp.write_text(json.dumps({"indexed": len(hashes)}), encoding="utf-8")
+        os.replace(tmp, self._meta_path)
+        self._reload()
+
+    def _candidates(self, query: int, radius: int) -> np.ndarray:
+        masks = _ball(radius)
+        found = []
+        for t, (order, starts) in enumerate(self._tables):
+            buckets = ((query >> (t * _SUB_BITS)) & _SUB_MASK) ^ masks
+            begins = starts[buckets].astype(np.int64)
+            lengths = starts[buckets + 1].astype(np.int64) - begins
+            lengths_total = int(lengths.sum())
+            if not lengths_total:
+                continue
+            # Concatenated bucket ranges, without a Python loop per bucket.
+            ends = np.cumsum(lengths)
+            positions = np.arange(lengths_total) + np.repeat(begins - (ends - lengths), lengths)
+            found.append(order[positions])
+        if not found:
+            return np.empty(0, dtype=np.int64)
+        return np.concatenate(found).astype(np.int64)
+
+    def search(self, query: int, max_distance: int, limit: Optional[int] = None) -> List[Tuple[int, int]]:
+        """`(entry id, distance)` for entries within `max_distance`, nearest first."""
+
+        self.refresh()
+        q = np.uint64(query)
+        ids = np.empty(0, dtype=np.int64)
+        distances = np.empty(0, dtype=np.uint8)
+
+        if self.indexed:
+            candidates = self._candidates(query, max_distance // _TABLES)
+            d = _popcount(self._hashes[candidates] ^ q)
+            keep = d <= max_distance
+            ids, distances = candidates[keep], d[keep]
+
+        if self.count > self.indexed:
+            d = _popcount(self._hashes[self.indexed : self.count] ^ q)
+            keep = np.flatnonzero(d <= max_distance)
+            ids = np.concatenate([ids, keep + self.indexed])
+            distances = np.concatenate([distances, d[keep]])
+
+        # An entry is found once per substring it shares with the query.
+        ids, first = np.unique(ids, return_index=True)
+        distances = distances[first]
+        order = np.lexsort((ids, distances))
+        if limit is not None:
+            order = order[:limit]
+        return [(int(ids[i]), int(distances[i])) for i in order]
+
+    def record(self, entry_id: int) -> Dict[str, Any]:
+        start = int(self._offsets[entry_id])
+        if entry_id + 1 < len(self._offsets):
+            end = int(self._offsets[entry_id + 1])
+        else:
+            end = self._records_path.stat().st_size
+        with self._records_path.open("rb") as f:
+            f.seek(start)
+            return json.loads(f.read(end - start))
+
+    def stats(self) -> Dict[str, int]:
+        return {"entries": self.count, "indexed": self.indexed, "pending": self.count - self.indexed}
+
+
+def similarity(distance: int) -> float:
+    return round(1.0 - distance / HASH_BITS, 4)
+
+
+_index: Optional[ImageHashIndex] = None
+
+
+def get_index() -> Optional[ImageHashIndex]:
+    """The index at IMAGE_INDEX_PATH, or None when no local index is configured."""
+
+    global _index
+    if _index is None and IMAGE_INDEX_PATH:
+        _index = ImageHashIndex(IMAGE_INDEX_PATH)
+    return _index
+
+
+def _import(index: ImageHashIndex, lines: Iterable[str]) -> int:
+    hashes: List[int] = []
+    records: List[Dict[str, Any]] = []
+    for line in lines:
+        if not line.strip():
+            continue
+        entry = json.loads(line)
+        hashes.append(parse_hash(entry.pop("hash")))
+        records.append(entry)
+    index.add(hashes, records)
+    return len(hashes)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Manage the local perceptual-hash image index.")
+    parser.add_argument("--path", default=IMAGE_INDEX_PATH, help="index directory (IMAGE_INDEX_PATH)")
+    commands = parser.add_subparsers(dest="command", required=True)
+    imports = commands.add_parser("import", help="add JSON lines {hash, url, context, ...}; - for stdin")
+    imports.add_argument("file")
+    query = commands.add_parser("query")
+    query.add_argument("hash")
+    query.add_argument("--max-distance", type=int, default=IMAGE_INDEX_MAX_DISTANCE)
+    query.add_argument("--limit", type=int, default=IMAGE_INDEX_MAX_RESULTS)
+    commands.add_parser("rebuild")
+    commands.add_parser("stats")
+    opts = parser.parse_args()
+
+    if not opts.path:
+        parser.error("--path or IMAGE_INDEX_PATH is required")
+    index = ImageHashIndex(opts.path)
+    if opts.command == "import":
+        if opts.file == "-":
+            added = _import(index, sys.stdin)
+        else:
+            with open(opts.file, "r", encoding="utf-8") as f:
+                added = _import(index, f)
+        print(json.dumps({"added": added, **index.stats()}))
+    elif opts.command == "query":
+        matches = index.search(parse_hash(opts.hash), opts.max_distance, opts.limit)
+        for entry_id, distance in matches:
+            print(json.dumps({"distance": distance, "similarity": similarity(distance), **index.record(entry_id)}))
+    elif opts.command == "rebuild":
+        index.rebuild()
+        print(json.dumps(index.stats()))
+    else:
+        print(json.dumps(index.stats()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+import os
+from datetime import datetime, timedelta
+from typing import Optional
+
+from sqlalchemy import update
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from ..db.models import Scan
+
+
+# Scan lifecycle. `created` scans are never picked up by workers; `POST
+# /scans/{scan_id}/run` moves them to `pending`, which is the queue.
+STATUS_CREATED = "created"
+STATUS_PENDING = "pending"
+STATUS_RUNNING = "running"
+STATUS_COMPLETED = "completed"
+STATUS_FAILED = "failed"
+
+# A `running` scan whose worker has not touched it for this long is assumed
+# to belong to a dead worker and is put back on the queue.
+SCAN_LEASE_SECONDS = int(os.getenv("SCAN_LEASE_SECONDS", "900"))
+# Workers renew the lease of each scan they run this often.
+SCAN_HEARTBEAT_SECONDS = float(os.getenv("SCAN_HEARTBEAT_SECONDS", str(SCAN_LEASE_SECONDS / 3)))
+
+
+async def enqueue_scan(session: AsyncSession, scan: Scan) -> bool:
+    """Put a scan on the queue. Returns False if it is already queued or running."""
+
+    if scan.status in (STATUS_PENDING, STATUS_RUNNING):
+        return False
+    scan.status = STATUS_PENDING
+    scan.updated_at = datetime.utcnow()
+    session.add(scan)
+    await session.commit()
+    return True
+
+
+async def claim_next_scan(session: AsyncSession) -> Optional[int]:
+    """Atomically move the oldest pending scan to `running` and return its id.
+
+    On Postgres the candidate row is locked with `FOR UPDATE SKIP LOCKED` so
+    concurrent workers skip each other's rows instead of blocking. The
+    conditional UPDATE makes the claim safe on backends without row locks
+    (SQLite): only one worker can flip a given row from pending to running.
+    """
+
+    statement = (
+        select(Scan.id)
+        .where(Scan.status == STATUS_PENDING)
+        .order_by(Scan.id)
+        .limit(1)
+        .with_for_update(skip_locked=True)
+    )
+    scan_id = (await session.exec(statement)).first()
+    if scan_id is None:
+        await session.rollback()
+        return None
+
+    result = await session.execute(
+        update(Scan)
+        .where(Scan.id == scan_id, Scan.status == STATUS_PENDING)
+        .values(status=STATUS_RUNNING, updated_at=datetime.utcnow())
+    )
+    await session.commit()
+    if result.rowcount != 1:
+        return None
+    return scan_id
+
+
+async def renew_lease(session: AsyncSession, scan_id: int) -> bool:
+    """Mark a running scan as still alive. Returns False if it is no longer running."""
+
+    result = await session.execute(
+        update(Scan)
+        .where(Scan.id == scan_id, Scan.status == STATUS_RUNNING)
+        .values(updated_at=datetime.utcnow())
+    )
+    await session.commit()
+    return result.rowcount == 1
+
+
+async def mark_scan_failed(session: AsyncSession, scan_id: int) -> None:
+    await session.execute(
+        update(Scan)
+        .where(Scan.id == scan_id)
+        .values(status=STATUS_FAILED, updated_at=datetime.utcnow())
+    )
+    await session.commit()
+
+
+async def requeue_stale_scans(session: AsyncSession, lease_seconds: int = SCAN_LEASE_SECONDS) -> int:
+    """Return scans stuck in `running` past their lease to the queue."""
+
+    cutoff = datetime.utcnow() - timedelta(seconds=lease_seconds)
+    result = await session.execute(
+        update(Scan)
+        .where(Scan.status == STATUS_RUNNING, Scan.updated_at < cutoff)
+        .values(status=STATUS_PENDING, updated_at=datetime.utcnow())
+    )
+    await session.commit()
+    return result.rowcount or 0
@@ -0,0 +1,35 @@
+import os
+from typing import Optional
+
+import httpx
+from openai import AsyncOpenAI
+
+from .http_client import get_http_client
+
+
+OPENAI_BASE_URL = "https://api.openai.com"
+
+_client: Optional[AsyncOpenAI] = None
+_client_api_key: Optional[str] = None
+_client_http: Optional[httpx.AsyncClient] = None
+
+
+def get_openai_client() -> Optional[AsyncOpenAI]:
+    """Long-lived OpenAI client shared by the planner and remediation tools.
+
+    Rides on the app's pooled HTTP client for api.openai.com, so LLM calls
+    reuse warm connections. Returns None when OPENAI_API_KEY is not set.
+    Rebuilt only if the key changes or the pool was closed (app restart).
+    """
+
+    global _client, _client_api_key, _client_http
+
+    api_key = os.getenv("OPENAI_API_KEY")
+    if not api_key:
+        return None
+
+    if _client is None or api_key != _client_api_key or _client_http is None or _client_http.is_closed:
+        _client_http = get_http_client(OPENAI_BASE_URL)
+        _client = AsyncOpenAI(api_key=api_key, http_client=_client_http)
+        _client_api_key = api_key
+    return _client
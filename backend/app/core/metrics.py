@@ -0,0 +1,222 @@
+import asyncio
+import time
+from bisect import bisect_left
+from typing import Callable, Dict, Iterator, List, Sequence, Tuple
+
+
+# Latency buckets (seconds) shared by every histogram: 5 ms .. 60 s.
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+DEFAULT_BUCKETS: Tuple[float, ...] = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+_INF = 'le="+Inf"'
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value: float) -> str:
+    return str(int(value)) if value == int(value) else repr(value)
+
+
+class _Metric:
+    type = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+
+    def samples(self) -> Iterator[str]:
+        raise NotImplementedError
+
+    def render(self) -> Iterator[str]:
+        yield f"# HELP {self.name} {self.documentation}"
+        yield f"# TYPE {self.name} {self.type}"
+        yield from self.samples()
+
+
+class Counter(_Metric):
+    type = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> None:
+        super().__init__(name, documentation, labelnames)
+        self.values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, *labels: str, amount: float = 1.0) -> None:
+        self.values[labels] = self.values.get(labels, 0.0) + amount
+
+    def set(self, *labels: str, value: float) -> None:
+        """Copy in a value tracked elsewhere (used by scrape-time collectors)."""
+
+        self.values[labels] = value
+
+    def samples(self) -> Iterator[str]:
+        for labels, value in sorted(self.values.items()):
+            yield f"{self.name}{_labels(self.labelnames, labels)} {_number(value)}"
+
+
+class Gauge(Counter):
+    """Point-in-time values, usually filled in by a collector at scrape time."""
+
+    type = "gauge"
+
+
+class Histogram(_Metric):
+    """Per-label-set bucket counts, sum and count.
+
+    `observe` is a bisect and two additions; buckets are stored
+    non-cumulatively and only summed up when rendered.
+    """
+
+    type = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ) -> None:
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(buckets)
+        # labels -> [count per bucket..., count above the last bucket], sum
+        self.series: Dict[Tuple[str, ...], Tuple[List[int], List[float]]] = {}
+
+    def observe(self, value: float, *labels: str) -> None:
+        series = self.series.get(labels)
+        if series is None:
+            series = self.series[labels] = ([0] * (len(self.buckets) + 1), [0.0])
+        series[0][bisect_left(self.buckets, value)] += 1
+        series[1][0] += value
+
+    def samples(self) -> Iterator[str]:
+        for labels, (counts, total) in sorted(self.series.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets, counts):
+                cumulative += count
+                le = 'le="%s"' % _number(bound)
+                yield f"{self.name}_bucket{_labels(self.labelnames, labels, le)} {cumulative}"
+            cumulative += counts[-1]
+            yield f"{self.name}_bucket{_labels(self.labelnames, labels, _INF)} {cumulative}"
+            yield f"{self.name}_sum{_labels(self.labelnames, labels)} {repr(total[0])}"
+            yield f"{self.name}_count{_labels(self.labelnames, labels)} {cumulative}"
+
+
+class MetricsRegistry:
+    """Process-wide metrics, rendered in the Prometheus text format.
+
+    Hot paths only touch counters/histograms; values that already live
+    elsewhere (cache sizes, circuit states, ...) are copied into gauges by
+    collectors when `/metrics` is scraped.
+    """
+
+    def __init__(self) -> None:
+        self._metrics: Dict[str, _Metric] = {}
+        self._collectors: List[Callable[[], None]] = []
+
+    def _register(self, metric: _Metric) -> _Metric:
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric already registered: {metric.name}")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, documentation, labelnames))  # type: ignore[return-value]
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self._register(Gauge(name, documentation, labelnames))  # type: ignore[return-value]
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Histogram:
+        return self._register(Histogram(name, documentation, labelnames))  # type: ignore[return-value]
+
+    def add_collector(self, collect: Callable[[], None]) -> None:
+        self._collectors.append(collect)
+
+    def render(self) -> str:
+        for collect in self._collectors:
+            collect()
+        lines: List[str] = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+HTTP_REQUEST_SECONDS = registry.histogram(
+    "http_request_duration_seconds",
+    "Time to response start per route template.",
+    ("method", "route", "status"),
+)
+TOOL_CALL_SECONDS = registry.histogram(
+    "tool_call_duration_seconds",
+    "Connector tool calls, including cache hits; result is cache_hit, shared, provider or error.",
+    ("tool", "result"),
+)
+TOOL_CALL_ERRORS = registry.counter(
+    "tool_call_errors_total",
+    "Failed connector tool calls by exception type.",
+    ("tool", "error"),
+)
+PROVIDER_REQUEST_SECONDS = registry.histogram(
+    "provider_request_duration_seconds",
+    "Calls that reached an external provider (including rate-limit queueing and hedges).",
+    ("provider", "status"),
+)
+PROVIDER_ERRORS = registry.counter(
+    "provider_errors_total",
+    "Failed provider calls by exception type.",
+    ("provider", "error"),
+)
+PLANNER_SECONDS = registry.histogram(
+    "planner_duration_seconds",
+    "Planner calls; source is llm, cache, mock or fallback.",
+    ("source",),
+)
+SCAN_SECONDS = registry.histogram(
+    "scan_duration_seconds",
+    "Whole scan runs; status is completed, partial or failed.",
+    ("status",),
+)
+SCAN_PERSIST_SECONDS = registry.histogram(
+    "scan_persist_duration_seconds",
+    "Dedup, scoring, bulk insert and commit of a scan's results.",
+)
+
+
+async def serve(host: str, port: int) -> asyncio.AbstractServer:
+    """Minimal HTTP server answering every request with `registry.render()`.
+
+    For processes without the API (standalone scan workers).
+    """
+
+    async def _handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            await reader.readuntil(b"\r\n\r\n")
+            body = registry.render().encode("utf-8")
+            writer.write(
+                b"HTTP/1.1 200 OK\r\nContent-Type: %s\r\nContent-Length: %d\r\nConnection: close\r\n\r\n"
+                % (CONTENT_TYPE.encode("ascii"), len(body))
+                + body
+            )
+            await writer.drain()
+        except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    return await asyncio.start_server(_handle, host, port)
+
+
+def since(started: float) -> float:
+    """Seconds elapsed since a `time.perf_counter()` reading."""
+
+    return time.perf_counter() - started
@@ -0,0 +1,168 @@
+import copy
+import hashlib
+import json
+import os
+import re
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+
+PLAN_CACHE_MAX_ENTRIES = int(os.getenv("PLAN_CACHE_MAX_ENTRIES", "1024"))
+PLAN_CACHE_TTL_SECONDS = int(os.getenv("PLAN_CACHE_TTL_SECONDS", "3600"))
+# "exact": the raw state is fingerprinted, so only scans with the same seeds
+# share a plan.
+# "slots": seed values are replaced by placeholders before fingerprinting, so
+# states that differ only in *which* email/name was given share a plan. Plans
+# are then only cached when they can't carry one user's data into another
+# user's scan (see `_shareable`).
+PLAN_CACHE_NORMALIZATION = os.getenv("PLAN_CACHE_NORMALIZATION", "exact").lower()
+
+# Seed values shorter than this are only replaced when a string equals them
+# exactly; substring replacement of very short values would mangle plans.
+_MIN_SUBSTRING_LEN = 3
+
+_PLACEHOLDER = re.compile(r"<<seeds\.[\w.]+>>")
+# Plan strings that are the same for every user, by key (besides tool names).
+_PLAN_VOCABULARY = {"service": frozenset({"github", "reddit"})}
+
+
+def _seed_slots(state: Dict[str, Any]) -> List[Tuple[str, str]]:
+    """`(value, placeholder)` pairs for every seed value, longest value first."""
+
+    seeds = state.get("seeds") if isinstance(state, dict) else None
+    if not isinstance(seeds, dict):
+        return []
+
+    slots: Dict[str, str] = {}
+    for field in sorted(seeds):
+        value = seeds[field]
+        values = value if isinstance(value, list) else [value]
+        for i, v in enumerate(values):
+            if isinstance(v, str) and v and v not in slots:
+                suffix = f".{i}" if isinstance(value, list) else ""
+                slots[v] = f"<<seeds.{field}{suffix}>>"
+    return sorted(slots.items(), key=lambda pair: len(pair[0]), reverse=True)
+
+
+def _substitute(obj: Any, pairs: List[Tuple[str, str]]) -> Any:
+    if isinstance(obj, str):
+        for old, new in pairs:
+            if obj == old:
+                return new
+        for old, new in pairs:
+            if len(old) >= _MIN_SUBSTRING_LEN and old in obj:
+                obj = obj.replace(old, new)
+        return obj
+    if isinstance(obj, dict):
+        return {k: _substitute(v, pairs) for k, v in obj.items()}
+    if isinstance(obj, list):
+        return [_substitute(v, pairs) for v in obj]
+    return obj
+
+
+def _shareable(obj: Any, key: Optional[str] = None) -> bool:
+    """Whether a templated plan holds no user data.
+
+    Every string must be a whole placeholder, a tool name or from
+    `_PLAN_VOCABULARY`. Anything else (a seed the LLM re-cased, derived a
+    query or username from, or wrote into free text) would be served
+    verbatim to other users' scans.
+    """
+
+    if isinstance(obj, str):
+        if _PLACEHOLDER.fullmatch(obj):
+            return True
+        if key == "tool":
+            from ..mcp_tools.registry import registry
+
+            return obj in registry
+        return obj in _PLAN_VOCABULARY.get(key or "", ())
+    if isinstance(obj, dict):
+        return all(_shareable(v, k) for k, v in obj.items())
+    if isinstance(obj, list):
+        return all(_shareable(v, key) for v in obj)
+    return True
+
+
+class PlanCache:
+    """Bounded LRU + TTL cache of planner output keyed by a state fingerprint.
+
+    In "slots" mode the state is templated (seed values -> `<<seeds.x>>`)
+    before hashing, the plan is stored in the same templated form, and the
+    current scan's values are filled back in on a hit. Plans whose templated
+    form still holds user data are not cached.
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: int, normalization: str) -> None:
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.normalization = normalization
+        self._entries: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.unshareable = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0 and self.ttl_seconds > 0
+
+    def fingerprint(self, goal: str, state: Dict[str, Any]) -> Tuple[str, List[Tuple[str, str]]]:
+        slots = _seed_slots(state) if self.normalization == "slots" else []
+        canonical = json.dumps(
+            {"goal": goal, "state": _substitute(state, slots)},
+            sort_keys=True,
+            separators=(",", ":"),
+            ensure_ascii=False,
+            default=str,
+        )
+        return hashlib.sha256(canonical.encode("utf-8")).hexdigest(), slots
+
+    def get(self, goal: str, state: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        if not self.enabled:
+            return None
+        key, slots = self.fingerprint(goal, state)
+        entry = self._entries.get(key)
+        if entry is None or entry[0] <= time.time():
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        template = entry[1]
+        if not slots:
+            return copy.deepcopy(template)
+        return _substitute(template, [(placeholder, value) for value, placeholder in slots])
+
+    def put(self, goal: str, state: Dict[str, Any], plan: Dict[str, Any]) -> None:
+        if not self.enabled:
+            return
+        key, slots = self.fingerprint(goal, state)
+        template = _substitute(plan, slots)
+        if self.normalization == "slots" and not _shareable(template):
+            self.unshareable += 1
+            return
+        self._entries[key] = (time.time() + self.ttl_seconds, template)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "unshareable": self.unshareable,
+            "entries": len(self._entries),
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+
+plan_cache = PlanCache(PLAN_CACHE_MAX_ENTRIES, PLAN_CACHE_TTL_SECONDS, PLAN_CACHE_NORMALIZATION)
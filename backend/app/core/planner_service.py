@@ -1,67 +1,42 @@
+import copy
 import json
 import os
+import time
 from pathlib import Path
-from typing import Any, Dict
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
 
-from openai import AsyncOpenAI
+from .llm_client import get_openai_client
+from .metrics import PLANNER_SECONDS, since
+from .plan_cache import plan_cache
+from .tracing import span
 
 
 _PLANNER_FEWSHOTS_PATH = Path(__file__).parent / "planner_fewshots.json"
 
 
-async def _load_fewshots() -> Dict[str, Any]:
-    with _PLANNER_FEWSHOTS_PATH.open("r", encoding="utf-8") as f:
-        return json.load(f)
-
-
-async def get_plan(state: Dict[str, Any], goal: str = "produce_risk_report") -> Dict[str, Any]:
-    """Return a planner JSON plan.
-
-    If OPENAI_API_KEY is set and MOCK_CONNECTORS is not true, call OpenAI.
-    Otherwise, return the first example output from planner_fewshots.json.
-    """
-
-    data = await _load_fewshots()
-    system_prompt: str = data.get("system_prompt", "")
-    examples = data.get("examples", [])
+class _PlannerPrompt(NamedTuple):
+    mtime_ns: int
+    examples: List[Dict[str, Any]]
+    # System prompt + few-shot turns, ready to prepend to the current state.
+    messages: List[Dict[str, str]]
 
-    # Fallback: deterministic mock plan that still respects the incoming state.
-    def _mock_plan(current_state: Dict[str, Any]) -> Dict[str, Any]:
-        seeds = current_state.get("seeds", {}) if isinstance(current_state, dict) else {}
 
-        actions = []
+_prompt: Optional[_PlannerPrompt] = None
 
-        # If the user provided a free-text query, always search the web with it.
-        query = seeds.get("query") or seeds.get("name")
-        if query:
-            actions.append({"tool": "searchWeb", "args": {"query": query, "limit": 10}})
 
-        # If an email is present, check breach databases.
-        email = seeds.get("email")
-        if email:
-            actions.append({"tool": "checkBreach", "args": {"email": email}})
+def _load_prompt() -> _PlannerPrompt:
+    """Return the compiled planner prompt, rebuilding it only when the few-shot file changes."""
 
-        # If an image hash is present, run reverse image search.
-        image_hash = seeds.get("image_hash")
-        if image_hash:
-            actions.append({"tool": "reverseImageSearch", "args": {"image_hash": image_hash}})
+    global _prompt
 
-        if actions:
-            return {"actions": actions, "stop": True}
+    mtime_ns = _PLANNER_FEWSHOTS_PATH.stat().st_mtime_ns
+    if _prompt is not None and _prompt.mtime_ns == mtime_ns:
+        return _prompt
 
-        # If we have no useful seeds, fall back to the first few-shot example's output.
-        if examples:
-            example = examples[0]
-            return example.get("output", {"actions": [], "stop": True})
-        return {"actions": [], "stop": True}
-
-    api_key = os.getenv("OPENAI_API_KEY")
-    mock_mode = os.getenv("MOCK_CONNECTORS", "false").lower() == "true"
-
-    if not api_key or mock_mode:
-        return _mock_plan(state)
-
-    client = AsyncOpenAI(api_key=api_key)
+    with _PLANNER_FEWSHOTS_PATH.open("r", encoding="utf-8") as f:
+        data = json.load(f)
+    system_prompt: str = data.get("system_prompt", "")
+    examples = data.get("examples", [])
 
     # Build few-shot messages
     messages = []
@@ -84,11 +59,81 @@ async def get_plan(state: Dict[str, Any], goal: str = "produce_risk_report") ->
             }
         )
 
+    _prompt = _PlannerPrompt(mtime_ns=mtime_ns, examples=examples, messages=messages)
+    return _prompt
+
+
+def _mock_plan(current_state: Dict[str, Any], examples: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Deterministic mock plan that still respects the incoming state."""
+
+    seeds = current_state.get("seeds", {}) if isinstance(current_state, dict) else {}
+
+    actions = []
+
+    # If the user provided a free-text query, always search the web with it.
+    query = seeds.get("query") or seeds.get("name")
+    if query:
+        actions.append({"tool": "searchWeb", "args": {"query": query, "limit": 10}})
+
+    # If an email is present, check breach databases.
+    email = seeds.get("email")
+    if email:
+        actions.append({"tool": "checkBreach", "args": {"email": email}})
+
+    # If an image hash is present, run reverse image search.
+    image_hash = seeds.get("image_hash")
+    if image_hash:
+        actions.append({"tool": "reverseImageSearch", "args": {"image_hash": image_hash}})
+
+    if actions:
+        return {"actions": actions, "stop": True}
+
+    # If we have no useful seeds, fall back to the first few-shot example's output.
+    # (Copied, since the examples are cached across calls.)
+    if examples:
+        example = examples[0]
+        return copy.deepcopy(example.get("output", {"actions": [], "stop": True}))
+    return {"actions": [], "stop": True}
+
+
+async def get_plan(state: Dict[str, Any], goal: str = "produce_risk_report") -> Dict[str, Any]:
+    """Return a planner JSON plan.
+
+    If OPENAI_API_KEY is set and MOCK_CONNECTORS is not true, call OpenAI.
+    Otherwise, return the first example output from planner_fewshots.json.
+    Valid LLM plans are memoized by state fingerprint (see `plan_cache`).
+    """
+
+    started = time.perf_counter()
+    with span("planner", goal=goal) as planner_span:
+        plan, source = await _plan(state, goal)
+        planner_span.set("source", source)
+        planner_span.set("actions", len(plan.get("actions", [])))
+    PLANNER_SECONDS.observe(since(started), source)
+    return plan
+
+
+async def _plan(state: Dict[str, Any], goal: str) -> Tuple[Dict[str, Any], str]:
+    """`(plan, source)`; source is mock, cache, llm or fallback."""
+
+    prompt = _load_prompt()
+
+    mock_mode = os.getenv("MOCK_CONNECTORS", "false").lower() == "true"
+    client = None if mock_mode else get_openai_client()
+
+    if client is None:
+        return _mock_plan(state, prompt.examples), "mock"
+
+    cached = plan_cache.get(goal, state)
+    if cached is not None:
+        return cached, "cache"
+
     # Current state as final user message
     current_input = {"state": state, "goal": goal}
-    messages.append(
-        {"role": "user", "content": json.dumps(current_input, ensure_ascii=False)}
-    )
+    messages = [
+        *prompt.messages,
+        {"role": "user", "content": json.dumps(current_input, ensure_ascii=False)},
+    ]
 
     try:
         resp = await client.chat.completions.create(
@@ -100,8 +145,9 @@ async def get_plan(state: Dict[str, Any], goal: str = "produce_risk_report") ->
         plan = json.loads(content)
         # Basic shape fallback
         if "actions" not in plan or "stop" not in plan:
-            return _mock_plan(state)
-        return plan
+            return _mock_plan(state, prompt.examples), "fallback"
+        plan_cache.put(goal, state, plan)
+        return plan, "llm"
     except Exception:
         # In case of any error, fall back to mock plan based on current state
-        return _mock_plan(state)
+        return _mock_plan(state, prompt.examples), "fallback"
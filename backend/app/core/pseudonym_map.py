@@ -0,0 +1,149 @@
+import os
+import re
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from sqlmodel import col, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from ..db.bulk import bulk_insert_ignoring_conflicts
+from ..db.models import PseudonymMap, Scan
+from .pseudonymize import FoundValues, pseudonym_for, redactor_for
+
+
+# (scope, token) -> value pairs kept in memory.
+PSEUDONYM_MAP_CACHE_SIZE = int(os.getenv("PSEUDONYM_MAP_CACHE_SIZE", "50000"))
+
+# Tokens as written by the redactor; LLMs sometimes drop the brackets.
+_TOKEN = re.compile(r"\[?\b((?:USER|EMAIL|PHONE)_[0-9a-f]{10})\b\]?")
+
+# Tokens per `IN (...)` lookup, well under SQLite's bound parameter limit.
+_LOOKUP_BATCH = 500
+
+
+def scope_for(scan: Scan) -> str:
+    """Pseudonyms are shared across a user's scans; anonymous scans get their own."""
+
+    if scan.user_id is not None:
+        return f"user:{scan.user_id}"
+    return f"scan:{scan.id}"
+
+
+class PseudonymMapStore:
+    """Reversible pseudonyms: `PseudonymMap` rows behind an in-process LRU.
+
+    The pseudonymize -> LLM -> re-identify loop costs at most one statement
+    per step, however many identifiers are involved: new tokens are written
+    with one executemany `INSERT ... ON CONFLICT DO NOTHING`, and
+    re-identification looks up all tokens of a text at once (none when they
+    are cached, i.e. have been read back before).
+    """
+
+    def __init__(self, max_entries: int) -> None:
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Tuple[str, str], str]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def _get(self, scope: str, token: str) -> Optional[str]:
+        value = self._entries.get((scope, token))
+        if value is not None:
+            self._entries.move_to_end((scope, token))
+        return value
+
+    def _put(self, scope: str, token: str, value: str) -> None:
+        self._entries[(scope, token)] = value
+        self._entries.move_to_end((scope, token))
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    async def _store(self, session: AsyncSession, scope: str, found: FoundValues) -> None:
+        # Always insert, and leave the LRU to `lookup`: the caller may still
+        # roll back, and if another process stored the token first, its
+        # spelling of the value (e.g. different case) is the one in the DB.
+        # The LRU only ever holds values read back from the DB.
+        now = datetime.utcnow()
+        rows = [
+            dict(scope=scope, token=token, kind=kind, value=value, created_at=now)
+            for token, (kind, value) in found.items()
+        ]
+        await bulk_insert_ignoring_conflicts(session, PseudonymMap, rows, ("scope", "token"))
+
+    async def get_or_create(
+        self, session: AsyncSession, scope: str, identifiers: Iterable[Tuple[str, str]]
+    ) -> Dict[str, str]:
+        """Tokens for `(kind, value)` identifiers, as `{value: token}`.
+
+        New mappings are added to the session in one statement; the caller
+        commits.
+        """
+
+        tokens: Dict[str, str] = {}
+        found: FoundValues = {}
+        for kind, value in identifiers:
+            token = pseudonym_for(kind, value)
+            tokens[value] = token
+            found.setdefault(token, (kind, value))
+        await self._store(session, scope, found)
+        return tokens
+
+    async def pseudonymize(
+        self, session: AsyncSession, scope: str, text: str, seeds: Optional[Dict[str, Any]] = None
+    ) -> str:
+        """`pseudonymize_text`, remembering every replaced value for `reidentify`.
+
+        The caller commits (before the text leaves the process).
+        """
+
+        found: FoundValues = {}
+        redacted = redactor_for(seeds).redact(text, found)
+        await self._store(session, scope, found)
+        return redacted
+
+    async def lookup(self, session: AsyncSession, scope: str, tokens: Iterable[str]) -> Dict[str, str]:
+        """`{token: value}` for the known tokens among `tokens`."""
+
+        values: Dict[str, str] = {}
+        missing: List[str] = []
+        for token in set(tokens):
+            value = self._get(scope, token)
+            if value is None:
+                missing.append(token)
+            else:
+                values[token] = value
+        self.hits += len(values)
+        self.misses += len(missing)
+
+        for start in range(0, len(missing), _LOOKUP_BATCH):
+            rows = await session.exec(
+                select(PseudonymMap.token, PseudonymMap.value).where(
+                    PseudonymMap.scope == scope,
+                    col(PseudonymMap.token).in_(missing[start : start + _LOOKUP_BATCH]),
+                )
+            )
+            for token, value in rows:
+                values[token] = value
+                self._put(scope, token, value)
+        return values
+
+    async def reidentify(self, session: AsyncSession, scope: str, text: str) -> str:
+        """Put the original values back in place of the tokens in `text`.
+
+        Unknown tokens (e.g. made up by the LLM) are left as they are.
+        """
+
+        tokens = _TOKEN.findall(text)
+        if not tokens:
+            return text
+        values = await self.lookup(session, scope, tokens)
+        return _TOKEN.sub(lambda match: values.get(match.group(1), match.group(0)), text)
+
+    def stats(self) -> Dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses, "entries": len(self._entries)}
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+
+pseudonym_map = PseudonymMapStore(PSEUDONYM_MAP_CACHE_SIZE)
@@ -1,12 +1,55 @@
 import hashlib
 import hmac
 import os
-from typing import Any
+import re
+from functools import lru_cache
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
 
 
-def _get_salt() -> bytes:
-    salt = os.getenv("PSEUDONYM_SALT", "local_dev_salt_any_string")
-    return salt.encode("utf-8")
+# token (without brackets) -> (kind, value as first seen in the text)
+FoundValues = Dict[str, Tuple[str, str]]
+
+
+PSEUDONYM_SALT = os.getenv("PSEUDONYM_SALT", "local_dev_salt_any_string")
+
+# Distinct (kind, value) pseudonyms kept in memory; per-seed-set compiled
+# redactors kept in memory.
+PSEUDONYM_CACHE_SIZE = int(os.getenv("PSEUDONYM_CACHE_SIZE", "100000"))
+REDACTOR_CACHE_SIZE = int(os.getenv("REDACTOR_CACHE_SIZE", "256"))
+
+# `Redactor.stream` buffers at least this many characters per pass.
+REDACT_STREAM_WINDOW = 64 * 1024
+
+# Keyed once; every pseudonym starts from a copy of this state.
+_HMAC = hmac.new(PSEUDONYM_SALT.encode("utf-8"), digestmod=hashlib.sha256)
+
+# Matches only start after a character that can't be part of one. Checking
+# that once, and gating each alternative on its possible first characters,
+# is what keeps the combined pattern fast: most positions fail right there.
+_START = r"(?<![\w.%+-])"
+# Possessive local part: a word without an "@" fails without backtracking.
+_EMAIL = r"[\w.%+-]{1,64}+@(?:[A-Za-z0-9-]{1,63}\.){1,8}[A-Za-z]{2,24}(?![\w-])"
+# At least 9 digits with separators or a leading +; bare digit runs and
+# dates are too often ids or timestamps (checked in `Redactor._token`).
+_PHONE = r"(?=[+(\d])(?:\+\d{1,3}[ -]?)?(?:\(\d{1,4}\)[ -]?)?\d{1,5}(?:[ -]\d{1,5}){0,5}(?![\w:])"
+_PHONE_MIN_DIGITS = 9
+_PHONE_MAX_DIGITS = 15
+_PHONE_MAX_LENGTH = 40
+_EMAIL_MAX_LENGTH = 64 + 1 + 8 * 64 + 24
+# Whitespace inside a seed matches up to this many whitespace characters.
+_SEED_MAX_GAP = 4
+
+_DATE = re.compile(r"\d{4}-\d{2}-\d{2}")
+_WHITESPACE = re.compile(r"\s+")
+_NON_DIGITS = re.compile(r"\D")
+
+
+@lru_cache(maxsize=PSEUDONYM_CACHE_SIZE)
+def _pseudonym(kind: str, value: str) -> str:
+    digest = _HMAC.copy()
+    digest.update(value.encode("utf-8"))
+    # Shorten for readability
+    return f"{kind}_{digest.hexdigest()[:10]}"
 
 
 def pseudonymize_identifier(value: str) -> str:
@@ -18,15 +61,185 @@ def pseudonymize_identifier(value: str) -> str:
 
     if not value:
         return ""
-    digest = hmac.new(_get_salt(), value.encode("utf-8"), hashlib.sha256).hexdigest()
-    # Shorten for readability
-    return f"USER_{digest[:10]}"
+    return _pseudonym("USER", value)
+
+
+def _normalize(kind: str, value: str) -> str:
+    """Canonical form a pseudonym is derived from, so spellings of one value agree."""
+
+    if kind == "PHONE":
+        return _NON_DIGITS.sub("", value)
+    return _WHITESPACE.sub(" ", value.strip()).lower()
+
+
+def pseudonym_for(kind: str, value: str) -> str:
+    """The token (e.g. `EMAIL_1a2b3c4d5e`) the redactor uses for `value`."""
+
+    return _pseudonym(kind, _normalize(kind, value))
+
+
+def _trie_pattern(node: Dict[str, Any]) -> str:
+    """Regex for the words in a character trie, sharing common prefixes.
+
+    `re` tries the branches of a node in order and an optional tail greedily,
+    so at any position the longest seed wins.
+    """
+
+    branches = []
+    for char in sorted(node):
+        if char == "":
+            continue
+        if char == " ":
+            step = r"\s{1,%d}" % _SEED_MAX_GAP
+        else:
+            step = re.escape(char)
+        branches.append(step + _trie_pattern(node[char]))
+    if not branches:
+        return ""
+    body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+    if "" in node:
+        body = "(?:" + body + ")?"
+    return body
+
+
+class Redactor:
+    """Replaces a scan's seeds plus any email address or phone number in text.
+
+    The seeds are compiled into a single trie-shaped automaton and combined
+    with the generic email/phone patterns into one case-insensitive regex,
+    so text is redacted in one left-to-right pass (the scan loop runs in
+    C, not per character in Python). Matches become `[KIND_<hmac>]` tokens
+    (USER for names and usernames, EMAIL, PHONE) derived from the
+    normalized value, so the same value gets the same token in every scan
+    and a seed email and the same address found by the generic pattern
+    agree.
+    """
+
+    def __init__(self, seeds: Iterable[Tuple[str, str]]) -> None:
+        trie: Dict[str, Any] = {}
+        self._seed_kinds: Dict[str, str] = {}
+        longest = 0
+        for kind, value in seeds:
+            key = _normalize("USER", value)
+            if not key:
+                continue
+            # Emails and phones keep their own kind (and normalization).
+            self._seed_kinds.setdefault(key, kind)
+            node = trie
+            for char in key:
+                node = node.setdefault(char, {})
+            node[""] = {}
+            longest = max(longest, len(key))
+
+        alternatives = [f"(?P<email>{_EMAIL})"]
+        if trie:
+            first = "".join(re.escape(char) for char in sorted(trie))
+            alternatives.append(rf"(?=[{first}])(?P<seed>{_trie_pattern(trie)}(?!\w))")
+        alternatives.append(f"(?P<phone>{_PHONE})")
+        self._pattern = re.compile(_START + "(?:" + "|".join(alternatives) + ")", re.IGNORECASE)
+        # No match is longer than this, so `stream` can cut the text there.
+        self._max_match = max(_EMAIL_MAX_LENGTH, _PHONE_MAX_LENGTH, longest * _SEED_MAX_GAP)
+
+    def _token(self, match: "re.Match[str]", found: Optional[FoundValues]) -> str:
+        text = match.group()
+        group = match.lastgroup
+        if group == "email":
+            kind, token = "EMAIL", _pseudonym("EMAIL", _normalize("EMAIL", text))
+        elif group == "seed":
+            key = _normalize("USER", text)
+            kind = self._seed_kinds.get(key, "USER")
+            token = _pseudonym(kind, _normalize(kind, key))
+        else:
+            digits = _NON_DIGITS.sub("", text)
+            if not _PHONE_MIN_DIGITS <= len(digits) <= _PHONE_MAX_DIGITS or text.isdigit() or _DATE.match(text):
+                return text
+            kind, token = "PHONE", _pseudonym("PHONE", digits)
+        if found is not None and token not in found:
+            found[token] = (kind, text)
+        return f"[{token}]"
+
+    def _redact(
+        self, text: str, pos: int, cut: Optional[int], found: Optional[FoundValues] = None
+    ) -> Tuple[str, int]:
+        """Redact `text[pos:]`, or only matches starting before `cut`.
+
+        Returns the redacted text and where it ends in `text`.
+        """
+
+        parts: List[str] = []
+        last = pos
+        for match in self._pattern.finditer(text, pos):
+            start = match.start()
+            if cut is not None and start >= cut:
+                break
+            parts.append(text[last:start])
+            parts.append(self._token(match, found))
+            last = match.end()
+        end = len(text) if cut is None else max(last, cut)
+        parts.append(text[last:end])
+        return "".join(parts), end
+
+    def redact(self, text: str, found: Optional[FoundValues] = None) -> str:
+        """Redacted `text`; with `found`, also collects what each token replaced."""
+
+        if not text:
+            return text
+        return self._redact(text, 0, None, found)[0]
+
+    def stream(self, chunks: Iterable[str], found: Optional[FoundValues] = None) -> Iterator[str]:
+        """Redact text arriving in chunks, yielding redacted pieces.
+
+        Holds back the last few hundred characters of each pass so matches
+        spanning chunk boundaries are still found; memory use is bounded by
+        REDACT_STREAM_WINDOW plus one chunk.
+        """
+
+        buffer, pos = "", 0
+        pending: List[str] = []
+        pending_size = 0
+        for chunk in chunks:
+            pending.append(chunk)
+            pending_size += len(chunk)
+            if len(buffer) - pos + pending_size < REDACT_STREAM_WINDOW + self._max_match:
+                continue
+            buffer += "".join(pending)
+            pending.clear()
+            pending_size = 0
+            # The match lookahead needs one character after the longest match.
+            redacted, end = self._redact(buffer, pos, len(buffer) - self._max_match - 1, found)
+            yield redacted
+            # Keep one character before `end` for the lookbehinds.
+            buffer, pos = buffer[end - 1 :], 1
+        buffer += "".join(pending)
+        if len(buffer) > pos:
+            yield self._redact(buffer, pos, None, found)[0]
+
+
+def _seed_values(seeds: Dict[str, Any]) -> Tuple[Tuple[str, str], ...]:
+    values: List[Tuple[str, str]] = []
+    for field, kind in (("name", "USER"), ("email", "EMAIL"), ("usernames", "USER"), ("phones", "PHONE")):
+        raw = seeds.get(field)
+        for value in raw if isinstance(raw, list) else [raw]:
+            if isinstance(value, str) and value.strip():
+                values.append((kind, value))
+    return tuple(sorted(set(values)))
+
+
+@lru_cache(maxsize=REDACTOR_CACHE_SIZE)
+def _cached_redactor(seed_values: Tuple[Tuple[str, str], ...]) -> Redactor:
+    return Redactor(seed_values)
+
+
+def redactor_for(seeds: Optional[Dict[str, Any]] = None) -> Redactor:
+    """Compiled redactor for a scan's seeds (name, email, usernames, phones)."""
+
+    return _cached_redactor(_seed_values(seeds or {}))
 
 
-def pseudonymize_text(text: str) -> str:
-    """Placeholder: in future, replace raw identifiers inside text.
+def pseudonymize_text(text: str, seeds: Optional[Dict[str, Any]] = None) -> str:
+    """Replace the scan's seeds and any emails/phone numbers in `text` with tokens.
 
-    For now, this just returns the original text.
+    Use this on snippets and metadata before they are sent to the LLM.
     """
 
-    return text
+    return redactor_for(seeds).redact(text)
@@ -0,0 +1,237 @@
+import asyncio
+import hashlib
+import os
+import random
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+import httpx
+
+from .config import tool_float_map
+from .tracing import span
+
+
+# Sustained requests/second per provider and API key. HIBP's cheapest key
+# allows 10 requests/minute; GitHub search allows 30/minute with a token.
+PROVIDER_RATE_LIMITS: Dict[str, float] = tool_float_map(
+    "PROVIDER_RATE_LIMITS",
+    {
+        "serper": 5.0,
+        "hibp": 10 / 60,
+        "github": 0.5,
+        "reddit": 1.0,
+    },
+    minimum=0.001,
+)
+# Requests allowed back to back before the sustained rate applies.
+PROVIDER_BURSTS: Dict[str, float] = tool_float_map(
+    "PROVIDER_BURSTS",
+    {
+        "serper": 5.0,
+        "hibp": 1.0,
+        "github": 5.0,
+        "reddit": 2.0,
+    },
+    minimum=1.0,
+)
+_DEFAULT_RATE = 1.0
+_DEFAULT_BURST = 1.0
+
+# Retries of a throttled (429/503) request, with jittered exponential backoff
+# unless the provider says how long to wait (Retry-After).
+PROVIDER_MAX_RETRIES = max(0, int(os.getenv("PROVIDER_MAX_RETRIES", "3")))
+PROVIDER_BACKOFF_BASE_SECONDS = float(os.getenv("PROVIDER_BACKOFF_BASE_SECONDS", "0.5"))
+PROVIDER_BACKOFF_MAX_SECONDS = float(os.getenv("PROVIDER_BACKOFF_MAX_SECONDS", "30"))
+# Give up instead of queueing longer than this for a single request.
+PROVIDER_MAX_WAIT_SECONDS = float(os.getenv("PROVIDER_MAX_WAIT_SECONDS", "60"))
+
+# After a 429 the rate is cut by this factor, then recovers additively
+# (per successful request) back to the configured rate.
+_DECREASE_FACTOR = 0.5
+_RECOVERY_STEPS = 20
+_THROTTLE_STATUSES = (429, 503)
+
+
+class RateLimitExceeded(Exception):
+    """The provider kept throttling, or the queue wait would be too long."""
+
+    def __init__(self, provider: str, retry_after: Optional[float] = None) -> None:
+        message = f"{provider} rate limit exceeded"
+        if retry_after is not None:
+            message += f" (retry after {retry_after:.1f}s)"
+        super().__init__(message)
+        self.provider = provider
+        self.retry_after = retry_after
+
+
+class TokenBucket:
+    """Async token bucket with AIMD rate adaptation.
+
+    `acquire()` reserves a token immediately (the balance may go negative)
+    and sleeps until it would have been available, so waiters are served in
+    arrival order without a lock. `throttled()` pauses the bucket for the
+    provider's Retry-After and halves the rate; `succeeded()` creeps it back.
+    """
+
+    def __init__(self, name: str, rate: float, burst: float) -> None:
+        self.name = name
+        self.max_rate = rate
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+        self.requests = 0
+        self.throttled_count = 0
+        self.retries = 0
+        self.queued = 0
+        self.queue_seconds = 0.0
+        self.max_queue_seconds = 0.0
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def reserve(self, now: Optional[float] = None) -> float:
+        """Take a token; returns the seconds to wait before using it."""
+
+        now = time.monotonic() if now is None else now
+        self._refill(now)
+        self.tokens -= 1
+        wait = -self.tokens / self.rate if self.tokens < 0 else 0.0
+        return max(wait, self.blocked_until - now)
+
+    def cancel(self) -> None:
+        """Return a token reserved by a caller that won't use it."""
+
+        self.tokens = min(self.burst, self.tokens + 1)
+
+    async def acquire(self, max_wait: float = PROVIDER_MAX_WAIT_SECONDS) -> float:
+        wait = self.reserve()
+        if wait > max_wait:
+            self.cancel()
+            raise RateLimitExceeded(self.name, wait)
+        self.requests += 1
+        if wait > 0:
+            self.queued += 1
+            self.queue_seconds += wait
+            self.max_queue_seconds = max(self.max_queue_seconds, wait)
+            try:
+                await asyncio.sleep(wait)
+            except asyncio.CancelledError:
+                self.cancel()
+                raise
+        return wait
+
+    def throttled(self, delay: float) -> None:
+        now = time.monotonic()
+        self.throttled_count += 1
+        self.blocked_until = max(self.blocked_until, now + delay)
+        self.rate = max(self.max_rate / 100, self.rate * _DECREASE_FACTOR)
+        self._refill(now)
+        self.tokens = min(self.tokens, 0.0)
+
+    def succeeded(self) -> None:
+        if self.rate < self.max_rate:
+            self.rate = min(self.max_rate, self.rate + self.max_rate / _RECOVERY_STEPS)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "rate": round(self.rate, 4),
+            "max_rate": round(self.max_rate, 4),
+            "requests": self.requests,
+            "throttled": self.throttled_count,
+            "retries": self.retries,
+            "queued": self.queued,
+            "queue_seconds_total": round(self.queue_seconds, 3),
+            "queue_seconds_max": round(self.max_queue_seconds, 3),
+        }
+
+
+def retry_after_seconds(value: Optional[str]) -> Optional[float]:
+    """Parse a Retry-After header (delta seconds or an HTTP date)."""
+
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    return max(0.0, (when - datetime.now(timezone.utc)).total_seconds())
+
+
+def backoff_seconds(attempt: int) -> float:
+    """Full-jitter exponential backoff for the `attempt`-th retry (0-based)."""
+
+    ceiling = min(PROVIDER_BACKOFF_MAX_SECONDS, PROVIDER_BACKOFF_BASE_SECONDS * (2**attempt))
+    return random.uniform(0, ceiling)
+
+
+class RateLimiter:
+    """One token bucket per (provider, API key), shared by every connector call
+    in this process. Keys are hashed so they never appear in stats or logs.
+    """
+
+    def __init__(self) -> None:
+        self._buckets: Dict[Tuple[str, str], TokenBucket] = {}
+
+    def bucket(self, provider: str, api_key: Optional[str] = None) -> TokenBucket:
+        key_id = hashlib.sha256(api_key.encode("utf-8")).hexdigest()[:8] if api_key else "-"
+        bucket = self._buckets.get((provider, key_id))
+        if bucket is None:
+            bucket = TokenBucket(
+                provider,
+                PROVIDER_RATE_LIMITS.get(provider, _DEFAULT_RATE),
+                PROVIDER_BURSTS.get(provider, _DEFAULT_BURST),
+            )
+            self._buckets[(provider, key_id)] = bucket
+        return bucket
+
+    async def request(
+        self,
+        provider: str,
+        send: Callable[[], Awaitable[httpx.Response]],
+        api_key: Optional[str] = None,
+    ) -> httpx.Response:
+        """Call `send()` once a token is available, retrying throttled responses.
+
+        Raises RateLimitExceeded when the provider still throttles after
+        PROVIDER_MAX_RETRIES retries, or when waiting would exceed
+        PROVIDER_MAX_WAIT_SECONDS. Other responses are returned as-is.
+        """
+
+        bucket = self.bucket(provider, api_key)
+        attempt = 0
+        while True:
+            with span("http", provider=provider, attempt=attempt) as http_span:
+                queued = await bucket.acquire()
+                http_span.set("queue_ms", round(queued * 1000, 3))
+                resp = await send()
+                http_span.set("status_code", resp.status_code)
+            if resp.status_code not in _THROTTLE_STATUSES:
+                bucket.succeeded()
+                return resp
+            retry_after = retry_after_seconds(resp.headers.get("Retry-After"))
+            if resp.status_code == 503 and retry_after is None:
+                # Plain 503s are outages, not throttling.
+                return resp
+            delay = retry_after if retry_after is not None else backoff_seconds(attempt)
+            bucket.throttled(delay)
+            if attempt == PROVIDER_MAX_RETRIES or delay > PROVIDER_MAX_WAIT_SECONDS:
+                raise RateLimitExceeded(provider, delay)
+            bucket.retries += 1
+            attempt += 1
+
+    def stats(self) -> Dict[str, Any]:
+        return {f"{provider}:{key_id}": bucket.stats() for (provider, key_id), bucket in self._buckets.items()}
+
+
+limiter = RateLimiter()
@@ -0,0 +1,108 @@
+import logging
+import time
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+from sqlalchemy import case, or_, update
+from sqlalchemy.engine import Engine
+from sqlmodel import Session, select
+
+from ..db.models import Item, JobCheckpoint
+from .risk_engine import RiskScoringEngine
+
+
+logger = logging.getLogger(__name__)
+
+RESCORE_JOB_NAME = "rescore_items"
+
+
+def _stale(version: str) -> Any:
+    return or_(Item.scoring_version.is_(None), Item.scoring_version != version)  # type: ignore[union-attr]
+
+
+def _score_expression(scoring: RiskScoringEngine) -> Any:
+    """`weight[category] * confidence` as SQL, mirroring the engine's weights table."""
+
+    weight = case(scoring.weights, value=Item.category, else_=scoring.default_weight)
+    return weight * Item.confidence
+
+
+def _load_checkpoint(session: Session, version: str, restart: bool = False) -> JobCheckpoint:
+    checkpoint = session.get(JobCheckpoint, RESCORE_JOB_NAME)
+    if checkpoint is None:
+        checkpoint = JobCheckpoint(name=RESCORE_JOB_NAME, cursor=0, version=version)
+        session.add(checkpoint)
+    elif checkpoint.version != version or restart:
+        # Weights changed since the last run: every item is potentially stale again.
+        checkpoint.cursor = 0
+        checkpoint.version = version
+    return checkpoint
+
+
+def rescore_stale_items(
+    engine: Engine,
+    scoring: RiskScoringEngine,
+    chunk_size: int = 5000,
+    pause_ratio: float = 1.0,
+    min_pause_seconds: float = 0.0,
+    max_chunks: Optional[int] = None,
+    restart: bool = False,
+) -> Dict[str, Any]:
+    """Bring `Item.risk_score` up to date with `scoring`'s weights.
+
+    Walks stale items (wrong or missing `scoring_version`) in primary-key
+    order, `chunk_size` at a time. Each chunk is a single set-based UPDATE
+    whose id range comes from a keyset query, so no row is loaded into
+    Python. The chunk and the job checkpoint commit together, so an
+    interrupted run resumes after the last finished chunk. After each chunk
+    the job sleeps `pause_ratio` times as long as the chunk took (at least
+    `min_pause_seconds`), which keeps the load on the DB bounded for live
+    traffic. `restart` ignores the checkpoint and sweeps from the start
+    (e.g. after workers running older weights have been drained).
+    """
+
+    version = scoring.version
+    score = _score_expression(scoring)
+    chunks = 0
+    rows = 0
+    started = time.perf_counter()
+
+    while max_chunks is None or chunks < max_chunks:
+        chunk_started = time.perf_counter()
+        with Session(engine) as session:
+            checkpoint = _load_checkpoint(session, version, restart=restart and chunks == 0)
+            cursor = checkpoint.cursor
+
+            stale_after_cursor = select(Item.id).where(Item.id > cursor, _stale(version)).order_by(Item.id)  # type: ignore[arg-type]
+            upper = session.exec(stale_after_cursor.offset(chunk_size - 1).limit(1)).first()
+            if upper is None:
+                # Fewer than a full chunk left: finish with whatever remains.
+                upper = session.exec(
+                    select(Item.id).where(Item.id > cursor, _stale(version)).order_by(Item.id.desc()).limit(1)  # type: ignore[arg-type, union-attr]
+                ).first()
+                if upper is None:
+                    session.commit()
+                    break
+
+            result = session.execute(
+                update(Item)
+                .where(Item.id > cursor, Item.id <= upper, _stale(version))  # type: ignore[arg-type, operator]
+                .values(risk_score=score, scoring_version=version)
+            )
+            checkpoint.cursor = upper
+            checkpoint.updated_at = datetime.utcnow()
+            session.add(checkpoint)
+            session.commit()
+
+        chunks += 1
+        rows += result.rowcount or 0
+        elapsed = time.perf_counter() - chunk_started
+        logger.info("Rescored chunk %d up to id %s (%d rows, %.3fs)", chunks, upper, result.rowcount, elapsed)
+        time.sleep(max(min_pause_seconds, elapsed * pause_ratio))
+
+    return {
+        "version": version,
+        "chunks": chunks,
+        "rows_updated": rows,
+        "seconds": round(time.perf_counter() - started, 3),
+    }
@@ -0,0 +1,349 @@
+import asyncio
+import os
+import time
+from collections import deque
+from contextlib import nullcontext
+from typing import Any, AsyncContextManager, Awaitable, Callable, Deque, Dict, Optional, Tuple, TypeVar
+
+import httpx
+
+from .config import tool_float_map
+from .metrics import PROVIDER_ERRORS, PROVIDER_REQUEST_SECONDS, since
+from .rate_limit import RateLimitExceeded
+from .tracing import current_span, span
+
+
+T = TypeVar("T")
+
+# Hedging: if a provider call is still running after the provider's observed
+# latency quantile, send one duplicate request and take whichever answers
+# first. Hedges are capped at a fraction of calls so a slow provider doesn't
+# get double the load.
+HEDGE_ENABLED = os.getenv("HEDGE_ENABLED", "true").lower() == "true"
+HEDGE_QUANTILE = float(os.getenv("HEDGE_QUANTILE", "0.95"))
+HEDGE_MIN_SAMPLES = int(os.getenv("HEDGE_MIN_SAMPLES", "20"))
+HEDGE_MIN_DELAY_MS = float(os.getenv("HEDGE_MIN_DELAY_MS", "50"))
+HEDGE_MAX_RATIO = float(os.getenv("HEDGE_MAX_RATIO", "0.1"))
+# Providers never hedged. HIBP is paced to a few requests a minute by the
+# rate limiter, so a duplicate would only wait for the next token.
+HEDGE_DISABLED_PROVIDERS = {
+    name.strip() for name in os.getenv("HEDGE_DISABLED_PROVIDERS", "hibp").split(",") if name.strip()
+}
+_LATENCY_WINDOW = 200
+
+# Circuit breaking: open a provider's circuit when at least CIRCUIT_MIN_CALLS
+# calls in the last CIRCUIT_WINDOW_SECONDS failed at CIRCUIT_ERROR_RATE or
+# more. Calls then fail fast for CIRCUIT_OPEN_SECONDS, after which a single
+# probe call decides whether to close it again.
+CIRCUIT_ERROR_RATE = float(os.getenv("CIRCUIT_ERROR_RATE", "0.5"))
+CIRCUIT_MIN_CALLS = int(os.getenv("CIRCUIT_MIN_CALLS", "10"))
+CIRCUIT_WINDOW_SECONDS = float(os.getenv("CIRCUIT_WINDOW_SECONDS", "60"))
+CIRCUIT_OPEN_SECONDS = float(os.getenv("CIRCUIT_OPEN_SECONDS", "30"))
+
+# Whole-scan time budget (0 = unlimited); each action also gets at most its
+# tool's deadline, and never more than what is left of the budget.
+SCAN_TIME_BUDGET_SECONDS = float(os.getenv("SCAN_TIME_BUDGET_SECONDS", "60"))
+TOOL_DEADLINE_SECONDS: Dict[str, float] = tool_float_map(
+    "TOOL_DEADLINE_SECONDS",
+    {
+        "searchWeb": 15.0,
+        "searchSocial": 15.0,
+        # HIBP is paced to a few requests/minute, so queueing takes a while.
+        "checkBreach": 45.0,
+        "reverseImageSearch": 15.0,
+    },
+    minimum=0.1,
+)
+_DEFAULT_TOOL_DEADLINE = 15.0
+
+# Tools whose provider doesn't depend on the args.
+_TOOL_PROVIDERS = {
+    "searchWeb": "serper",
+    "checkBreach": "hibp",
+    "reverseImageSearch": "reverse_image",
+}
+
+
+class CircuitOpen(Exception):
+    def __init__(self, provider: str, retry_in: float) -> None:
+        super().__init__(f"{provider} circuit open (retry in {retry_in:.0f}s)")
+        self.provider = provider
+        self.retry_in = retry_in
+
+
+class DeadlineExceeded(Exception):
+    pass
+
+
+# Provider failures a scan tolerates by skipping the action and marking its
+# result partial, rather than failing the whole scan.
+PROVIDER_FAILURES: Tuple[type, ...] = (
+    CircuitOpen,
+    DeadlineExceeded,
+    RateLimitExceeded,
+    httpx.HTTPError,
+)
+
+
+def _is_provider_error(exc: BaseException) -> bool:
+    """Whether a failed call says something about the provider's health.
+
+    Transport errors, timeouts, undecodable and 5xx responses do; a 4xx or
+    an error raised by the connector itself over the caller's input (e.g. a
+    ValueError for a malformed argument) doesn't.
+    """
+
+    if isinstance(exc, httpx.HTTPStatusError):
+        return exc.response.status_code >= 500
+    return isinstance(exc, (httpx.HTTPError, TimeoutError))
+
+
+def provider_for(tool: str, args: Dict[str, Any]) -> str:
+    if tool == "searchSocial":
+        return str(args.get("service", "social")).lower()
+    return _TOOL_PROVIDERS.get(tool, tool)
+
+
+class LatencyTracker:
+    """Recent successful call latencies for one provider, and hedge counters."""
+
+    def __init__(self, provider: str) -> None:
+        self.provider = provider
+        self.samples: Deque[float] = deque(maxlen=_LATENCY_WINDOW)
+        self._quantile: Optional[float] = None
+        self.calls = 0
+        self.hedged = 0
+        self.hedge_wins = 0
+
+    def add(self, seconds: float) -> None:
+        self.samples.append(seconds)
+        self._quantile = None
+
+    def quantile(self) -> Optional[float]:
+        if len(self.samples) < HEDGE_MIN_SAMPLES:
+            return None
+        if self._quantile is None:
+            ordered = sorted(self.samples)
+            self._quantile = ordered[min(len(ordered) - 1, int(len(ordered) * HEDGE_QUANTILE))]
+        return self._quantile
+
+    def hedge_delay(self) -> Optional[float]:
+        """Seconds to wait before hedging, or None to not hedge this call."""
+
+        if not HEDGE_ENABLED or self.provider in HEDGE_DISABLED_PROVIDERS:
+            return None
+        if self.hedged >= HEDGE_MAX_RATIO * self.calls:
+            return None
+        quantile = self.quantile()
+        if quantile is None:
+            return None
+        return max(quantile, HEDGE_MIN_DELAY_MS / 1000)
+
+
+class CircuitBreaker:
+    """closed -> open (fail fast) -> half-open (one probe) -> closed | open."""
+
+    def __init__(self, provider: str) -> None:
+        self.provider = provider
+        self.state = "closed"
+        self.opened_at = 0.0
+        self.probing = False
+        self.outcomes: Deque[Tuple[float, bool]] = deque()
+        self.rejected = 0
+        self.trips = 0
+
+    def _prune(self, now: float) -> None:
+        while self.outcomes and self.outcomes[0][0] < now - CIRCUIT_WINDOW_SECONDS:
+            self.outcomes.popleft()
+
+    def error_rate(self) -> float:
+        self._prune(time.monotonic())
+        if not self.outcomes:
+            return 0.0
+        return sum(1 for _, ok in self.outcomes if not ok) / len(self.outcomes)
+
+    def before_call(self) -> None:
+        """Raise CircuitOpen unless this call may go to the provider."""
+
+        if self.state == "closed":
+            return
+        now = time.monotonic()
+        if self.state == "open" and now - self.opened_at >= CIRCUIT_OPEN_SECONDS:
+            self.state = "half_open"
+        if self.state == "half_open" and not self.probing:
+            self.probing = True
+            return
+        self.rejected += 1
+        raise CircuitOpen(self.provider, max(0.0, self.opened_at + CIRCUIT_OPEN_SECONDS - now))
+
+    def release(self) -> None:
+        """The admitted call ended without a verdict on provider health."""
+
+        self.probing = False
+
+    def record(self, ok: bool) -> None:
+        now = time.monotonic()
+        if self.state == "half_open":
+            self.probing = False
+            if ok:
+                self.state = "closed"
+                self.outcomes.clear()
+            else:
+                self._open(now)
+            return
+        self.outcomes.append((now, ok))
+        self._prune(now)
+        if ok or self.state != "closed" or len(self.outcomes) < CIRCUIT_MIN_CALLS:
+            return
+        if self.error_rate() >= CIRCUIT_ERROR_RATE:
+            self._open(now)
+
+    def _open(self, now: float) -> None:
+        self.state = "open"
+        self.opened_at = now
+        self.trips += 1
+
+
+class Resilience:
+    """Per-provider circuit breakers and hedging for connector calls (this process)."""
+
+    def __init__(self) -> None:
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self._latency: Dict[str, LatencyTracker] = {}
+
+    def breaker(self, provider: str) -> CircuitBreaker:
+        breaker = self._breakers.get(provider)
+        if breaker is None:
+            breaker = self._breakers[provider] = CircuitBreaker(provider)
+        return breaker
+
+    def latency(self, provider: str) -> LatencyTracker:
+        tracker = self._latency.get(provider)
+        if tracker is None:
+            tracker = self._latency[provider] = LatencyTracker(provider)
+        return tracker
+
+    async def call(
+        self,
+        provider: str,
+        fn: Callable[[], Awaitable[T]],
+        slot: Optional[AsyncContextManager[Any]] = None,
+    ) -> T:
+        """Run `fn()` behind `provider`'s circuit breaker, hedging slow calls.
+
+        The breaker is checked before waiting for `slot` (e.g. a concurrency
+        limit), so an open circuit fails fast. Only provider errors (see
+        `_is_provider_error`) count against the provider's health; rate
+        limiting, cancellation and errors over the caller's input don't.
+        """
+
+        breaker = self.breaker(provider)
+        breaker.before_call()
+        try:
+            with span("provider", provider=provider) as provider_span:
+                slot_started = time.perf_counter()
+                async with slot or nullcontext():
+                    started = time.perf_counter()
+                    provider_span.set("slot_wait_ms", round((started - slot_started) * 1000, 3))
+                    result = await self._hedged(self.latency(provider), fn)
+        except asyncio.CancelledError:
+            breaker.release()
+            raise
+        except RateLimitExceeded:
+            breaker.release()
+            PROVIDER_ERRORS.inc(provider, "RateLimitExceeded")
+            raise
+        except Exception as exc:
+            if not _is_provider_error(exc):
+                breaker.release()
+                raise
+            breaker.record(False)
+            PROVIDER_REQUEST_SECONDS.observe(since(started), provider, "error")
+            PROVIDER_ERRORS.inc(provider, type(exc).__name__)
+            raise
+        breaker.record(True)
+        PROVIDER_REQUEST_SECONDS.observe(since(started), provider, "ok")
+        return result
+
+    async def _hedged(self, tracker: LatencyTracker, fn: Callable[[], Awaitable[T]]) -> T:
+        async def _timed() -> T:
+            started = time.perf_counter()
+            result = await fn()
+            tracker.add(time.perf_counter() - started)
+            return result
+
+        delay = tracker.hedge_delay()
+        tracker.calls += 1
+        if delay is None:
+            return await _timed()
+
+        first = asyncio.ensure_future(_timed())
+        pending = {first}
+        try:
+            done, pending = await asyncio.wait(pending, timeout=delay)
+            if done:
+                return first.result()
+            tracker.hedged += 1
+            current_span().set("hedged", True)
+            pending.add(asyncio.ensure_future(_timed()))
+            error: Optional[BaseException] = None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is not first:
+                            tracker.hedge_wins += 1
+                        return task.result()
+                    error = task.exception()
+            assert error is not None
+            raise error
+        finally:
+            for task in pending:
+                task.cancel()
+
+    def stats(self) -> Dict[str, Any]:
+        stats: Dict[str, Any] = {}
+        for provider in sorted(set(self._breakers) | set(self._latency)):
+            breaker = self.breaker(provider)
+            tracker = self.latency(provider)
+            quantile = tracker.quantile()
+            stats[provider] = {
+                "circuit": breaker.state,
+                "error_rate": round(breaker.error_rate(), 3),
+                "trips": breaker.trips,
+                "rejected": breaker.rejected,
+                "calls": tracker.calls,
+                "hedged": tracker.hedged,
+                "hedge_wins": tracker.hedge_wins,
+                "hedge_after_ms": round(quantile * 1000, 1) if quantile is not None else None,
+            }
+        return stats
+
+
+resilience = Resilience()
+
+
+class ScanDeadline:
+    """Per-action timeouts carved out of one scan's time budget."""
+
+    def __init__(self, budget_seconds: float = SCAN_TIME_BUDGET_SECONDS) -> None:
+        self.expires_at = time.monotonic() + budget_seconds if budget_seconds > 0 else None
+
+    def timeout_for(self, tool: str) -> float:
+        timeout = TOOL_DEADLINE_SECONDS.get(tool, _DEFAULT_TOOL_DEADLINE)
+        if self.expires_at is not None:
+            timeout = min(timeout, self.expires_at - time.monotonic())
+        return timeout
+
+    async def run(self, tool: str, call: Awaitable[T]) -> T:
+        """Await `call`, raising DeadlineExceeded once `tool`'s timeout passes."""
+
+        timeout = self.timeout_for(tool)
+        if timeout <= 0:
+            if asyncio.iscoroutine(call):
+                call.close()
+            raise DeadlineExceeded(f"{tool}: scan time budget exhausted")
+        try:
+            return await asyncio.wait_for(call, timeout)
+        except asyncio.TimeoutError:
+            raise DeadlineExceeded(f"{tool} timed out after {timeout:.1f}s") from None
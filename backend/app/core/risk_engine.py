@@ -0,0 +1,86 @@
+import hashlib
+import json
+import os
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+
+DEFAULT_RISK_WEIGHTS: Dict[str, float] = {
+    "breach": 0.40,
+    "github_profile": 0.25,
+    "web_result": 0.20,
+    "image_match": 0.15,
+    "unknown": 0.10,
+}
+DEFAULT_WEIGHT = 0.10
+
+
+def _weights_from_env() -> Dict[str, float]:
+    """DEFAULT_RISK_WEIGHTS overridden by RISK_WEIGHTS (a JSON object), if set."""
+
+    weights = dict(DEFAULT_RISK_WEIGHTS)
+    raw = os.getenv("RISK_WEIGHTS")
+    if raw:
+        weights.update({str(k): float(v) for k, v in json.loads(raw).items()})
+    return weights
+
+
+class BatchScores:
+    """Scores for one batch. Explanations are only formatted when asked for."""
+
+    __slots__ = ("categories", "confidences", "scores")
+
+    def __init__(self, categories: Sequence[str], confidences: Sequence[Any], scores: np.ndarray) -> None:
+        self.categories = categories
+        # As given by the caller, so explanations echo the original values.
+        self.confidences = confidences
+        self.scores = scores
+
+    def __len__(self) -> int:
+        return len(self.scores)
+
+    def explanation(self, i: int) -> str:
+        return f"Category {self.categories[i]} with confidence {self.confidences[i]}"
+
+
+class RiskScoringEngine:
+    """Columnar risk scoring: `score = weight[category] * confidence`.
+
+    Categories are encoded to small integer codes once per batch; scoring a
+    batch is then a single NumPy gather + multiply, which is what rescoring
+    millions of stored items needs. Unknown categories get `default_weight`.
+    """
+
+    def __init__(self, weights: Optional[Dict[str, float]] = None, default_weight: float = DEFAULT_WEIGHT) -> None:
+        self.weights = dict(weights if weights is not None else DEFAULT_RISK_WEIGHTS)
+        self.default_weight = default_weight
+        self.categories: List[str] = list(self.weights)
+        self._codes: Dict[str, int] = {c: i for i, c in enumerate(self.categories)}
+        # Last slot holds the weight for categories not in the table.
+        self._weight_table = np.array([*self.weights.values(), default_weight], dtype=np.float64)
+        self.unknown_code = len(self.categories)
+        # Stable identifier of this weights table; stored on each scored item
+        # so a weights change can find and rescore stale rows.
+        canonical = json.dumps({"weights": self.weights, "default": default_weight}, sort_keys=True)
+        self.version = hashlib.sha256(canonical.encode("utf-8")).hexdigest()[:12]
+
+    def weight_for(self, category: str) -> float:
+        return self.weights.get(category, self.default_weight)
+
+    def encode(self, categories: Sequence[str]) -> np.ndarray:
+        codes = self._codes
+        unknown = self.unknown_code
+        return np.fromiter((codes.get(c, unknown) for c in categories), dtype=np.int32, count=len(categories))
+
+    def score_columns(self, codes: np.ndarray, confidences: np.ndarray) -> np.ndarray:
+        """Score pre-encoded columns (category codes + float confidences)."""
+
+        return self._weight_table[codes] * confidences
+
+    def score_batch(self, categories: Sequence[str], confidences: Sequence[float]) -> BatchScores:
+        conf = np.asarray(confidences, dtype=np.float64)
+        return BatchScores(categories, confidences, self.score_columns(self.encode(categories), conf))
+
+
+engine = RiskScoringEngine(_weights_from_env())
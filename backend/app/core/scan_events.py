@@ -0,0 +1,205 @@
+import asyncio
+import json
+import logging
+import os
+import uuid
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Set
+
+from sqlalchemy import delete, func, text
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from ..db.models import ScanEvent
+from ..db.session import DATABASE_URL, async_engine, async_session
+
+
+logger = logging.getLogger(__name__)
+
+# Workers delete events older than this.
+SCAN_EVENTS_RETENTION_HOURS = float(os.getenv("SCAN_EVENTS_RETENTION_HOURS", "24"))
+
+# Postgres NOTIFY channel carrying events between processes.
+_CHANNEL = "scan_events"
+# NOTIFY payloads are capped at 8000 bytes; larger events are sent without
+# their data and read back from the table by the listening process.
+_NOTIFY_MAX_BYTES = 7900
+_LISTEN_RETRY_SECONDS = 5.0
+
+
+class ScanEventBroker:
+    """Scan progress events: pushed live to subscribers, persisted for replay.
+
+    `run_scan_once` publishes as it goes; each `GET /scans/{scan_id}/events`
+    connection subscribes to its scan. Publishing never blocks: a background
+    task writes events to the `ScanEvent` table in batches (for
+    `Last-Event-ID` replay) and then hands them, with their ids, to this
+    process's subscribers. On Postgres the batch also goes out with NOTIFY
+    on commit, and `listen` forwards other processes' events to local
+    subscribers, so streams get events whichever process runs the scan.
+    """
+
+    def __init__(self) -> None:
+        self._pending: List[Dict[str, Any]] = []
+        self._flusher: Optional[asyncio.Task] = None
+        self._subscribers: Dict[int, Set["asyncio.Queue[ScanEvent]"]] = {}
+        # Tells this process's own notifications apart from other processes'.
+        self._origin = uuid.uuid4().hex
+        self._notifications: "asyncio.Queue[str]" = asyncio.Queue()
+
+    def publish(self, scan_id: int, event: str, data: Dict[str, Any]) -> None:
+        self._pending.append(
+            dict(scan_id=scan_id, event=event, data_json=json.dumps(data, default=str), created_at=datetime.utcnow())
+        )
+        if self._flusher is None or self._flusher.done():
+            try:
+                self._flusher = asyncio.get_running_loop().create_task(self._flush_pending())
+            except RuntimeError:
+                # No event loop: written by the next publish or `flush`.
+                pass
+
+    def subscribe(self, scan_id: int) -> "asyncio.Queue[ScanEvent]":
+        """A queue receiving the scan's events from now on; `unsubscribe` when done."""
+
+        queue: "asyncio.Queue[ScanEvent]" = asyncio.Queue()
+        self._subscribers.setdefault(scan_id, set()).add(queue)
+        return queue
+
+    def unsubscribe(self, scan_id: int, queue: "asyncio.Queue[ScanEvent]") -> None:
+        queues = self._subscribers.get(scan_id)
+        if queues is not None:
+            queues.discard(queue)
+            if not queues:
+                del self._subscribers[scan_id]
+
+    def _deliver(self, event: ScanEvent) -> None:
+        for queue in self._subscribers.get(event.scan_id, ()):
+            queue.put_nowait(event)
+
+    def _notification(self, event: ScanEvent) -> str:
+        payload = dict(origin=self._origin, id=event.id, scan_id=event.scan_id, event=event.event)
+        message = json.dumps(dict(payload, data_json=event.data_json))
+        return message if len(message.encode()) <= _NOTIFY_MAX_BYTES else json.dumps(payload)
+
+    async def _flush_pending(self) -> None:
+        notify = async_engine.dialect.name == "postgresql"
+        while self._pending:
+            batch, self._pending = self._pending, []
+            events = [ScanEvent(**row) for row in batch]
+            try:
+                async with async_session() as session:
+                    session.add_all(events)
+                    await session.flush()  # one multi-row INSERT, assigns the ids
+                    if notify:
+                        await session.execute(
+                            text("SELECT pg_notify(:channel, payload) FROM unnest(CAST(:payloads AS text[])) AS payload"),
+                            {"channel": _CHANNEL, "payloads": [self._notification(event) for event in events]},
+                        )
+                    await session.commit()
+            except Exception:
+                logger.exception("Dropped %d scan event(s)", len(batch))
+                continue
+            for event in events:
+                self._deliver(event)
+
+    async def flush(self) -> None:
+        """Write out queued events (call before shutting down)."""
+
+        if self._flusher is not None:
+            await asyncio.gather(self._flusher, return_exceptions=True)
+        await self._flush_pending()
+
+    async def _forward(self, payload: str) -> None:
+        message = json.loads(payload)
+        if message["origin"] == self._origin or message["scan_id"] not in self._subscribers:
+            return
+        if "data_json" in message:
+            event = ScanEvent(
+                id=message["id"], scan_id=message["scan_id"], event=message["event"], data_json=message["data_json"]
+            )
+        else:
+            async with async_session() as session:
+                event = await session.get(ScanEvent, message["id"])
+            if event is None:
+                return
+        self._deliver(event)
+
+    def _on_notify(self, connection: Any, pid: int, channel: str, payload: str) -> None:
+        self._notifications.put_nowait(payload)
+
+    async def listen(self) -> None:
+        """Forward events published by other processes to local subscribers (Postgres only).
+
+        Runs until cancelled, reconnecting after errors. Streams catch up on
+        anything missed meanwhile from the table.
+        """
+
+        if async_engine.dialect.name != "postgresql":
+            return
+        import asyncpg
+
+        dsn = "postgresql://" + DATABASE_URL.split("://", 1)[1]
+        while True:
+            try:
+                connection = await asyncpg.connect(dsn)
+                try:
+                    await connection.add_listener(_CHANNEL, self._on_notify)
+                    while not connection.is_closed():
+                        try:
+                            payload = await asyncio.wait_for(self._notifications.get(), _LISTEN_RETRY_SECONDS)
+                        except asyncio.TimeoutError:
+                            continue
+                        # One at a time, so events reach subscribers in order.
+                        await self._forward(payload)
+                finally:
+                    await connection.close()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Scan event listener failed; reconnecting in %.1fs", _LISTEN_RETRY_SECONDS)
+            await asyncio.sleep(_LISTEN_RETRY_SECONDS)
+
+
+broker = ScanEventBroker()
+
+
+async def latest_event_id(session: AsyncSession, scan_id: int) -> int:
+    statement = select(func.max(ScanEvent.id)).where(ScanEvent.scan_id == scan_id)
+    return (await session.exec(statement)).first() or 0
+
+
+async def read_events(session: AsyncSession, scan_id: int, after_id: int) -> List[ScanEvent]:
+    """The scan's events published after event `after_id`, oldest first (for replay)."""
+
+    statement = (
+        select(ScanEvent)
+        .where(ScanEvent.scan_id == scan_id, ScanEvent.id > after_id)  # type: ignore[operator]
+        .order_by(ScanEvent.id)  # type: ignore[arg-type]
+    )
+    return list((await session.exec(statement)).all())
+
+
+async def prune_events(session: AsyncSession, retention_hours: float = SCAN_EVENTS_RETENTION_HOURS) -> int:
+    cutoff = datetime.utcnow() - timedelta(hours=retention_hours)
+    result = await session.execute(delete(ScanEvent).where(ScanEvent.created_at < cutoff))  # type: ignore[arg-type]
+    await session.commit()
+    return result.rowcount or 0
+
+
+def format_sse(event: str, data: Dict[str, Any], event_id: Optional[int] = None) -> str:
+    prefix = f"id: {event_id}\n" if event_id is not None else ""
+    return f"{prefix}event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+# Item fields as served by `GET /scans/{scan_id}/items`.
+ITEM_LIST_FIELDS = ("id", "category", "source", "title", "snippet", "url", "confidence", "risk_score")
+
+
+def item_payload(item: Any) -> Dict[str, Any]:
+    return {field: getattr(item, field) for field in ITEM_LIST_FIELDS}
+
+
+def rows_payload(rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """List-view payload for plain Item rows (as built by the scan runner)."""
+
+    return [{field: row.get(field) for field in ITEM_LIST_FIELDS} for row in rows]
@@ -1,24 +1,269 @@
+import asyncio
 import json
-from typing import Any, Dict, List
+import logging
+import os
+import time
+from contextlib import asynccontextmanager
+from datetime import datetime
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Tuple
 
-from sqlmodel import Session, select
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
 
-from ..db.models import Scan, Item, ToolCall
-from ..mcp_tools import search_web, search_social, check_breach, score_risk, reverse_image_search
-from . import planner_service
+from ..db.bulk import bulk_insert
+from ..db.models import Scan, Item, ScanTrace, ToolCall
+from ..db.session import async_session
+from . import dedup, planner_service, tracing
+from .config import tool_int_map
+from .job_queue import STATUS_COMPLETED, STATUS_RUNNING
+from .metrics import SCAN_PERSIST_SECONDS, SCAN_SECONDS, TOOL_CALL_ERRORS, since
+from .resilience import PROVIDER_FAILURES, DeadlineExceeded, ScanDeadline
+from .risk_engine import engine as risk_engine
+from .scan_events import broker, rows_payload
+from .tool_dispatch import ConnectorResult, call_connector
 
 
-async def run_scan_once(scan_id: int, session: Session) -> Dict[str, Any]:
+logger = logging.getLogger(__name__)
+
+# Maximum number of plan actions a single scan runs at the same time.
+SCAN_MAX_CONCURRENCY = max(1, int(os.getenv("SCAN_MAX_CONCURRENCY", "4")))
+
+# Maximum number of in-flight calls per tool across *all* scans in this
+# process, so we stay within each provider's limits (HIBP is strict).
+TOOL_CONCURRENCY: Dict[str, int] = tool_int_map(
+    "TOOL_CONCURRENCY",
+    {
+        "searchWeb": 4,
+        "searchSocial": 4,
+        "checkBreach": 1,
+        "reverseImageSearch": 2,
+    },
+    minimum=1,
+)
+_DEFAULT_TOOL_CONCURRENCY = 2
+
+_tool_semaphores: Dict[str, asyncio.Semaphore] = {}
+
+
+def _tool_semaphore(tool: str) -> asyncio.Semaphore:
+    sem = _tool_semaphores.get(tool)
+    if sem is None:
+        sem = asyncio.Semaphore(TOOL_CONCURRENCY.get(tool, _DEFAULT_TOOL_CONCURRENCY))
+        _tool_semaphores[tool] = sem
+    return sem
+
+
+def _web_items(scan_id: int, args: Dict[str, Any], results: Any) -> List[Dict[str, Any]]:
+    return [
+        dict(
+            scan_id=scan_id,
+            category="web_result",
+            source="web",
+            title=r.get("title", ""),
+            snippet=r.get("snippet", ""),
+            url=r.get("url", ""),
+            confidence=0.7,
+            metadata_json=json.dumps(r),
+        )
+        for r in results
+    ]
+
+
+def _social_items(scan_id: int, args: Dict[str, Any], results: Any) -> List[Dict[str, Any]]:
+    return [
+        dict(
+            scan_id=scan_id,
+            category="social_post",
+            source=args.get("service", "social"),
+            title=r.get("text", ""),
+            snippet=r.get("text", ""),
+            url=r.get("url", ""),
+            confidence=0.7,
+            metadata_json=json.dumps(r),
+        )
+        for r in results
+    ]
+
+
+def _breach_items(scan_id: int, args: Dict[str, Any], result: Any) -> List[Dict[str, Any]]:
+    return [
+        dict(
+            scan_id=scan_id,
+            category="breach",
+            source="hibp",
+            title=b.get("name", "Breach"),
+            snippet=b.get("details", ""),
+            url=b.get("url", ""),
+            confidence=0.9,
+            metadata_json=json.dumps(b),
+        )
+        for b in result.get("breaches", [])
+    ]
+
+
+def _image_items(scan_id: int, args: Dict[str, Any], results: Any) -> List[Dict[str, Any]]:
+    return [
+        dict(
+            scan_id=scan_id,
+            category="image_match",
+            source="reverse_image",
+            title=r.get("url", "Image match"),
+            snippet=r.get("context", ""),
+            url=r.get("url", ""),
+            confidence=float(r.get("similarity", 0.0)),
+            metadata_json=json.dumps(r),
+        )
+        for r in results
+    ]
+
+
+# Tools the executor knows how to run, with their result -> Item rows mapper.
+_ITEM_MAPPERS: Dict[str, Callable[[int, Dict[str, Any], Any], List[Dict[str, Any]]]] = {
+    "searchWeb": _web_items,
+    "searchSocial": _social_items,
+    "checkBreach": _breach_items,
+    "reverseImageSearch": _image_items,
+}
+
+
+@asynccontextmanager
+async def _action_slot(tool: str, scan_limit: asyncio.Semaphore) -> AsyncIterator[None]:
+    # Take the tool slot before the scan slot so actions queued behind a
+    # saturated provider don't hold scan slots other tools could use.
+    async with _tool_semaphore(tool):
+        async with scan_limit:
+            yield
+
+
+async def _execute_action(
+    scan: Scan,
+    index: int,
+    tool: str,
+    args: Dict[str, Any],
+    scan_limit: asyncio.Semaphore,
+    deadline: ScanDeadline,
+) -> Tuple[Optional[ConnectorResult], List[Dict[str, Any]], int]:
+    """Run one plan action: `(outcome, item rows, duration_ms)`.
+
+    The outcome is None (and there are no rows) when a provider failure
+    skipped the action.
+    """
+
+    scan_id: int = scan.id  # type: ignore[assignment]
+    broker.publish(scan_id, "tool_started", {"action": index, "tool": tool})
+    started = time.perf_counter()
+    try:
+        with tracing.span("action", index=index, tool=tool) as action_span:
+            # Cache hits are served without waiting for a provider slot.
+            outcome = await deadline.run(
+                tool,
+                call_connector(
+                    tool,
+                    args,
+                    db_cache=True,
+                    bypass_cache=scan.bypass_cache,
+                    provider_slot=_action_slot(tool, scan_limit),
+                ),
+            )
+            action_span.set("cached", outcome.cached)
+            action_span.set("shared", outcome.shared)
+    except Exception as exc:
+        duration_ms = int((time.perf_counter() - started) * 1000)
+        skipped = isinstance(exc, PROVIDER_FAILURES)
+        if isinstance(exc, DeadlineExceeded):
+            # Other failures are counted by call_connector itself.
+            TOOL_CALL_ERRORS.inc(tool, "DeadlineExceeded")
+        broker.publish(
+            scan_id,
+            "tool_finished",
+            {
+                "action": index,
+                "tool": tool,
+                "duration_ms": duration_ms,
+                "ok": False,
+                "skipped": skipped,
+                "error": str(exc),
+            },
+        )
+        if skipped:
+            return None, [], duration_ms
+        raise
+    duration_ms = int((time.perf_counter() - started) * 1000)
+
+    rows = _ITEM_MAPPERS[tool](scan_id, args, outcome.result)
+    broker.publish(
+        scan_id,
+        "tool_finished",
+        {
+            "action": index,
+            "tool": tool,
+            "duration_ms": duration_ms,
+            "ok": True,
+            "cached": outcome.cached,
+            "shared": outcome.shared,
+        },
+    )
+    # Not yet persisted (no ids, unscored); the `scores` event carries the final rows.
+    broker.publish(scan_id, "items", {"action": index, "tool": tool, "items": rows_payload(rows)})
+    return outcome, rows, duration_ms
+
+
+async def run_scan_once(scan_id: int, session: AsyncSession) -> Dict[str, Any]:
     """Run a single planner+tool iteration for the given scan.
 
     This is a mock implementation: it calls the planner once and executes
-    only a subset of tools, storing Items and ToolCalls.
+    only a subset of tools, storing Items and ToolCalls. Plan actions run
+    concurrently (bounded per scan and per tool); results are persisted in
+    plan order so Item/ToolCall ids are deterministic. Connector results go
+    through the cross-scan cache (`core.tool_cache`) and duplicate results
+    are merged before scoring (`core.dedup`). Progress is published
+    to `scan_events.broker` for `GET /scans/{scan_id}/events`.
+
+    Each action has a deadline carved from the scan's time budget
+    (`core.resilience`). Actions that hit a provider failure (deadline, open
+    circuit, rate limit, HTTP error) are skipped and the scan is marked
+    `partial` instead of failing.
     """
 
-    scan = session.exec(select(Scan).where(Scan.id == scan_id)).first()
+    started = time.perf_counter()
+    status = "failed"
+    trace = None
+    try:
+        with tracing.start_trace("scan", scan_id=scan_id) as trace:
+            result = await _run_scan(scan_id, session)
+            status = "partial" if result["partial"] else "completed"
+            tracing.current_span().set("status", status)
+    finally:
+        SCAN_SECONDS.observe(since(started), status)
+        if trace is not None and tracing.should_keep(trace):
+            await _save_trace(scan_id, trace)
+    return result
+
+
+async def _save_trace(scan_id: int, trace: tracing.Trace) -> None:
+    # Own session: the scan's may be unusable after a failed run.
+    try:
+        async with async_session() as session:
+            session.add(
+                ScanTrace(
+                    scan_id=scan_id,
+                    trace_id=trace.trace_id,
+                    duration_ms=tracing.duration_ms(trace),
+                    spans_json=json.dumps([s.to_dict() for s in trace.spans], default=str),
+                )
+            )
+            await session.commit()
+    except Exception:
+        logger.exception("Failed to save trace for scan %s", scan_id)
+
+
+async def _run_scan(scan_id: int, session: AsyncSession) -> Dict[str, Any]:
+    scan = (await session.exec(select(Scan).where(Scan.id == scan_id))).first()
     if not scan:
         raise ValueError("Scan not found")
 
+    broker.publish(scan.id, "status", {"status": STATUS_RUNNING})
+
     seeds = json.loads(scan.seeds_json)
     state = {
         "seeds": seeds,
@@ -28,120 +273,95 @@ async def run_scan_once(scan_id: int, session: Session) -> Dict[str, Any]:
 
     plan = await planner_service.get_plan(state=state, goal="produce_risk_report")
     actions: List[Dict[str, Any]] = plan.get("actions", [])
+    broker.publish(scan.id, "plan", {"actions": actions, "stop": plan.get("stop")})
 
-    created_items: List[Item] = []
-
-    for action in actions:
-        tool = action.get("tool")
-        args = action.get("args", {})
-
-        if tool == "searchWeb":
-            results = await search_web.search_web(**args)
-            for r in results:
-                item = Item(
-                    scan_id=scan.id,
-                    category="web_result",
-                    source="web",
-                    title=r.get("title", ""),
-                    snippet=r.get("snippet", ""),
-                    url=r.get("url", ""),
-                    confidence=0.7,
-                    risk_score=0.0,
-                    metadata_json=json.dumps(r),
-                )
-                session.add(item)
-                created_items.append(item)
-            _log_tool_call(session, scan.id, tool, args, results)
-        elif tool == "searchSocial":
-            results = await search_social.search_social(**args)
-            for r in results:
-                item = Item(
-                    scan_id=scan.id,
-                    category="social_post",
-                    source=args.get("service", "social"),
-                    title=r.get("text", ""),
-                    snippet=r.get("text", ""),
-                    url=r.get("url", ""),
-                    confidence=0.7,
-                    risk_score=0.0,
-                    metadata_json=json.dumps(r),
-                )
-                session.add(item)
-                created_items.append(item)
-            _log_tool_call(session, scan.id, tool, args, results)
-        elif tool == "checkBreach":
-            result = await check_breach.check_breach(**args)
-            breaches = result.get("breaches", [])
-            for b in breaches:
-                item = Item(
-                    scan_id=scan.id,
-                    category="breach",
-                    source="hibp",
-                    title=b.get("name", "Breach"),
-                    snippet=b.get("details", ""),
-                    url=b.get("url", ""),
-                    confidence=0.9,
-                    risk_score=0.0,
-                    metadata_json=json.dumps(b),
-                )
-                session.add(item)
-                created_items.append(item)
-            _log_tool_call(session, scan.id, tool, args, result)
-        elif tool == "reverseImageSearch":
-            results = await reverse_image_search.reverse_image_search(**args)
-            for r in results:
-                item = Item(
-                    scan_id=scan.id,
-                    category="image_match",
-                    source="reverse_image",
-                    title=r.get("url", "Image match"),
-                    snippet=r.get("context", ""),
-                    url=r.get("url", ""),
-                    confidence=float(r.get("similarity", 0.0)),
-                    risk_score=0.0,
-                    metadata_json=json.dumps(r),
-                )
-                session.add(item)
-                created_items.append(item)
-            _log_tool_call(session, scan.id, tool, args, results)
-        else:
-            # For now, ignore other tools in the plan
+    # For now, ignore tools in the plan the executor has no handler for.
+    runnable = [
+        (action.get("tool"), action.get("args", {}))
+        for action in actions
+        if action.get("tool") in _ITEM_MAPPERS
+    ]
+
+    scan_limit = asyncio.Semaphore(SCAN_MAX_CONCURRENCY)
+    deadline = ScanDeadline()
+    outcomes = await asyncio.gather(
+        *(_execute_action(scan, i, tool, args, scan_limit, deadline) for i, (tool, args) in enumerate(runnable)),
+        return_exceptions=True,
+    )
+
+    now = datetime.utcnow()
+    item_rows: List[Dict[str, Any]] = []
+    call_rows: List[Dict[str, Any]] = []
+    partial = False
+
+    for (tool, args), outcome in zip(runnable, outcomes):
+        if isinstance(outcome, BaseException):
+            raise outcome
+        connector_result, rows, duration_ms = outcome
+        if connector_result is None:
+            partial = True
             continue
+        item_rows.extend(rows)
+        call_rows.append(_tool_call_row(scan.id, tool, args, connector_result, duration_ms, now))
 
-    # Risk scoring for created items
-    if created_items:
-        # Ensure items have primary keys assigned
-        session.flush()
-        items_payload = [
-            {
-                "id": str(item.id),
-                "category": item.category,
-                "confidence": item.confidence,
-            }
-            for item in created_items
-        ]
-        scores = await score_risk.score_risk(items_payload)
-        by_id = {s.get("item_id"): s for s in scores}
-        for item in created_items:
-            s = by_id.get(str(item.id))
-            if s is not None:
-                item.risk_score = float(s.get("risk_score", 0.0))
-
-    scan.status = "completed"
-    session.commit()
+    persist_started = time.perf_counter()
+    with tracing.span("scan.dedup", rows=len(item_rows)):
+        item_rows = await dedup.dedupe_scan_rows(session, scan, item_rows)
+
+    # Risk scoring happens before insert so each row is written exactly once.
+    # Only the scores are needed here, so use the batch engine directly
+    # rather than the scoreRisk tool (no per-item explanation strings).
+    if item_rows:
+        with tracing.span("scan.score", rows=len(item_rows)):
+            batch = risk_engine.score_batch(
+                [row["category"] for row in item_rows],
+                [row["confidence"] for row in item_rows],
+            )
+            for row, score in zip(item_rows, batch.scores.tolist()):
+                row["risk_score"] = score
+                row["scoring_version"] = risk_engine.version
+                row["created_at"] = now
+
+    with tracing.span("scan.persist", items=len(item_rows), tool_calls=len(call_rows)):
+        # Ids for the `scores` event (free on Postgres, which always uses RETURNING).
+        item_ids = await bulk_insert(session, Item, item_rows, return_ids=True)
+        await bulk_insert(session, ToolCall, call_rows)
+
+        scan.status = STATUS_COMPLETED
+        scan.partial = partial
+        scan.updated_at = now
+        await session.commit()
+    SCAN_PERSIST_SECONDS.observe(since(persist_started))
+
+    for row, item_id in zip(item_rows, item_ids or []):
+        row["id"] = item_id
+    broker.publish(scan.id, "scores", {"items": rows_payload(item_rows)})
+    broker.publish(
+        scan.id, "status", {"status": STATUS_COMPLETED, "partial": partial, "items_created": len(item_rows)}
+    )
 
     return {
         "scan_id": scan.id,
         "status": scan.status,
-        "items_created": len(created_items),
+        "partial": partial,
+        "items_created": len(item_rows),
     }
 
 
-def _log_tool_call(session: Session, scan_id: int, tool: str, args: Dict[str, Any], response: Any) -> None:
-    call = ToolCall(
-        scan_id=scan_id,
-        tool_name=tool,
-        args_json=json.dumps(args),
-        response_json=json.dumps(response),
-    )
-    session.add(call)
+def _tool_call_row(
+    scan_id: int,
+    tool: str,
+    args: Dict[str, Any],
+    outcome: ConnectorResult,
+    duration_ms: int,
+    created_at: datetime,
+) -> Dict[str, Any]:
+    return {
+        "scan_id": scan_id,
+        "tool_name": tool,
+        "args_json": json.dumps(args),
+        "response_json": json.dumps(outcome.result),
+        "duration_ms": duration_ms,
+        "cache_key": outcome.cache_key,
+        "created_at": created_at,
+    }
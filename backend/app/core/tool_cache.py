@@ -0,0 +1,148 @@
+import hashlib
+import json
+import os
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Any, Dict, Tuple
+
+from sqlmodel import select
+
+from ..db.models import ToolCall
+from ..db.session import async_session
+from .config import tool_int_map
+
+
+# Seconds a tool result may be served from cache. Tools not listed (or set
+# to 0) are never cached: scoreRisk is local and generateRemediation is
+# item-specific.
+TOOL_CACHE_TTLS: Dict[str, int] = tool_int_map(
+    "TOOL_CACHE_TTLS",
+    {
+        "searchWeb": 6 * 3600,
+        "searchSocial": 6 * 3600,
+        "checkBreach": 24 * 3600,
+        "reverseImageSearch": 24 * 3600,
+    },
+)
+
+# Budget for the in-process tier, measured as the size of the serialized
+# responses it holds.
+TOOL_CACHE_MAX_BYTES = int(os.getenv("TOOL_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+
+# Argument values compared case-insensitively when building the cache key.
+_CASE_INSENSITIVE_ARGS = {"email", "service", "image_hash", "query"}
+
+
+def normalize_args(args: Dict[str, Any]) -> Dict[str, Any]:
+    """Canonical form of tool args: trimmed, whitespace-collapsed, no Nones."""
+
+    normalized: Dict[str, Any] = {}
+    for key, value in args.items():
+        if value is None:
+            continue
+        if isinstance(value, str):
+            value = " ".join(value.split())
+            if key in _CASE_INSENSITIVE_ARGS:
+                value = value.lower()
+        normalized[key] = value
+    return normalized
+
+
+def cache_key(tool: str, args: Dict[str, Any]) -> str:
+    canonical = json.dumps(normalize_args(args), sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    return hashlib.sha256(f"{tool}\x00{canonical}".encode("utf-8")).hexdigest()
+
+
+class ToolResultCache:
+    """Two-tier cache of connector results keyed on tool + normalized args.
+
+    Tier 1 is an in-process LRU bounded by `max_bytes`. Tier 2 is the
+    `ToolCall` table: every provider call logged with a `cache_key` can
+    serve later lookups until its TTL expires. Values are kept serialized
+    so every hit hands the caller a fresh copy.
+    """
+
+    def __init__(self, ttls: Dict[str, int], max_bytes: int) -> None:
+        self.ttls = ttls
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+        self._bytes = 0
+        self.memory_hits = 0
+        self.db_hits = 0
+        self.misses = 0
+        self.bypassed = 0
+
+    def is_cacheable(self, tool: str) -> bool:
+        return self.ttls.get(tool, 0) > 0
+
+    async def get(self, tool: str, key: str, db: bool = False) -> Tuple[bool, Any]:
+        """Return `(hit, value)`; looks in memory first, then (with `db`) in ToolCall rows."""
+
+        entry = self._entries.get(key)
+        if entry is not None:
+            expires_at, payload = entry
+            if expires_at > time.time():
+                self._entries.move_to_end(key)
+                self.memory_hits += 1
+                return True, json.loads(payload)
+            self._evict(key)
+
+        if db:
+            ttl = self.ttls.get(tool, 0)
+            cutoff = datetime.utcnow() - timedelta(seconds=ttl)
+            # Own short-lived session: lookups run concurrently within a scan.
+            async with async_session() as session:
+                row = (
+                    await session.exec(
+                        select(ToolCall.response_json, ToolCall.created_at)
+                        .where(ToolCall.cache_key == key, ToolCall.created_at >= cutoff)
+                        .order_by(ToolCall.id.desc())  # type: ignore[union-attr]
+                        .limit(1)
+                    )
+                ).first()
+            if row is not None:
+                payload, created_at = row
+                age = (datetime.utcnow() - created_at).total_seconds()
+                self._store(key, payload, time.time() + ttl - age)
+                self.db_hits += 1
+                return True, json.loads(payload)
+
+        self.misses += 1
+        return False, None
+
+    def put(self, tool: str, key: str, value: Any) -> None:
+        self._store(key, json.dumps(value), time.time() + self.ttls.get(tool, 0))
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "memory_hits": self.memory_hits,
+            "db_hits": self.db_hits,
+            "misses": self.misses,
+            "bypassed": self.bypassed,
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+        }
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._bytes = 0
+
+    def _store(self, key: str, payload: str, expires_at: float) -> None:
+        size = len(payload)
+        if size > self.max_bytes:
+            return
+        self._evict(key)
+        self._entries[key] = (expires_at, payload)
+        self._bytes += size
+        while self._bytes > self.max_bytes:
+            oldest = next(iter(self._entries))
+            self._evict(oldest)
+
+    def _evict(self, key: str) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._bytes -= len(entry[1])
+
+
+tool_cache = ToolResultCache(TOOL_CACHE_TTLS, TOOL_CACHE_MAX_BYTES)
@@ -0,0 +1,79 @@
+import time
+from typing import Any, AsyncContextManager, Awaitable, Callable, Dict, NamedTuple, Optional
+
+from ..mcp_tools.registry import registry
+from .metrics import TOOL_CALL_ERRORS, TOOL_CALL_SECONDS, since
+from .resilience import provider_for, resilience
+from .singleflight import SingleFlight
+from .tool_cache import cache_key, tool_cache
+from .tracing import span
+
+
+# External connectors, i.e. the tools worth caching (registered with
+# `connector=True`). Shared by the scan runner and `POST /mcp/call`.
+CONNECTOR_TOOLS: Dict[str, Callable[..., Awaitable[Any]]] = registry.connectors()
+
+
+# Identical connector calls already in flight (across all scans and
+# /mcp/call requests in this process) are shared instead of repeated.
+inflight = SingleFlight()
+
+
+class ConnectorResult(NamedTuple):
+    result: Any
+    # Set only when this caller made the provider call and `result` should be
+    # logged as a cacheable ToolCall row.
+    cache_key: Optional[str]
+    cached: bool
+    # True when the result came from another caller's identical in-flight call.
+    shared: bool = False
+
+
+async def call_connector(
+    tool: str,
+    args: Dict[str, Any],
+    db_cache: bool = False,
+    bypass_cache: bool = False,
+    provider_slot: Optional[AsyncContextManager[Any]] = None,
+) -> ConnectorResult:
+    """Run a connector tool through the cross-scan result cache.
+
+    `db_cache` also looks up logged ToolCall rows, not just this process's
+    memory. With `bypass_cache` the provider is always called, but the fresh result
+    still refreshes the cache for everyone else. Concurrent identical calls
+    are coalesced into one provider call. `provider_slot` (e.g. a
+    concurrency limit) is entered only around the actual provider call.
+    Provider calls go through the provider's circuit breaker and are hedged
+    when slow (`core.resilience`).
+    """
+
+    started = time.perf_counter()
+    func = CONNECTOR_TOOLS[tool]
+    key = cache_key(tool, args)
+    cacheable = tool_cache.is_cacheable(tool)
+
+    if cacheable:
+        if bypass_cache:
+            tool_cache.bypassed += 1
+        else:
+            with span("cache.lookup", tool=tool, db=db_cache) as lookup_span:
+                hit, value = await tool_cache.get(tool, key, db=db_cache)
+                lookup_span.set("hit", hit)
+            if hit:
+                TOOL_CALL_SECONDS.observe(since(started), tool, "cache_hit")
+                return ConnectorResult(value, None, True)
+
+    async def _call_provider() -> Any:
+        result = await resilience.call(provider_for(tool, args), lambda: func(**args), provider_slot)
+        if cacheable:
+            tool_cache.put(tool, key, result)
+        return result
+
+    try:
+        result, shared = await inflight.do(key, _call_provider)
+    except Exception as exc:
+        TOOL_CALL_SECONDS.observe(since(started), tool, "error")
+        TOOL_CALL_ERRORS.inc(tool, type(exc).__name__)
+        raise
+    TOOL_CALL_SECONDS.observe(since(started), tool, "shared" if shared else "provider")
+    return ConnectorResult(result, key if cacheable and not shared else None, False, shared)
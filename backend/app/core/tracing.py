@@ -0,0 +1,230 @@
+import os
+import random
+import secrets
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Deque, Dict, Iterator, List, Optional, Union
+
+
+# Fraction of scans traced from the start. Runs in the latency tail are kept
+# as well: slower than the TRACE_SLOW_SCAN_PERCENTILE of the last
+# TRACE_SLOW_SCAN_WINDOW runs in this process, or than a fixed
+# TRACE_SLOW_SCAN_MS when that is set. While tail capture is on, spans are
+# recorded (in memory only) for every run so the slow ones can be saved.
+# A sample rate and percentile of 0 (and no TRACE_SLOW_SCAN_MS) turn
+# tracing off.
+TRACE_SAMPLE_RATE = float(os.getenv("TRACE_SAMPLE_RATE", "0.05"))
+TRACE_SLOW_SCAN_PERCENTILE = float(os.getenv("TRACE_SLOW_SCAN_PERCENTILE", "99"))
+TRACE_SLOW_SCAN_WINDOW = int(os.getenv("TRACE_SLOW_SCAN_WINDOW", "1000"))
+TRACE_SLOW_SCAN_MS = float(os.getenv("TRACE_SLOW_SCAN_MS", "0"))
+
+_TAIL_CAPTURE = TRACE_SLOW_SCAN_MS > 0 or TRACE_SLOW_SCAN_PERCENTILE > 0
+# Runs needed before the percentile says anything about the tail.
+_SLOW_SCAN_MIN_RUNS = 100
+_recent_ms: Deque[int] = deque(maxlen=max(1, TRACE_SLOW_SCAN_WINDOW))
+
+AttributeValue = Union[str, int, float, bool, None]
+
+
+class Trace:
+    def __init__(self, sampled: bool) -> None:
+        self.trace_id = secrets.token_hex(16)
+        self.sampled = sampled
+        self.spans: List["Span"] = []
+
+
+class Span:
+    """One timed operation; a context manager that becomes the current span."""
+
+    __slots__ = ("trace", "name", "span_id", "parent_id", "start_ns", "end_ns", "attributes", "status", "_token")
+
+    def __init__(self, trace: Trace, name: str, parent: Optional["Span"], attributes: Dict[str, AttributeValue]) -> None:
+        self.trace = trace
+        self.name = name
+        self.span_id = secrets.token_hex(8)
+        self.parent_id = parent.span_id if parent is not None else None
+        self.start_ns = 0
+        self.end_ns = 0
+        self.attributes = attributes
+        self.status = "ok"
+        self._token: Any = None
+
+    def set(self, key: str, value: AttributeValue) -> None:
+        self.attributes[key] = value
+
+    def __enter__(self) -> "Span":
+        self.start_ns = time.time_ns()
+        self._token = _current_span.set(self)
+        self.trace.spans.append(self)
+        return self
+
+    def __exit__(self, exc_type: Any, exc: Any, tb: Any) -> None:
+        self.end_ns = time.time_ns()
+        if exc_type is not None:
+            self.status = "error"
+            self.attributes["error"] = str(exc) or exc_type.__name__
+        _current_span.reset(self._token)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "start_ns": self.start_ns,
+            "end_ns": self.end_ns,
+            "attributes": self.attributes,
+            "status": self.status,
+        }
+
+
+class _NoopSpan:
+    """Stand-in when the current scan isn't traced; costs one ContextVar read."""
+
+    def set(self, key: str, value: AttributeValue) -> None:
+        pass
+
+    def __enter__(self) -> "_NoopSpan":
+        return self
+
+    def __exit__(self, exc_type: Any, exc: Any, tb: Any) -> None:
+        pass
+
+
+_NOOP_SPAN = _NoopSpan()
+_current_trace: ContextVar[Optional[Trace]] = ContextVar("current_trace", default=None)
+_current_span: ContextVar[Optional[Span]] = ContextVar("current_span", default=None)
+
+
+def span(name: str, **attributes: AttributeValue) -> Union[Span, _NoopSpan]:
+    """`with span("name", key=value) as s:` — a child of the current span.
+
+    A no-op outside a recorded trace. asyncio tasks inherit the current span,
+    so work fanned out with `gather` nests under the span that started it.
+    """
+
+    trace = _current_trace.get()
+    if trace is None:
+        return _NOOP_SPAN
+    return Span(trace, name, _current_span.get(), attributes)
+
+
+def current_span() -> Union[Span, _NoopSpan]:
+    return _current_span.get() or _NOOP_SPAN
+
+
+@contextmanager
+def start_trace(name: str, **attributes: AttributeValue) -> Iterator[Optional[Trace]]:
+    """Root span for one scan run; yields None when this run isn't recorded."""
+
+    sampled = TRACE_SAMPLE_RATE > 0 and random.random() < TRACE_SAMPLE_RATE
+    if not sampled and not _TAIL_CAPTURE:
+        yield None
+        return
+    trace = Trace(sampled)
+    token = _current_trace.set(trace)
+    try:
+        with Span(trace, name, None, attributes):
+            yield trace
+    finally:
+        _current_trace.reset(token)
+
+
+def _slow_threshold_ms() -> Optional[float]:
+    if TRACE_SLOW_SCAN_MS > 0:
+        return TRACE_SLOW_SCAN_MS
+    if TRACE_SLOW_SCAN_PERCENTILE <= 0 or len(_recent_ms) < _SLOW_SCAN_MIN_RUNS:
+        return None
+    ordered = sorted(_recent_ms)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * TRACE_SLOW_SCAN_PERCENTILE / 100))]
+
+
+def should_keep(trace: Trace) -> bool:
+    """Whether to save a finished run's spans: sampled, or in the latency tail."""
+
+    elapsed = duration_ms(trace)
+    threshold = _slow_threshold_ms()
+    _recent_ms.append(elapsed)
+    return trace.sampled or (threshold is not None and elapsed > threshold)
+
+
+def duration_ms(trace: Trace) -> int:
+    root = trace.spans[0]
+    return (root.end_ns - root.start_ns) // 1_000_000
+
+
+def waterfall(spans: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Spans depth-first (children by start time) with offsets from the root."""
+
+    if not spans:
+        return []
+    children: Dict[Optional[str], List[Dict[str, Any]]] = {}
+    for s in spans:
+        children.setdefault(s["parent_id"], []).append(s)
+    origin = min(s["start_ns"] for s in spans)
+
+    rows: List[Dict[str, Any]] = []
+
+    def _walk(parent_id: Optional[str], depth: int) -> None:
+        for s in sorted(children.get(parent_id, []), key=lambda s: s["start_ns"]):
+            rows.append(
+                {
+                    "span_id": s["span_id"],
+                    "parent_id": s["parent_id"],
+                    "name": s["name"],
+                    "depth": depth,
+                    "start_ms": round((s["start_ns"] - origin) / 1e6, 3),
+                    "duration_ms": round((s["end_ns"] - s["start_ns"]) / 1e6, 3),
+                    "status": s["status"],
+                    "attributes": s["attributes"],
+                }
+            )
+            _walk(s["span_id"], depth + 1)
+
+    _walk(None, 0)
+    return rows
+
+
+def _otlp_value(value: AttributeValue) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": "" if value is None else str(value)}
+
+
+def to_otlp(trace_id: str, spans: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """OTLP/JSON `ExportTraceServiceRequest` body for one stored trace."""
+
+    return {
+        "resourceSpans": [
+            {
+                "resource": {"attributes": [{"key": "service.name", "value": {"stringValue": "privacy-protector"}}]},
+                "scopeSpans": [
+                    {
+                        "scope": {"name": "app.core.tracing"},
+                        "spans": [
+                            {
+                                "traceId": trace_id,
+                                "spanId": s["span_id"],
+                                "parentSpanId": s["parent_id"] or "",
+                                "name": s["name"],
+                                "kind": 1,
+                                "startTimeUnixNano": str(s["start_ns"]),
+                                "endTimeUnixNano": str(s["end_ns"]),
+                                "attributes": [
+                                    {"key": key, "value": _otlp_value(value)} for key, value in s["attributes"].items()
+                                ],
+                                # STATUS_CODE_OK = 1, STATUS_CODE_ERROR = 2
+                                "status": {"code": 2 if s["status"] == "error" else 1},
+                            }
+                            for s in spans
+                        ],
+                    }
+                ],
+            }
+        ]
+    }
@@ -0,0 +1,67 @@
+from typing import Any, Dict, List, Optional, Sequence, Type
+
+from sqlalchemy import insert
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlmodel import SQLModel
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+
+async def bulk_insert(
+    session: AsyncSession,
+    model: Type[SQLModel],
+    rows: List[Dict[str, Any]],
+    return_ids: bool = False,
+) -> Optional[List[int]]:
+    """Insert plain dict rows for `model` in as few round trips as possible.
+
+    Bypasses the ORM unit of work: rows must already carry every value that
+    would otherwise come from a Python-side default (e.g. `created_at`).
+
+    On Postgres this is a multi-row `INSERT ... VALUES (...), (...) RETURNING
+    id` (SQLAlchemy batches the rows), and the ids come back in row order.
+    Elsewhere (SQLite) it is a plain executemany; ids are only fetched there
+    when `return_ids` is set and the driver supports ordered RETURNING.
+    """
+
+    if not rows:
+        return [] if return_ids else None
+
+    table = model.__table__  # type: ignore[attr-defined]
+    dialect = session.get_bind().dialect
+    use_returning = dialect.name == "postgresql" or (
+        return_ids and dialect.insert_executemany_returning_sort_by_parameter_order
+    )
+
+    if use_returning:
+        statement = insert(table).returning(table.c.id, sort_by_parameter_order=True)
+        ids = list((await session.execute(statement, rows)).scalars())
+        return ids if return_ids else None
+
+    await session.execute(insert(table), rows)
+    return None
+
+
+async def bulk_insert_ignoring_conflicts(
+    session: AsyncSession,
+    model: Type[SQLModel],
+    rows: List[Dict[str, Any]],
+    conflict_columns: Sequence[str],
+) -> None:
+    """Like `bulk_insert`, skipping rows that collide on a unique `conflict_columns` index.
+
+    `INSERT ... ON CONFLICT DO NOTHING` on Postgres and SQLite, so a batch of
+    get-or-create rows is one statement however many already exist.
+    """
+
+    if not rows:
+        return
+
+    table = model.__table__  # type: ignore[attr-defined]
+    dialect = session.get_bind().dialect.name
+    if dialect == "postgresql":
+        statement = postgresql.insert(table)
+    elif dialect == "sqlite":
+        statement = sqlite.insert(table)
+    else:
+        raise NotImplementedError(f"ON CONFLICT DO NOTHING is not supported for {dialect}")
+    await session.execute(statement.on_conflict_do_nothing(index_elements=list(conflict_columns)), rows)
@@ -1,6 +1,7 @@
 from datetime import datetime
 from typing import Optional
 
+from sqlalchemy import BigInteger, Index, UniqueConstraint, text
 from sqlmodel import SQLModel, Field
 
 
@@ -22,12 +23,48 @@ class Scan(SQLModel, table=True):
     id: Optional[int] = Field(default=None, primary_key=True)
     user_id: Optional[int] = Field(default=None, index=True)
     seeds_json: str
-    status: str = Field(default="pending")
+    # created -> pending (queued) -> running -> completed | failed
+    status: str = Field(default="created", index=True)
+    # Always call providers for this scan instead of serving cached results.
+    bypass_cache: bool = False
+    # Set when the last run skipped actions (provider circuit open, deadline
+    # or rate limit hit), so its items don't cover the whole plan.
+    partial: bool = False
     created_at: datetime = Field(default_factory=datetime.utcnow)
     updated_at: datetime = Field(default_factory=datetime.utcnow)
 
 
+class ScanEvent(SQLModel, table=True):
+    """A scan progress event, kept to replay to reconnecting SSE clients (see `core.scan_events`)."""
+
+    __table_args__ = (Index("ix_scanevent_scan_id_id", "scan_id", "id"),)
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    scan_id: int
+    event: str
+    data_json: str
+    created_at: datetime = Field(default_factory=datetime.utcnow, index=True)
+
+
+class ScanTrace(SQLModel, table=True):
+    """Span tree of one traced scan run (see `core.tracing`)."""
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    scan_id: int = Field(index=True)
+    trace_id: str
+    duration_ms: int
+    # [{span_id, parent_id, name, start_ns, end_ns, attributes, status}, ...]
+    spans_json: str
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+
+
 class Item(SQLModel, table=True):
+    # Keyset pagination of a scan's items (GET /scans/{scan_id}/items).
+    __table_args__ = (
+        Index("ix_item_scan_id_risk_score_id", "scan_id", text("risk_score DESC"), "id"),
+        Index("ix_item_scan_id_created_at_id", "scan_id", "created_at", "id"),
+    )
+
     id: Optional[int] = Field(default=None, primary_key=True)
     scan_id: int = Field(index=True)
     category: str
@@ -35,8 +72,13 @@ class Item(SQLModel, table=True):
     title: str
     snippet: str
     url: str
+    # Dedup keys (core.dedup): normalized URL and 64-bit title+snippet SimHash.
+    canonical_url: Optional[str] = Field(default=None, index=True)
+    simhash: Optional[int] = Field(default=None, sa_type=BigInteger)
     confidence: float = 0.0
     risk_score: float = 0.0
+    # Version of the risk weights `risk_score` was computed with (core.risk_engine).
+    scoring_version: Optional[str] = Field(default=None, index=True)
     metadata_json: str = "{}"
     created_at: datetime = Field(default_factory=datetime.utcnow)
 
@@ -48,4 +90,35 @@ class ToolCall(SQLModel, table=True):
     args_json: str
     response_json: str
     duration_ms: Optional[int] = None
+    # Set on rows holding a fresh provider response; see core.tool_cache.
+    cache_key: Optional[str] = Field(default=None, index=True)
     created_at: datetime = Field(default_factory=datetime.utcnow)
+
+
+class PseudonymMap(SQLModel, table=True):
+    """Original value behind a pseudonym token, for re-identifying LLM output.
+
+    See `core.pseudonym_map`. Tokens are deterministic (HMAC of the
+    normalized value), so a row is only needed to map them back.
+    """
+
+    __tablename__ = "pseudonym_map"
+    __table_args__ = (UniqueConstraint("scope", "token", name="uq_pseudonym_map_scope_token"),)
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    # "user:<id>" for a signed-in user's scans, otherwise "scan:<id>".
+    scope: str
+    # e.g. EMAIL_1a2b3c4d5e (without the brackets used in text)
+    token: str
+    kind: str
+    value: str
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+
+
+class JobCheckpoint(SQLModel, table=True):
+    """Progress marker for resumable batch jobs (e.g. item rescoring)."""
+
+    name: str = Field(primary_key=True)
+    cursor: int = 0
+    version: Optional[str] = None
+    updated_at: datetime = Field(default_factory=datetime.utcnow)
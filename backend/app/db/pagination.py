@@ -0,0 +1,66 @@
+import base64
+import json
+from datetime import datetime
+from typing import Any, Optional, Tuple
+
+from sqlalchemy import and_, or_
+from sqlalchemy.sql.elements import ColumnElement
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(value: Any, row_id: int) -> str:
+    """Opaque cursor for the row a page ended on: its sort value and id."""
+
+    if isinstance(value, datetime):
+        value = value.isoformat()
+    raw = json.dumps([value, row_id], separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str, is_datetime: bool = False) -> Tuple[Any, int]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        value, row_id = json.loads(raw)
+        if is_datetime:
+            value = datetime.fromisoformat(value)
+        elif not isinstance(value, (int, float)):
+            raise TypeError(value)
+        if not isinstance(row_id, int):
+            raise TypeError(row_id)
+    except (ValueError, TypeError) as exc:
+        raise InvalidCursor("Invalid cursor") from exc
+    return value, row_id
+
+
+def keyset_after(
+    column: ColumnElement, id_column: ColumnElement, value: Any, row_id: int, descending: bool, id_descending: bool
+) -> ColumnElement:
+    """Rows strictly after `(value, row_id)` in `ORDER BY column [DESC], id [DESC]`.
+
+    Written as `column <= value AND (column < value OR (column = value AND
+    id > row_id))` (directions flipped as needed) rather than a bare OR, so
+    the leading comparison is usable as an index range bound.
+    """
+
+    if descending:
+        bound, strict = column <= value, column < value
+    else:
+        bound, strict = column >= value, column > value
+    tie = id_column < row_id if id_descending else id_column > row_id
+    return and_(bound, or_(strict, and_(column == value, tie)))
+
+
+def next_cursor(rows: Any, limit: int, sort_field: str) -> Optional[str]:
+    """Cursor for the page after `rows`, or None when this was the last page.
+
+    Expects `limit + 1` rows to have been fetched; the extra row only signals
+    that more exist and is not returned to the client.
+    """
+
+    if len(rows) <= limit:
+        return None
+    last = rows[limit - 1]
+    return encode_cursor(getattr(last, sort_field), last.id)
@@ -1,8 +1,14 @@
+import asyncio
+import os
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
-from .api import auth, scans, planner, mcp, items, consent
-from .db.session import init_db
+from .api import auth, scans, planner, mcp, items, consent, metrics
+from .core import http_client
+from .core.scan_events import broker
+from .db.session import async_engine, init_db
+from .worker import run_worker
 
 
 app = FastAPI(title="PrivacyProtector API")
@@ -13,14 +19,46 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],
 )
+app.add_middleware(metrics.MetricsMiddleware)
+
+
+# Dev convenience: run scan workers inside the API process instead of (or in
+# addition to) standalone `python -m app.worker` processes.
+EMBEDDED_SCAN_WORKERS = int(os.getenv("EMBEDDED_SCAN_WORKERS", "0"))
+_worker_stop = asyncio.Event()
+_worker_task: asyncio.Task | None = None
+_listener_task: asyncio.Task | None = None
 
 
 @app.on_event("startup")
 async def on_startup() -> None:
+    global _worker_task, _listener_task
+
     # Dev-only: ensure tables exist
     init_db()
 
+    # Scan events published by workers in other processes (Postgres only).
+    _listener_task = asyncio.create_task(broker.listen())
+
+    if EMBEDDED_SCAN_WORKERS > 0:
+        _worker_stop.clear()
+        _worker_task = asyncio.create_task(run_worker(concurrency=EMBEDDED_SCAN_WORKERS, stop=_worker_stop))
+
+
+@app.on_event("shutdown")
+async def on_shutdown() -> None:
+    if _worker_task is not None:
+        _worker_stop.set()
+        await _worker_task
+    if _listener_task is not None:
+        _listener_task.cancel()
+        await asyncio.gather(_listener_task, return_exceptions=True)
+    await broker.flush()
+    await http_client.pool.aclose()
+    await async_engine.dispose()
+
 
 @app.get("/health")
 async def health_check():
@@ -34,3 +72,4 @@ app.include_router(scans.router, prefix="/scans", tags=["scans"])
 app.include_router(items.router, prefix="/items", tags=["items"])
 app.include_router(planner.router, prefix="/planner", tags=["planner"])
 app.include_router(mcp.router, prefix="/mcp", tags=["mcp"])
+app.include_router(metrics.router, tags=["metrics"])
@@ -1,7 +1,16 @@
 import os
-from typing import Dict, Any
+from typing import Dict, Any, Iterable
+
+from ..core.breach_index import get_breach_index
+
 
 async def check_breach(email: str) -> Dict[str, Any]:
+    """Look up breaches for `email` in the local breach index.
+
+    With BREACH_INDEX_PATH set, the offline index (`core.breach_index`)
+    answers; an address it doesn't know counts as not pwned.
+    """
+
     if os.getenv("MOCK_CONNECTORS", "false").lower() == "true":
         return {
             "pwned": True,
@@ -9,5 +18,26 @@ async def check_breach(email: str) -> Dict[str, Any]:
                 {"name": "MockBreach2023", "date": "2023-06-01", "details": "Mock breach details"}
             ]
         }
-    # TODO: Implement HIBP API call
-    raise NotImplementedError("HIBP check not implemented")
\ No newline at end of file
+
+    index = get_breach_index()
+    if index is None:
+        # TODO: Implement HIBP API call
+        raise NotImplementedError("HIBP check not implemented; set BREACH_INDEX_PATH")
+    breaches = index.lookup(email)
+    return {"pwned": bool(breaches), "breaches": breaches}
+
+
+async def check_breaches(emails: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+    """`check_breach` for a whole list of emails, as `{email: result}`.
+
+    The local index answers the list in one batch.
+    """
+
+    emails = list(dict.fromkeys(emails))
+    index = get_breach_index()
+    if os.getenv("MOCK_CONNECTORS", "false").lower() == "true" or index is None:
+        return {email: await check_breach(email) for email in emails}
+    return {
+        email: {"pwned": bool(breaches), "breaches": breaches}
+        for email, breaches in index.lookup_many(emails).items()
+    }
@@ -1,24 +1,38 @@
+import json
 import os
-from typing import Dict, Any
-from openai import AsyncOpenAI
+from typing import Dict, Any, Optional
+from urllib.parse import unquote
 
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from ..core.llm_client import get_openai_client
+from ..core.pseudonym_map import pseudonym_map, scope_for
 from ..core.pseudonymize import pseudonymize_identifier, pseudonymize_text
+from ..db.models import Item, Scan
+
 
+async def generate_remediation(item_id: str, tone: str = "polite", context: Optional[str] = None) -> Dict[str, Any]:
+    """Draft a removal request for an item.
+
+    `context` is the item's pseudonymized text (see `remediation_for_item`);
+    tokens in it come back in the output, for the caller to re-identify.
+    """
 
-async def generate_remediation(item_id: str, tone: str = "polite") -> Dict[str, Any]:
     if os.getenv("MOCK_CONNECTORS", "false").lower() == "true":
+        draft = f"Mock {tone} email for item {item_id}"
+        if context:
+            draft += f" regarding: {context}"
         return {
-            "draft_email": f"Mock {tone} email for item {item_id}",
+            "draft_email": draft,
             "steps": [f"Mock step 1 for {item_id}", "Mock step 2"],
             "settings_links": [f"https://example.com/settings/{item_id}"]
         }
 
     # Real implementation placeholder: use pseudonymized identifiers only
-    api_key = os.getenv("OPENAI_API_KEY")
-    if not api_key:
+    client = get_openai_client()
+    if client is None:
         raise RuntimeError("OPENAI_API_KEY is not set")
 
-    client = AsyncOpenAI(api_key=api_key)
     pseudo_item = pseudonymize_identifier(item_id)
 
     system_prompt = (
@@ -29,4 +43,27 @@ async def generate_remediation(item_id: str, tone: str = "polite") -> Dict[str,
 
     # NOTE: to keep scope focused, we still raise NotImplementedError
     # so no actual OpenAI call is made in non-mock mode yet.
-    raise NotImplementedError("Non-mock remediation generation not yet implemented")
\ No newline at end of file
+    raise NotImplementedError("Non-mock remediation generation not yet implemented")
+
+
+async def remediation_for_item(session: AsyncSession, item: Item, scan: Scan, tone: str = "polite") -> Dict[str, Any]:
+    """`generate_remediation` for a stored item, without raw PII leaving the process.
+
+    The item's text is pseudonymized through the scan's `PseudonymMap`
+    (committed before the call), and the tokens in the draft are put back
+    to the original values.
+    """
+
+    seeds = json.loads(scan.seeds_json or "{}")
+    # URLs decoded, so an escaped seed (`Alice%20Smith`) is redacted too.
+    text = " | ".join(part for part in (item.title, item.snippet, unquote(item.url or "")) if part)
+    scope = scope_for(scan)
+    context = await pseudonym_map.pseudonymize(session, scope, text, seeds)
+    await session.commit()
+
+    result = await generate_remediation(str(item.id), tone, context=context)
+    return {
+        "draft_email": await pseudonym_map.reidentify(session, scope, result["draft_email"]),
+        "steps": [await pseudonym_map.reidentify(session, scope, step) for step in result["steps"]],
+        "settings_links": result["settings_links"],
+    }
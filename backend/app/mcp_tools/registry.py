@@ -0,0 +1,250 @@
+import json
+from typing import Any, Awaitable, Callable, Dict, Iterator, List
+
+from jsonschema.protocols import Validator
+from jsonschema.validators import validator_for
+
+from ..core.image_index import IMAGE_HASH_PATTERN
+from . import (
+    check_breach,
+    generate_remediation,
+    reverse_image_search,
+    score_risk,
+    search_social,
+    search_web,
+)
+
+
+ToolFunc = Callable[..., Awaitable[Any]]
+
+
+def _compile(schema: Dict[str, Any]) -> Validator:
+    """Check `schema` once and build a reusable validator for it."""
+
+    cls = validator_for(schema)
+    cls.check_schema(schema)
+    return cls(schema)
+
+
+class ToolSpec:
+    """One MCP tool: its implementation, schemas and compiled validators.
+
+    `func` is called as `await func(**args)` with the validated args, so
+    input schemas list every parameter and reject unknown ones.
+    Connector tools (external providers) are dispatched through the result
+    cache and in-flight coalescing in `core.tool_dispatch`.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        func: ToolFunc,
+        input_schema: Dict[str, Any],
+        output_schema: Dict[str, Any],
+        connector: bool = False,
+    ) -> None:
+        self.name = name
+        self.func = func
+        self.input_schema = input_schema
+        self.output_schema = output_schema
+        self.connector = connector
+        self.input_validator = _compile(input_schema)
+        self.output_validator = _compile(output_schema)
+
+
+class ToolRegistry:
+    def __init__(self) -> None:
+        self._tools: Dict[str, ToolSpec] = {}
+        self._listing: bytes = b""
+
+    def register(
+        self,
+        name: str,
+        func: ToolFunc,
+        input_schema: Dict[str, Any],
+        output_schema: Dict[str, Any],
+        connector: bool = False,
+    ) -> ToolSpec:
+        if name in self._tools:
+            raise ValueError(f"Tool already registered: {name}")
+        spec = ToolSpec(name, func, input_schema, output_schema, connector)
+        self._tools[name] = spec
+        self._listing = json.dumps(
+            {
+                "tools": [
+                    {"name": t.name, "input_schema": t.input_schema, "output_schema": t.output_schema}
+                    for t in self._tools.values()
+                ]
+            }
+        ).encode("utf-8")
+        return spec
+
+    def get(self, name: str) -> ToolSpec | None:
+        return self._tools.get(name)
+
+    def __iter__(self) -> Iterator[ToolSpec]:
+        return iter(self._tools.values())
+
+    def __contains__(self, name: object) -> bool:
+        return name in self._tools
+
+    @property
+    def listing(self) -> bytes:
+        """`GET /mcp/tools` body, serialized once per registration."""
+
+        return self._listing
+
+    def connectors(self) -> Dict[str, ToolFunc]:
+        return {spec.name: spec.func for spec in self if spec.connector}
+
+
+registry = ToolRegistry()
+
+
+def _array_of(properties: Dict[str, Any], required: List[str]) -> Dict[str, Any]:
+    return {
+        "type": "array",
+        "items": {"type": "object", "properties": properties, "required": required},
+    }
+
+
+registry.register(
+    "searchWeb",
+    search_web.search_web,
+    input_schema={
+        "type": "object",
+        "properties": {
+            "query": {"type": "string"},
+            "limit": {"type": "integer"},
+        },
+        "required": ["query"],
+        "additionalProperties": False,
+    },
+    output_schema=_array_of(
+        {
+            "title": {"type": "string"},
+            "snippet": {"type": "string"},
+            "url": {"type": "string"},
+            "date": {"type": "string"},
+        },
+        ["title", "snippet", "url"],
+    ),
+    connector=True,
+)
+
+registry.register(
+    "reverseImageSearch",
+    reverse_image_search.reverse_image_search,
+    input_schema={
+        "type": "object",
+        "properties": {
+            "image_hash": {"type": "string", "pattern": IMAGE_HASH_PATTERN},
+        },
+        "required": ["image_hash"],
+        "additionalProperties": False,
+    },
+    output_schema=_array_of(
+        {
+            "url": {"type": "string"},
+            "similarity": {"type": "number"},
+            "context": {"type": "string"},
+        },
+        ["url", "similarity"],
+    ),
+    connector=True,
+)
+
+registry.register(
+    "searchSocial",
+    search_social.search_social,
+    input_schema={
+        "type": "object",
+        "properties": {
+            "service": {"type": "string"},
+            "query": {"type": "string"},
+            "limit": {"type": "integer"},
+        },
+        "required": ["service", "query"],
+        "additionalProperties": False,
+    },
+    output_schema=_array_of(
+        {
+            "id": {"type": "string"},
+            "text": {"type": "string"},
+            "url": {"type": "string"},
+            "timestamp": {"type": "string"},
+            "meta": {"type": "object"},
+        },
+        ["id", "text", "url"],
+    ),
+    connector=True,
+)
+
+registry.register(
+    "checkBreach",
+    check_breach.check_breach,
+    input_schema={
+        "type": "object",
+        "properties": {"email": {"type": "string"}},
+        "required": ["email"],
+        "additionalProperties": False,
+    },
+    output_schema={
+        "type": "object",
+        "properties": {
+            "pwned": {"type": "boolean"},
+            "breaches": {"type": "array"},
+        },
+        "required": ["pwned", "breaches"],
+    },
+    connector=True,
+)
+
+registry.register(
+    "scoreRisk",
+    score_risk.score_risk,
+    input_schema={
+        "type": "object",
+        "properties": {"items": {"type": "array", "items": {"type": "object"}}},
+        "required": ["items"],
+        "additionalProperties": False,
+    },
+    output_schema=_array_of(
+        {
+            # The input item's `id` as given (absent: null).
+            "item_id": {"type": ["string", "integer", "null"]},
+            "risk_score": {"type": "number"},
+            "category": {"type": "string"},
+            "explanation": {"type": "string"},
+        },
+        ["item_id", "risk_score", "category"],
+    ),
+)
+
+registry.register(
+    "generateRemediation",
+    generate_remediation.generate_remediation,
+    input_schema={
+        "type": "object",
+        "properties": {
+            "item_id": {"type": "string"},
+            "tone": {"type": "string"},
+            # Pseudonymized item text; never raw PII.
+            "context": {"type": "string"},
+        },
+        "required": ["item_id"],
+        "additionalProperties": False,
+    },
+    output_schema={
+        "type": "object",
+        "properties": {
+            "draft_email": {"type": "string"},
+            "steps": {"type": "array", "items": {"type": "string"}},
+            "settings_links": {
+                "type": "array",
+                "items": {"type": "string"},
+            },
+        },
+        "required": ["draft_email", "steps", "settings_links"],
+    },
+)
@@ -1,13 +1,18 @@
 import os
 from typing import List, Dict, Any
 
+from ..core.image_index import IMAGE_INDEX_MAX_DISTANCE, IMAGE_INDEX_MAX_RESULTS, get_index, parse_hash, similarity
+
 
 async def reverse_image_search(image_hash: str) -> List[Dict[str, Any]]:
-    """Mock reverse image search.
+    """Reverse image search over the local perceptual-hash index.
 
     In MOCK_CONNECTORS mode, returns deterministic fake matches for the given
-    image_hash. Later this can be wired to a real API like Bing Visual Search
-    or TinEye. This performs image-level matching, *not* face recognition.
+    image_hash. Otherwise returns the indexed images (see `core.image_index`)
+    whose 64-bit hash is within IMAGE_INDEX_MAX_DISTANCE bits of it, most
+    similar first; a hash that isn't a 64-bit perceptual hash (e.g. a SHA-256
+    of the file) matches nothing. This performs image-level matching, *not*
+    face recognition.
     """
 
     if os.getenv("MOCK_CONNECTORS", "false").lower() == "true":
@@ -19,5 +24,21 @@ async def reverse_image_search(image_hash: str) -> List[Dict[str, Any]]:
             }
         ]
 
-    # TODO: Implement real reverse image search API integration.
-    raise NotImplementedError("reverse_image_search not implemented for real mode")
+    index = get_index()
+    if index is None:
+        raise RuntimeError("IMAGE_INDEX_PATH is not set")
+    try:
+        query = parse_hash(image_hash)
+    except ValueError:
+        return []
+    results = []
+    for entry_id, distance in index.search(query, IMAGE_INDEX_MAX_DISTANCE, IMAGE_INDEX_MAX_RESULTS):
+        record = index.record(entry_id)
+        results.append(
+            {
+                "url": record.get("url", ""),
+                "similarity": similarity(distance),
+                "context": record.get("context", ""),
+            }
+        )
+    return results
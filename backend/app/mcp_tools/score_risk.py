@@ -1,22 +1,21 @@
 from typing import List, Dict, Any
 
+from ..core.risk_engine import engine
+
+
 async def score_risk(items: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
-    results = []
-    for item in items:
-        category = item.get("category", "unknown")
-        confidence = item.get("confidence", 0.5)
-        base_weights = {
-            "breach": 0.40,
-            "github_profile": 0.25,
-            "web_result": 0.20,
-            "image_match": 0.15,
-            "unknown": 0.10
-        }
-        risk_score = base_weights.get(category, 0.10) * confidence
-        results.append({
+    """Score items as one columnar batch (see `core.risk_engine`)."""
+
+    categories = [item.get("category", "unknown") for item in items]
+    confidences = [item.get("confidence", 0.5) for item in items]
+    batch = engine.score_batch(categories, confidences)
+    scores = batch.scores.tolist()
+    return [
+        {
             "item_id": item.get("id"),
-            "risk_score": risk_score,
-            "category": category,
-            "explanation": f"Category {category} with confidence {confidence}"
-        })
-    return results
\ No newline at end of file
+            "risk_score": scores[i],
+            "category": categories[i],
+            "explanation": batch.explanation(i),
+        }
+        for i, item in enumerate(items)
+    ]
\ No newline at end of file
@@ -3,6 +3,12 @@ from typing import List, Dict, Any
 
 import httpx
 
+from ..core.http_client import get_http_client
+from ..core.rate_limit import limiter
+
+
+SERPER_BASE_URL = "https://google.serper.dev"
+
 
 async def search_web(query: str, limit: int = 10) -> List[Dict[str, Any]]:
     """Search the web using Serper.dev (Google Search JSON API).
@@ -36,22 +42,20 @@ async def search_web(query: str, limit: int = 10) -> List[Dict[str, Any]]:
         "num": limit,
     }
 
+    # Provider errors (timeouts, 5xx, throttling) propagate: a scan marks
+    # the action as skipped and the breaker counts them, instead of fake
+    # results being returned and cached.
+    client = get_http_client(SERPER_BASE_URL)
+    resp = await limiter.request(
+        "serper",
+        lambda: client.post("/search", headers=headers, json=payload),
+        api_key=serper_key,
+    )
+    resp.raise_for_status()
     try:
-        async with httpx.AsyncClient(timeout=10.0) as client:
-            resp = await client.post("https://google.serper.dev/search", headers=headers, json=payload)
-            resp.raise_for_status()
-            data = resp.json()
-    except Exception:
-        # On any error, degrade gracefully to a single mock result so the
-        # agent experience doesn't break completely.
-        return [
-            {
-                "title": f"Mock result for {query}",
-                "snippet": f"This is a mock snippet about {query}",
-                "url": f"https://example.com/mock/{query.replace(' ', '%20')}",
-                "date": "2024-01-01",
-            }
-        ]
+        data = resp.json()
+    except ValueError as exc:
+        raise httpx.DecodingError("Serper returned invalid JSON", request=resp.request) from exc
 
     organic = data.get("organic", []) or []
     results: List[Dict[str, Any]] = []
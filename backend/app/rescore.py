@@ -0,0 +1,47 @@
+"""Rescore stored items after a risk-weights change.
+
+Safe to run while the API and workers are live, and safe to interrupt:
+rerunning continues from the last committed chunk.
+
+    python -m app.rescore --chunk-size 5000 --pause-ratio 1.0
+"""
+
+import argparse
+import json
+import logging
+
+from .core.rescoring import rescore_stale_items
+from .core.risk_engine import engine as risk_engine
+from .db.session import engine, init_db
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Rescore items whose scoring_version is stale.")
+    parser.add_argument("--chunk-size", type=int, default=5000)
+    parser.add_argument(
+        "--pause-ratio",
+        type=float,
+        default=1.0,
+        help="sleep this many times each chunk's duration between chunks (throttling)",
+    )
+    parser.add_argument("--min-pause", type=float, default=0.0, help="minimum seconds between chunks")
+    parser.add_argument("--max-chunks", type=int, default=None, help="stop after this many chunks")
+    parser.add_argument("--restart", action="store_true", help="ignore the checkpoint and sweep from the start")
+    opts = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    init_db()
+    stats = rescore_stale_items(
+        engine,
+        risk_engine,
+        chunk_size=opts.chunk_size,
+        pause_ratio=opts.pause_ratio,
+        min_pause_seconds=opts.min_pause,
+        max_chunks=opts.max_chunks,
+        restart=opts.restart,
+    )
+    print(json.dumps(stats))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+"""Standalone scan worker.
+
+Pulls pending scans from the DB-backed queue (see `core.job_queue`) and runs
+up to N of them concurrently. Run one or more of these next to the API:
+
+    python -m app.worker --concurrency 8
+
+Set WORKER_METRICS_PORT to serve this worker's metrics (tool, provider and
+scan latencies; Prometheus text format) for scraping.
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import signal
+from typing import Optional, Set
+
+from .api import metrics as _api_metrics  # noqa: F401  (registers scrape-time collectors)
+from .db.session import async_engine, async_session, init_db
+from .core import http_client, job_queue, metrics
+from .core.scan_events import broker, prune_events
+from .core.scan_runner import run_scan_once
+
+
+logger = logging.getLogger(__name__)
+
+SCAN_WORKER_CONCURRENCY = int(os.getenv("SCAN_WORKER_CONCURRENCY", "4"))
+SCAN_WORKER_POLL_SECONDS = float(os.getenv("SCAN_WORKER_POLL_SECONDS", "1.0"))
+# 0 = don't serve metrics from standalone workers.
+WORKER_METRICS_PORT = int(os.getenv("WORKER_METRICS_PORT", "0"))
+# How often a worker looks for scans abandoned by crashed workers.
+_STALE_CHECK_SECONDS = 60.0
+
+
+# Back-off after a failed queue poll (e.g. the DB is briefly unreachable).
+_CLAIM_ERROR_BACKOFF_SECONDS = 5.0
+
+
+async def _heartbeat(scan_id: int, interval: float) -> None:
+    """Renew the scan's lease until cancelled, so long scans aren't requeued."""
+
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            async with async_session() as session:
+                await job_queue.renew_lease(session, scan_id)
+        except Exception:
+            logger.exception("Could not renew the lease of scan %s", scan_id)
+
+
+async def _run_claimed_scan(scan_id: int) -> None:
+    heartbeat = asyncio.create_task(_heartbeat(scan_id, job_queue.SCAN_HEARTBEAT_SECONDS))
+    try:
+        async with async_session() as session:
+            try:
+                await run_scan_once(scan_id=scan_id, session=session)
+            except Exception:
+                logger.exception("Scan %s failed", scan_id)
+                await session.rollback()
+                await job_queue.mark_scan_failed(session, scan_id)
+                broker.publish(scan_id, "status", {"status": job_queue.STATUS_FAILED})
+    finally:
+        heartbeat.cancel()
+        await asyncio.gather(heartbeat, return_exceptions=True)
+
+
+async def run_worker(
+    concurrency: int = SCAN_WORKER_CONCURRENCY,
+    poll_interval: float = SCAN_WORKER_POLL_SECONDS,
+    stop: Optional[asyncio.Event] = None,
+) -> None:
+    """Claim and run scans until `stop` is set, then drain in-flight scans."""
+
+    stop = stop or asyncio.Event()
+    slots = asyncio.Semaphore(max(1, concurrency))
+    in_flight: Set[asyncio.Task] = set()
+    loop = asyncio.get_running_loop()
+    next_stale_check = 0.0
+
+    while not stop.is_set():
+        await slots.acquire()
+
+        wait = poll_interval
+        try:
+            if loop.time() >= next_stale_check:
+                async with async_session() as session:
+                    requeued = await job_queue.requeue_stale_scans(session)
+                    await prune_events(session)
+                if requeued:
+                    logger.warning("Requeued %d stale scan(s)", requeued)
+                next_stale_check = loop.time() + _STALE_CHECK_SECONDS
+
+            async with async_session() as session:
+                scan_id = await job_queue.claim_next_scan(session)
+        except Exception:
+            logger.exception("Could not poll the scan queue; retrying in %.1fs", _CLAIM_ERROR_BACKOFF_SECONDS)
+            scan_id, wait = None, max(poll_interval, _CLAIM_ERROR_BACKOFF_SECONDS)
+
+        if scan_id is None:
+            slots.release()
+            try:
+                await asyncio.wait_for(stop.wait(), timeout=wait)
+            except asyncio.TimeoutError:
+                pass
+            continue
+
+        task = asyncio.create_task(_run_claimed_scan(scan_id))
+        in_flight.add(task)
+        task.add_done_callback(in_flight.discard)
+        task.add_done_callback(lambda _: slots.release())
+
+    if in_flight:
+        await asyncio.gather(*in_flight, return_exceptions=True)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Run the scan worker.")
+    parser.add_argument("--concurrency", type=int, default=SCAN_WORKER_CONCURRENCY)
+    parser.add_argument("--poll-interval", type=float, default=SCAN_WORKER_POLL_SECONDS)
+    opts = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    init_db()
+
+    async def _main() -> None:
+        stop = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(sig, stop.set)
+        metrics_server = await metrics.serve("0.0.0.0", WORKER_METRICS_PORT) if WORKER_METRICS_PORT else None
+        try:
+            await run_worker(opts.concurrency, opts.poll_interval, stop)
+        finally:
+            if metrics_server is not None:
+                metrics_server.close()
+            await broker.flush()
+            await http_client.pool.aclose()
+            await async_engine.dispose()
+
+    asyncio.run(_main())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,210 @@
+"""API throughput and tail latency under concurrency: sync vs async DB sessions.
+
+    cd backend && python -m benchmarks.bench_api_load --concurrency 50 --seconds 10
+
+Serves the app with uvicorn (one worker process) and hammers `GET /scans/{id}`
+and `GET /scans/{id}/items` with concurrent clients. The "sync" rows hit
+copies of those handlers mounted under /legacy that use a blocking
+`Session` inside `async def`, as the routers did before; the "async" rows
+hit the real routes.
+
+SQLite answers in microseconds, which hides what a blocking driver costs.
+`--db-latency-ms` adds a simulated round trip to every statement, spent in
+the driver's own thread: the event loop thread for the sync driver (as with
+psycopg2), aiosqlite's worker thread for the async one (as with asyncpg).
+Set DATABASE_URL to a scratch Postgres (and --db-latency-ms 0) to measure
+real drivers.
+"""
+
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import socket
+import statistics
+import tempfile
+import time
+from typing import Any, Dict, List, Tuple
+
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{tempfile.mkdtemp()}/bench.db")
+
+import httpx  # noqa: E402
+import uvicorn  # noqa: E402
+from fastapi import APIRouter, HTTPException  # noqa: E402
+from sqlalchemy import event, insert  # noqa: E402
+from sqlmodel import Session, select  # noqa: E402
+
+from app.core.scan_events import ITEM_LIST_FIELDS, item_payload  # noqa: E402
+from app.db.models import Item, Scan  # noqa: E402
+from app.db.session import async_engine, engine, init_db  # noqa: E402
+from app.main import app  # noqa: E402
+
+
+legacy = APIRouter()
+
+
+@legacy.get("/scans/{scan_id}")
+async def legacy_get_scan(scan_id: int) -> Dict[str, Any]:
+    with Session(engine) as session:
+        scan = session.exec(select(Scan).where(Scan.id == scan_id)).first()
+        if not scan:
+            raise HTTPException(status_code=404, detail="Scan not found")
+        return {"scan_id": scan.id, "status": scan.status, "seeds_json": scan.seeds_json}
+
+
+@legacy.get("/scans/{scan_id}/items")
+async def legacy_list_items(scan_id: int, limit: int = 100) -> List[Dict[str, Any]]:
+    with Session(engine) as session:
+        statement = (
+            select(*(getattr(Item, field) for field in ITEM_LIST_FIELDS))
+            .where(Item.scan_id == scan_id)
+            .order_by(Item.created_at, Item.id)
+            .limit(limit + 1)
+        )
+        return [item_payload(row) for row in session.exec(statement).all()[:limit]]
+
+
+app.include_router(legacy, prefix="/legacy")
+
+
+def _simulate_latency(latency_ms: float) -> None:
+    """Sleep `latency_ms` inside the SQLite driver before every statement."""
+
+    def _sleep() -> int:
+        time.sleep(latency_ms / 1000)
+        return 0
+
+    def _on_connect(dbapi_connection: Any, _: Any) -> None:
+        dbapi_connection.create_function("bench_round_trip", 0, _sleep)
+
+    def _before_execute(conn: Any, cursor: Any, *_: Any) -> None:
+        cursor.execute("SELECT bench_round_trip()")
+
+    for target in (engine, async_engine.sync_engine):
+        event.listen(target, "connect", _on_connect)
+        event.listen(target, "before_cursor_execute", _before_execute)
+
+
+def _populate(items: int) -> int:
+    init_db()
+    with Session(engine) as session:
+        scan = Scan(seeds_json="{}", status="completed")
+        session.add(scan)
+        session.commit()
+        scan_id: int = scan.id  # type: ignore[assignment]
+        session.execute(
+            insert(Item.__table__),  # type: ignore[attr-defined]
+            [
+                {
+                    "scan_id": scan_id,
+                    "category": "web_result",
+                    "source": "web",
+                    "title": f"Result {i}",
+                    "snippet": f"Snippet {i}",
+                    "url": f"https://example.com/{i}",
+                    "confidence": 0.7,
+                    "risk_score": 0.14,
+                    "metadata_json": "{}",
+                }
+                for i in range(items)
+            ],
+        )
+        session.commit()
+    return scan_id
+
+
+def _run_server(port: int) -> None:
+    # Connections opened by the parent must not be shared with the child.
+    engine.dispose(close=False)
+    uvicorn.run(app, host="127.0.0.1", port=port, log_level="warning")
+
+
+def _serve() -> Tuple[str, multiprocessing.Process]:
+    """Run the API in a forked process, so the load generator doesn't share its GIL."""
+
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    server = multiprocessing.get_context("fork").Process(target=_run_server, args=(port,), daemon=True)
+    server.start()
+    deadline = time.monotonic() + 30
+    while True:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=1).close()
+            return f"http://127.0.0.1:{port}", server
+        except OSError:
+            if not server.is_alive() or time.monotonic() > deadline:
+                raise RuntimeError("API server failed to start")
+            time.sleep(0.05)
+
+
+async def _load(base_url: str, path: str, concurrency: int, seconds: float) -> Dict[str, Any]:
+    latencies: List[float] = []
+    errors = 0
+    deadline = time.perf_counter() + seconds
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60) as client:
+
+        async def _client() -> None:
+            nonlocal errors
+            while time.perf_counter() < deadline:
+                started = time.perf_counter()
+                resp = await client.get(path)
+                if resp.status_code != 200:
+                    errors += 1
+                latencies.append((time.perf_counter() - started) * 1000)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(_client() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "requests_per_sec": round(len(latencies) / elapsed, 1),
+        "p50_ms": round(statistics.median(latencies), 2),
+        "p99_ms": round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))], 2),
+        "errors": errors,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--seconds", type=float, default=10.0)
+    parser.add_argument("--items", type=int, default=1000)
+    parser.add_argument("--db-latency-ms", type=float, default=2.0)
+    opts = parser.parse_args()
+
+    if opts.db_latency_ms > 0 and engine.dialect.name == "sqlite":
+        _simulate_latency(opts.db_latency_ms)
+    scan_id = _populate(opts.items)
+    base_url, server = _serve()
+
+    results = []
+    try:
+        for endpoint in (f"/scans/{scan_id}/items", f"/scans/{scan_id}"):
+            for mode, prefix in (("sync", "/legacy"), ("async", "")):
+                # Warm-up (connection pools, driver threads); not recorded.
+                asyncio.run(_load(base_url, prefix + endpoint, opts.concurrency, 1.0))
+                stats = asyncio.run(_load(base_url, prefix + endpoint, opts.concurrency, opts.seconds))
+                results.append({"endpoint": endpoint, "session": mode, **stats})
+    finally:
+        server.terminate()
+
+    print(
+        json.dumps(
+            {
+                "backend": engine.dialect.name,
+                "concurrency": opts.concurrency,
+                "db_latency_ms": opts.db_latency_ms if engine.dialect.name == "sqlite" else None,
+                "results": results,
+            },
+            indent=2,
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
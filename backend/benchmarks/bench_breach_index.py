@@ -0,0 +1,112 @@
+"""Offline breach index: lookup latency, Bloom filter and bulk throughput.
+
+    cd backend && python -m benchmarks.bench_breach_index --emails 10000000
+
+Ingests `--emails` synthetic addresses spread over `--breaches` breaches
+(some addresses in several) into a temporary index (or `--path`), then
+times lookups of breached addresses (`hit`) and unknown ones (`miss`,
+mostly answered by the Bloom filter). `miss_no_bloom` is the same misses
+going straight to the prefix bucket, and `full_binary_search` a binary
+search over the whole records file without the prefix table. `bulk`
+looks up a `--bulk` list (half breached) with `lookup_many`.
+"""
+
+import argparse
+import json
+import random
+import tempfile
+import time
+from typing import Any, Callable, Dict, Iterator, List
+
+import numpy as np
+
+from app.core.breach_index import BreachIndex, email_digest
+
+
+def _email(i: int) -> str:
+    return f"member{i}@mail{i % 97}.example.com"
+
+
+def _dump(start: int, stop: int) -> Iterator[str]:
+    return (_email(i) for i in range(start, stop))
+
+
+def _percentiles(fn: Callable[[Any], Any], args: List[Any]) -> Dict[str, float]:
+    timings = []
+    for arg in args:
+        started = time.perf_counter()
+        fn(arg)
+        timings.append((time.perf_counter() - started) * 1_000_000)
+    return {
+        "p50_us": round(float(np.percentile(timings, 50)), 1),
+        "p99_us": round(float(np.percentile(timings, 99)), 1),
+    }
+
+
+def _rss_mb() -> float:
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[1]) * 4096 / (1024 * 1024)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--emails", type=int, default=10_000_000)
+    parser.add_argument("--breaches", type=int, default=4)
+    parser.add_argument("--queries", type=int, default=10_000)
+    parser.add_argument("--bulk", type=int, default=100_000)
+    parser.add_argument("--path", help="index directory (default: a temporary one)")
+    parser.add_argument("--seed", type=int, default=0)
+    opts = parser.parse_args()
+    rng = random.Random(opts.seed)
+    path = opts.path or tempfile.mkdtemp()
+
+    # Consecutive breaches overlap by 10% of a breach's size.
+    size = opts.emails // opts.breaches
+    ingest = []
+    for b in range(opts.breaches):
+        start = max(0, b * size - size // 10)
+        started = time.perf_counter()
+        stats = BreachIndex(path).ingest(
+            {"name": f"Breach{b}", "date": "2024-01-01", "details": "", "url": "", "data_classes": ["Email addresses"]},
+            _dump(start, (b + 1) * size),
+        )
+        ingest.append({"breach": b, "seconds": round(time.perf_counter() - started, 1), **stats})
+
+    rss_before = _rss_mb()
+    started = time.perf_counter()
+    index = BreachIndex(path)
+    open_ms = (time.perf_counter() - started) * 1000
+    resident_mb = _rss_mb() - rss_before
+    hits = [_email(rng.randrange(opts.breaches * size)) for _ in range(opts.queries)]
+    misses = [f"nobody{i}@example.org" for i in range(opts.queries)]
+    hashes = index._records["hash"]
+
+    false_positives = sum(index._may_contain_one(email_digest(e)) for e in misses)
+    results: Dict[str, Any] = {
+        "records": len(index),
+        "ingest": ingest,
+        "open_ms": round(open_ms, 2),
+        "resident_mb_after_open": round(resident_mb, 1),
+        "hit": _percentiles(index.lookup, hits),
+        "miss": _percentiles(index.lookup, misses),
+        "miss_no_bloom": _percentiles(lambda e: index._breach_ids(email_digest(e)), misses),
+        "full_binary_search": _percentiles(lambda e: np.searchsorted(hashes, email_digest(e)), hits),
+        "bloom_false_positive_rate": round(false_positives / len(misses), 4),
+    }
+
+    bulk = [_email(rng.randrange(opts.breaches * size)) for _ in range(opts.bulk // 2)]
+    bulk += [f"nobody{i}@example.net" for i in range(opts.bulk - len(bulk))]
+    started = time.perf_counter()
+    found = index.lookup_many(bulk)
+    seconds = time.perf_counter() - started
+    results["bulk"] = {
+        "emails": len(found),
+        "pwned": sum(bool(b) for b in found.values()),
+        "seconds": round(seconds, 3),
+        "emails_per_s": round(len(found) / seconds),
+    }
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""Scan result dedup: fingerprinting and merge throughput, plus a behaviour check.
+
+    cd backend && python -m benchmarks.bench_dedup --sizes 1000 100000
+
+Rows are synthetic connector output where about a third repeat an earlier
+result: the same page under a tracking-parameter/`www.` variant of its URL
+from another connector (web vs social), or the same snippet reworded by
+punctuation. Before timing, `_check` asserts the cases the merge must get
+right: a page found by searchWeb and searchSocial is one item, and HIBP
+breaches that share a page (told apart by the fragment) stay separate.
+"""
+
+import argparse
+import copy
+import json
+import random
+import time
+from typing import Any, Dict, List
+
+from app.core.dedup import fingerprint_rows, merge_duplicates
+
+
+_WORDS = (
+    "profile posted account public photo comment thread review forum member "
+    "since joined location works company about contact page archive results"
+).split()
+
+
+def _row(category: str, source: str, url: str, title: str, snippet: str) -> Dict[str, Any]:
+    return dict(
+        category=category, source=source, url=url, title=title, snippet=snippet, confidence=0.5, metadata_json="{}"
+    )
+
+
+def _merged(rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    fingerprint_rows(rows)
+    return merge_duplicates(rows)
+
+
+def _check() -> None:
+    web = _row("web_result", "web", "https://www.example.com/u/jane?utm_source=serp", "Jane Doe", "profile")
+    social = _row("social_post", "reddit", "https://example.com/u/jane/", "jane", "post")
+    kept = _merged([web, social])
+    assert len(kept) == 1, kept
+    assert len(json.loads(kept[0]["metadata_json"])["provenance"]) == 2, kept
+
+    breaches = [
+        _row("breach", "hibp", f"https://haveibeenpwned.com/PwnedWebsites#{name}", name, "Breach")
+        for name in ("Adobe", "LinkedIn", "Dropbox")
+    ]
+    assert len(_merged(breaches)) == 3, breaches
+
+
+def _rows(n: int) -> List[Dict[str, Any]]:
+    rng = random.Random(0)
+    rows: List[Dict[str, Any]] = []
+    for i in range(n):
+        if rows and rng.random() < 0.33:
+            original = rows[rng.randrange(len(rows))]
+            if rng.random() < 0.5:
+                url = original["url"].replace("https://", "https://www.") + "?utm_source=x"
+                rows.append(_row("social_post", "reddit", url, "post", "short"))
+            else:
+                snippet = original["snippet"].replace(" ", ", ", 1) + "."
+                rows.append(_row("web_result", "web", f"https://mirror{i}.example.org/", original["title"], snippet))
+            continue
+        snippet = " ".join(rng.choice(_WORDS) for _ in range(20))
+        rows.append(_row("web_result", "web", f"https://site{i}.example.com/p/{i}", f"Result {i}", snippet))
+    return rows
+
+
+def _bench(n: int) -> Dict[str, Any]:
+    rows = _rows(n)
+    fingerprinted = copy.deepcopy(rows)
+
+    started = time.perf_counter()
+    fingerprint_rows(fingerprinted)
+    fingerprint_seconds = time.perf_counter() - started
+
+    started = time.perf_counter()
+    kept = merge_duplicates(fingerprinted)
+    merge_seconds = time.perf_counter() - started
+    return {
+        "rows": n,
+        "kept": len(kept),
+        "fingerprint_rows_per_sec": round(n / fingerprint_seconds),
+        "merge_rows_per_sec": round(n / merge_seconds),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 100_000])
+    opts = parser.parse_args()
+    _check()
+    print(json.dumps([_bench(n) for n in opts.sizes], indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,399 @@
+"""End-to-end load benchmark: replay the e2e scenarios through the HTTP API.
+
+    cd backend && python -m benchmarks.bench_e2e --scans 200 --concurrency 20
+    cd backend && python -m benchmarks.bench_e2e --output before.json
+    cd backend && python -m benchmarks.bench_e2e --baseline before.json
+
+Serves the app with uvicorn (one process, embedded scan workers) and runs
+`--concurrency` virtual users. Each takes the next seed set from
+`e2e-tests/scenarios/*.json` and goes create -> run -> poll status ->
+list all items, like the frontend does.
+
+Connectors run in mock mode behind stubs with lognormal latency
+(`--latency-ms`, per tool with `--tool-latency searchWeb=80,...`) and
+injected `httpx.ConnectError`s (`--error-rate`, `--tool-error-rate`), so
+scans see provider failures, partial results and circuit breaking.
+Scans bypass the tool result cache unless `--cache` is given (the scenarios
+repeat, so every call would otherwise be a cache hit).
+
+Reports scans/sec, p50/p95/p99 per endpoint, per tool (as seen by the scan
+runner, including cache hits) and for whole scans, plus DB statements
+per scan run. With `--baseline`, metrics more than `--tolerance` worse than
+the baseline are listed and the exit status is 1.
+
+Uses a temporary SQLite DB unless DATABASE_URL is set (e.g. to a scratch
+Postgres).
+"""
+
+import argparse
+import asyncio
+import contextvars
+import json
+import multiprocessing
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{tempfile.mkdtemp()}/bench.db")
+os.environ.setdefault("MOCK_CONNECTORS", "true")
+os.environ.setdefault("SCAN_WORKER_POLL_SECONDS", "0.05")
+
+import httpx  # noqa: E402
+import uvicorn  # noqa: E402
+from fastapi import APIRouter  # noqa: E402
+from sqlalchemy import event  # noqa: E402
+
+from app import main as app_main  # noqa: E402
+from app import worker  # noqa: E402
+from app.core import scan_runner, tool_dispatch  # noqa: E402
+from app.db.session import async_engine, engine  # noqa: E402
+from app.main import app  # noqa: E402
+
+
+SCENARIOS_DIR = Path(__file__).resolve().parents[2] / "e2e-tests" / "scenarios"
+
+_TERMINAL_STATUSES = ("completed", "failed")
+
+
+# --- server side (runs in the forked API process) ---------------------------
+
+_current_scan: contextvars.ContextVar[Optional[int]] = contextvars.ContextVar("bench_scan", default=None)
+_server: Dict[str, Any] = {}
+
+
+def _reset_server_stats() -> None:
+    _server.update(statements=0, scan_statements={}, tools={})
+
+
+bench = APIRouter()
+
+
+@bench.get("/stats")
+async def bench_stats() -> Dict[str, Any]:
+    return _server
+
+
+@bench.post("/reset")
+async def bench_reset() -> Dict[str, Any]:
+    _reset_server_stats()
+    return {}
+
+
+app.include_router(bench, prefix="/bench")
+
+
+def _parse_map(raw: str) -> Dict[str, float]:
+    values: Dict[str, float] = {}
+    for part in raw.split(","):
+        if "=" in part:
+            name, value = part.split("=", 1)
+            values[name.strip()] = float(value)
+    return values
+
+
+def _stub_connectors(opts: argparse.Namespace) -> None:
+    """Put injected latency and failures in front of the mock connectors."""
+
+    latency = _parse_map(opts.tool_latency)
+    error_rate = _parse_map(opts.tool_error_rate)
+
+    def _stub(tool: str, connector: Any) -> Any:
+        median_ms = latency.get(tool, opts.latency_ms)
+        failures = error_rate.get(tool, opts.error_rate)
+
+        async def _call(**kwargs: Any) -> Any:
+            await asyncio.sleep(random.lognormvariate(0, 0.3) * median_ms / 1000)
+            if random.random() < failures:
+                raise httpx.ConnectError(f"injected {tool} failure")
+            return await connector(**kwargs)
+
+        return _call
+
+    for tool, connector in list(tool_dispatch.CONNECTOR_TOOLS.items()):
+        tool_dispatch.CONNECTOR_TOOLS[tool] = _stub(tool, connector)
+
+
+def _instrument() -> None:
+    """Count DB statements (overall and per scan run) and time tool calls."""
+
+    def _count(*_: Any) -> None:
+        _server["statements"] += 1
+        scan_id = _current_scan.get()
+        if scan_id is not None:
+            per_scan = _server["scan_statements"]
+            per_scan[scan_id] = per_scan.get(scan_id, 0) + 1
+
+    for target in (engine, async_engine.sync_engine):
+        event.listen(target, "before_cursor_execute", _count)
+
+    run_scan_once = worker.run_scan_once
+
+    async def _counted_run(scan_id: int, session: Any) -> Dict[str, Any]:
+        _current_scan.set(scan_id)
+        return await run_scan_once(scan_id=scan_id, session=session)
+
+    worker.run_scan_once = _counted_run
+
+    call_connector = scan_runner.call_connector
+
+    async def _timed_call(tool: str, args: Dict[str, Any], **kwargs: Any) -> Any:
+        started = time.perf_counter()
+        ok = False
+        try:
+            result = await call_connector(tool, args, **kwargs)
+            ok = True
+            return result
+        finally:
+            _server["tools"].setdefault(tool, []).append([(time.perf_counter() - started) * 1000, ok])
+
+    scan_runner.call_connector = _timed_call
+
+
+def _run_server(port: int) -> None:
+    # Connections opened by the parent must not be shared with the child.
+    engine.dispose(close=False)
+    uvicorn.run(app, host="127.0.0.1", port=port, log_level="warning")
+
+
+def _serve() -> Tuple[str, multiprocessing.Process]:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    server = multiprocessing.get_context("fork").Process(target=_run_server, args=(port,), daemon=True)
+    server.start()
+    deadline = time.monotonic() + 30
+    while True:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=1).close()
+            return f"http://127.0.0.1:{port}", server
+        except OSError:
+            if not server.is_alive() or time.monotonic() > deadline:
+                raise RuntimeError("API server failed to start")
+            time.sleep(0.05)
+
+
+# --- load generator -----------------------------------------------------------
+
+
+def _load_scenarios() -> List[Dict[str, Any]]:
+    scenarios = []
+    for path in sorted(SCENARIOS_DIR.glob("*.json")):
+        with path.open("r", encoding="utf-8") as f:
+            scenarios.append(json.load(f))
+    if not scenarios:
+        raise SystemExit(f"No scenarios found in {SCENARIOS_DIR}")
+    return scenarios
+
+
+def _percentiles(values: List[float]) -> Dict[str, Any]:
+    if not values:
+        return {"count": 0}
+    values = sorted(values)
+    last = len(values) - 1
+    return {
+        "count": len(values),
+        "p50_ms": round(values[int(last * 0.50)], 2),
+        "p95_ms": round(values[int(last * 0.95)], 2),
+        "p99_ms": round(values[int(last * 0.99)], 2),
+    }
+
+
+class _Recorder:
+    def __init__(self) -> None:
+        self.endpoints: Dict[str, List[float]] = {}
+        self.errors: Dict[str, int] = {}
+        self.scans: List[float] = []
+        self.statuses: Dict[str, int] = {}
+
+    async def request(self, client: httpx.AsyncClient, endpoint: str, method: str, url: str, **kwargs: Any) -> httpx.Response:
+        started = time.perf_counter()
+        resp = await client.request(method, url, **kwargs)
+        self.endpoints.setdefault(endpoint, []).append((time.perf_counter() - started) * 1000)
+        if resp.status_code >= 400:
+            self.errors[endpoint] = self.errors.get(endpoint, 0) + 1
+        return resp
+
+
+async def _scan(client: httpx.AsyncClient, rec: _Recorder, seeds: Dict[str, Any], opts: argparse.Namespace) -> None:
+    started = time.perf_counter()
+    resp = await rec.request(
+        client, "POST /scans", "POST", "/scans", json={"seeds": seeds, "bypass_cache": not opts.cache}
+    )
+    scan_id = resp.json()["scan_id"]
+    await rec.request(client, "POST /scans/{scan_id}/run", "POST", f"/scans/{scan_id}/run")
+
+    deadline = time.perf_counter() + opts.scan_timeout
+    while True:
+        scan = (await rec.request(client, "GET /scans/{scan_id}", "GET", f"/scans/{scan_id}")).json()
+        if scan["status"] in _TERMINAL_STATUSES:
+            break
+        if time.perf_counter() > deadline:
+            scan["status"] = "timeout"
+            break
+        await asyncio.sleep(opts.poll_ms / 1000)
+
+    cursor = None
+    while True:
+        params = {"limit": 100, **({"cursor": cursor} if cursor else {})}
+        page = await rec.request(client, "GET /scans/{scan_id}/items", "GET", f"/scans/{scan_id}/items", params=params)
+        cursor = page.headers.get("X-Next-Cursor")
+        if not cursor:
+            break
+
+    rec.scans.append((time.perf_counter() - started) * 1000)
+    status = "partial" if scan.get("partial") and scan["status"] == "completed" else scan["status"]
+    rec.statuses[status] = rec.statuses.get(status, 0) + 1
+
+
+async def _replay(base_url: str, scenarios: List[Dict[str, Any]], scans: int, opts: argparse.Namespace) -> Tuple[_Recorder, float]:
+    rec = _Recorder()
+    next_scan = 0
+    limits = httpx.Limits(max_connections=opts.concurrency, max_keepalive_connections=opts.concurrency)
+
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60) as client:
+
+        async def _user() -> None:
+            nonlocal next_scan
+            while next_scan < scans:
+                seeds = scenarios[next_scan % len(scenarios)]["seeds"]
+                next_scan += 1
+                await _scan(client, rec, seeds, opts)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(_user() for _ in range(opts.concurrency)))
+        elapsed = time.perf_counter() - started
+    return rec, elapsed
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+async def _bench(base_url: str, opts: argparse.Namespace) -> Dict[str, Any]:
+    scenarios = _load_scenarios()
+    if opts.warmup:
+        await _replay(base_url, scenarios, opts.warmup, opts)
+    async with httpx.AsyncClient(base_url=base_url) as client:
+        await client.post("/bench/reset")
+    rec, elapsed = await _replay(base_url, scenarios, opts.scans, opts)
+    async with httpx.AsyncClient(base_url=base_url) as client:
+        server = (await client.get("/bench/stats")).json()
+
+    per_scan = list(server["scan_statements"].values())
+    tools = {}
+    for tool, calls in sorted(server["tools"].items()):
+        tools[tool] = {**_percentiles([ms for ms, _ in calls]), "errors": sum(1 for _, ok in calls if not ok)}
+    return {
+        "commit": _git_commit(),
+        "backend": engine.dialect.name,
+        "scenarios": len(scenarios),
+        "scans": opts.scans,
+        "concurrency": opts.concurrency,
+        "workers": opts.workers,
+        "cache": opts.cache,
+        "injected": {
+            "latency_ms": opts.latency_ms,
+            "tool_latency": _parse_map(opts.tool_latency),
+            "error_rate": opts.error_rate,
+            "tool_error_rate": _parse_map(opts.tool_error_rate),
+        },
+        "elapsed_s": round(elapsed, 2),
+        "scans_per_sec": round(opts.scans / elapsed, 2),
+        "scan_status": rec.statuses,
+        "scan": _percentiles(rec.scans),
+        "endpoints": {
+            endpoint: {**_percentiles(latencies), "errors": rec.errors.get(endpoint, 0)}
+            for endpoint, latencies in rec.endpoints.items()
+        },
+        "tools": tools,
+        "db_statements": {
+            "per_scan_run_mean": round(sum(per_scan) / len(per_scan), 2) if per_scan else None,
+            "per_scan_run_max": max(per_scan, default=None),
+            # Includes API requests (status polling, item pages) and worker polling.
+            "total_per_scan": round(server["statements"] / opts.scans, 2),
+        },
+    }
+
+
+def _regressions(result: Dict[str, Any], baseline: Dict[str, Any], tolerance: float) -> List[str]:
+    """Metrics more than `tolerance` (a fraction) worse than in `baseline`."""
+
+    found = []
+
+    def _check(name: str, new: Optional[float], old: Optional[float], higher_is_better: bool = False) -> None:
+        if new is None or not old:
+            return
+        change = (old - new) / old if higher_is_better else (new - old) / old
+        if change > tolerance:
+            found.append(f"{name}: {old} -> {new} ({change:+.0%} worse)")
+
+    _check("scans_per_sec", result["scans_per_sec"], baseline.get("scans_per_sec"), higher_is_better=True)
+    for section in ("endpoints", "tools"):
+        for name, stats in result[section].items():
+            old = baseline.get(section, {}).get(name, {})
+            for key in ("p95_ms", "p99_ms"):
+                _check(f"{section}[{name}].{key}", stats.get(key), old.get(key))
+    _check("scan.p95_ms", result["scan"].get("p95_ms"), baseline.get("scan", {}).get("p95_ms"))
+    _check(
+        "db_statements.per_scan_run_mean",
+        result["db_statements"]["per_scan_run_mean"],
+        baseline.get("db_statements", {}).get("per_scan_run_mean"),
+    )
+    return found
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scans", type=int, default=200)
+    parser.add_argument("--warmup", type=int, default=20)
+    parser.add_argument("--concurrency", type=int, default=20, help="virtual users")
+    parser.add_argument("--workers", type=int, default=8, help="embedded scan worker concurrency")
+    parser.add_argument("--latency-ms", type=float, default=50.0, help="median stub connector latency")
+    parser.add_argument("--tool-latency", default="", help="per-tool medians, e.g. checkBreach=150")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of stub calls that fail")
+    parser.add_argument("--tool-error-rate", default="", help="per-tool error rates, e.g. searchWeb=0.1")
+    parser.add_argument("--cache", action="store_true", help="let scans use the tool result cache")
+    parser.add_argument("--poll-ms", type=float, default=25.0)
+    parser.add_argument("--scan-timeout", type=float, default=120.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="also write the JSON result to this file")
+    parser.add_argument("--baseline", help="JSON result of an earlier run to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    opts = parser.parse_args()
+
+    random.seed(opts.seed)
+    app_main.EMBEDDED_SCAN_WORKERS = opts.workers
+    _reset_server_stats()
+    _stub_connectors(opts)
+    _instrument()
+    base_url, server = _serve()
+    try:
+        result = asyncio.run(_bench(base_url, opts))
+    finally:
+        server.terminate()
+
+    if opts.baseline:
+        with open(opts.baseline, "r", encoding="utf-8") as f:
+            result["regressions"] = _regressions(result, json.load(f), opts.tolerance)
+    output = json.dumps(result, indent=2)
+    print(output)
+    if opts.output:
+        with open(opts.output, "w", encoding="utf-8") as f:
+            f.write(output + "\n")
+    if result.get("regressions"):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+"""Connector HTTP cost: a fresh client per call vs the shared keep-alive pool.
+
+    cd backend && python -m benchmarks.bench_http_pool --requests 500 --tls
+
+Runs a local stub HTTP server (optionally TLS with a throwaway self-signed
+certificate, which needs the `cryptography` package) and reports latency and
+how many connections each strategy opened.
+"""
+
+import argparse
+import asyncio
+import datetime
+import json
+import ssl
+import statistics
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import httpx
+
+from app.core.http_client import HttpClientPool
+
+
+_BODY = json.dumps({"organic": [{"title": "stub", "link": "https://example.com", "snippet": "stub"}]}).encode()
+
+
+class StubServer:
+    def __init__(self, ssl_context: Optional[ssl.SSLContext]) -> None:
+        self.ssl_context = ssl_context
+        self.connections = 0
+        self.port = 0
+        self._server: Optional[asyncio.AbstractServer] = None
+
+    async def start(self) -> None:
+        self._server = await asyncio.start_server(self._handle, "127.0.0.1", 0, ssl=self.ssl_context)
+        self.port = self._server.sockets[0].getsockname()[1]
+
+    async def stop(self) -> None:
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self.connections += 1
+        try:
+            while True:
+                head = await reader.readuntil(b"\r\n\r\n")
+                length = 0
+                for line in head.split(b"\r\n"):
+                    if line.lower().startswith(b"content-length:"):
+                        length = int(line.split(b":", 1)[1])
+                if length:
+                    await reader.readexactly(length)
+                writer.write(
+                    b"HTTP/1.1 200 OK\r\nContent-Type: application/json\r\n"
+                    + f"Content-Length: {len(_BODY)}\r\nConnection: keep-alive\r\n\r\n".encode()
+                    + _BODY
+                )
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError, ssl.SSLError):
+            pass
+        finally:
+            writer.close()
+
+
+def _self_signed(tmpdir: Path) -> Dict[str, Any]:
+    from cryptography import x509
+    from cryptography.hazmat.primitives import hashes, serialization
+    from cryptography.hazmat.primitives.asymmetric import ec
+    from cryptography.x509.oid import NameOID
+    import ipaddress
+
+    key = ec.generate_private_key(ec.SECP256R1())
+    name = x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, "127.0.0.1")])
+    now = datetime.datetime.now(datetime.timezone.utc)
+    cert = (
+        x509.CertificateBuilder()
+        .subject_name(name)
+        .issuer_name(name)
+        .public_key(key.public_key())
+        .serial_number(x509.random_serial_number())
+        .not_valid_before(now - datetime.timedelta(minutes=1))
+        .not_valid_after(now + datetime.timedelta(hours=1))
+        .add_extension(x509.SubjectAlternativeName([x509.IPAddress(ipaddress.ip_address("127.0.0.1"))]), critical=False)
+        .sign(key, hashes.SHA256())
+    )
+    cert_path, key_path = tmpdir / "cert.pem", tmpdir / "key.pem"
+    cert_path.write_bytes(cert.public_bytes(serialization.Encoding.PEM))
+    key_path.write_bytes(
+        key.private_bytes(serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, serialization.NoEncryption())
+    )
+    server_ctx = ssl.create_default_context(ssl.Purpose.CLIENT_AUTH)
+    server_ctx.load_cert_chain(cert_path, key_path)
+    client_ctx = ssl.create_default_context(cafile=str(cert_path))
+    return {"server": server_ctx, "client": client_ctx}
+
+
+def _summary(latencies: List[float], connections: int, elapsed: float) -> Dict[str, Any]:
+    latencies.sort()
+    return {
+        "connections_opened": connections,
+        "req_per_sec": round(len(latencies) / elapsed),
+        "p50_ms": round(statistics.median(latencies) * 1000, 3),
+        "p99_ms": round(latencies[int(len(latencies) * 0.99) - 1] * 1000, 3),
+    }
+
+
+async def _run(requests: int, concurrency: int, tls: bool) -> Dict[str, Any]:
+    contexts = _self_signed(Path(tempfile.mkdtemp())) if tls else {"server": None, "client": True}
+    server = StubServer(contexts["server"])
+    await server.start()
+    base_url = f"{'https' if tls else 'http'}://127.0.0.1:{server.port}"
+    payload = {"q": "bench", "num": 10}
+    slots = asyncio.Semaphore(concurrency)
+
+    async def _fresh_client_call(latencies: List[float]) -> None:
+        # What search_web used to do: a new client (and connection) per call.
+        async with slots:
+            started = time.perf_counter()
+            async with httpx.AsyncClient(timeout=10.0, verify=contexts["client"]) as client:
+                resp = await client.post(f"{base_url}/search", json=payload)
+                resp.json()
+            latencies.append(time.perf_counter() - started)
+
+    pool = HttpClientPool(verify=contexts["client"])
+
+    async def _pooled_call(latencies: List[float]) -> None:
+        async with slots:
+            started = time.perf_counter()
+            resp = await pool.client(base_url).post("/search", json=payload)
+            resp.json()
+            latencies.append(time.perf_counter() - started)
+
+    results: Dict[str, Any] = {"tls": tls, "requests": requests, "concurrency": concurrency}
+    for label, call in (("fresh_client", _fresh_client_call), ("pooled", _pooled_call)):
+        server.connections = 0
+        latencies: List[float] = []
+        started = time.perf_counter()
+        await asyncio.gather(*(call(latencies) for _ in range(requests)))
+        results[label] = _summary(latencies, server.connections, time.perf_counter() - started)
+
+    await pool.aclose()
+    await server.stop()
+    results["speedup"] = round(results["pooled"]["req_per_sec"] / results["fresh_client"]["req_per_sec"], 2)
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--tls", action="store_true", help="serve over TLS to include handshake cost")
+    opts = parser.parse_args()
+    print(json.dumps(asyncio.run(_run(opts.requests, opts.concurrency, opts.tls)), indent=2))
+
+
+if __name__ == "__main__":
+    main()
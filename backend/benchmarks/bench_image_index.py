@@ -0,0 +1,109 @@
+"""Reverse image search latency: linear Hamming scan vs the multi-index hash.
+
+    cd backend && python -m benchmarks.bench_image_index --entries 10000000
+
+Builds an index of random 64-bit hashes in a temporary directory (or
+`--path`), then queries near-duplicates of indexed hashes (a few bits
+flipped) at each `--max-distance`. `linear` is a vectorized popcount over
+every hash; `index` is `ImageHashIndex.search` with everything indexed and
+again with `--pending` unindexed entries appended since the last rebuild.
+"""
+
+import argparse
+import json
+import tempfile
+import time
+from typing import Any, Callable, Dict, List
+
+import numpy as np
+
+from app.core.image_index import ImageHashIndex, _popcount
+
+
+def _records(start: int, n: int) -> Any:
+    return ({"url": f"https://images.example.com/{i}.jpg", "context": "bench"} for i in range(start, start + n))
+
+
+def _percentiles(fn: Callable[[int], Any], queries: List[int]) -> Dict[str, float]:
+    timings = []
+    for query in queries:
+        started = time.perf_counter()
+        fn(query)
+        timings.append((time.perf_counter() - started) * 1000)
+    return {
+        "p50_ms": round(float(np.percentile(timings, 50)), 3),
+        "p99_ms": round(float(np.percentile(timings, 99)), 3),
+    }
+
+
+def _queries(hashes: np.ndarray, n: int, flips: int, rng: np.random.Generator) -> List[int]:
+    queries = []
+    for i in rng.integers(0, len(hashes), n):
+        query = int(hashes[i])
+        for bit in rng.choice(64, flips, replace=False):
+            query ^= 1 << int(bit)
+        queries.append(query)
+    return queries
+
+
+def _bench(index: ImageHashIndex, hashes: np.ndarray, opts: argparse.Namespace, rng: np.random.Generator) -> List[Dict[str, Any]]:
+    results = []
+    for k in opts.max_distance:
+        queries = _queries(hashes, opts.queries, k // 2, rng)
+        linear = _percentiles(lambda q: np.flatnonzero(_popcount(hashes ^ np.uint64(q)) <= k), queries[: opts.linear_queries])
+        results.append(
+            {
+                "max_distance": k,
+                "linear": linear,
+                "index": _percentiles(lambda q: index.search(q, k, 20), queries),
+                "matches_per_query": round(sum(len(index.search(q, k)) for q in queries[:100]) / min(100, len(queries)), 2),
+            }
+        )
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--entries", type=int, default=10_000_000)
+    parser.add_argument("--pending", type=int, default=100_000, help="entries added after the rebuild")
+    parser.add_argument("--max-distance", type=int, nargs="+", default=[4, 8, 12])
+    parser.add_argument("--queries", type=int, default=1000)
+    parser.add_argument("--linear-queries", type=int, default=20)
+    parser.add_argument("--path", help="index directory (default: a temporary one)")
+    parser.add_argument("--seed", type=int, default=0)
+    opts = parser.parse_args()
+
+    rng = np.random.default_rng(opts.seed)
+    index = ImageHashIndex(opts.path or tempfile.mkdtemp())
+    hashes = rng.integers(0, np.iinfo(np.uint64).max, opts.entries, dtype=np.uint64, endpoint=True)
+
+    started = time.perf_counter()
+    index.add(hashes, _records(0, opts.entries))
+    add_s = time.perf_counter() - started
+    started = time.perf_counter()
+    index.rebuild()
+    rebuild_s = time.perf_counter() - started
+    indexed = _bench(index, hashes, opts, rng)
+
+    extra = rng.integers(0, np.iinfo(np.uint64).max, opts.pending, dtype=np.uint64, endpoint=True)
+    started = time.perf_counter()
+    index.add(extra, _records(opts.entries, opts.pending))
+    add_pending_ms = (time.perf_counter() - started) * 1000
+    pending = _bench(index, np.concatenate([hashes, extra]), opts, rng)
+
+    print(
+        json.dumps(
+            {
+                "entries": opts.entries,
+                "add_s": round(add_s, 1),
+                "rebuild_s": round(rebuild_s, 1),
+                "indexed": indexed,
+                "pending": {"entries": opts.pending, "add_ms": round(add_pending_ms, 1), "queries": pending},
+            },
+            indent=2,
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
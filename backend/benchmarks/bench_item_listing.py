@@ -0,0 +1,146 @@
+"""Item list page latency at increasing depth: keyset cursor vs OFFSET.
+
+    cd backend && python -m benchmarks.bench_item_listing --items 1000000
+
+Cursor pages go through `GET /scans/{scan_id}/items`; the OFFSET baseline
+runs the equivalent `LIMIT/OFFSET` query directly. Uses a throwaway SQLite
+file unless DATABASE_URL is set.
+"""
+
+import argparse
+import json
+import os
+import statistics
+import tempfile
+import time
+from datetime import datetime, timedelta
+from typing import Any, Dict, List
+
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{tempfile.mkdtemp()}/bench.db")
+
+import numpy as np  # noqa: E402
+from fastapi.testclient import TestClient  # noqa: E402
+from sqlalchemy import insert, text  # noqa: E402
+from sqlmodel import Session, select  # noqa: E402
+
+from app.api import scans  # noqa: E402
+from app.core.scan_events import ITEM_LIST_FIELDS  # noqa: E402
+from app.db.models import Item, Scan  # noqa: E402
+from app.db.pagination import encode_cursor  # noqa: E402
+from app.db.session import engine, init_db  # noqa: E402
+from app.main import app  # noqa: E402
+
+
+_CATEGORIES = ["breach", "web_result", "social_post", "image_match"]
+_INSERT_CHUNK = 50_000
+
+
+def _populate(scan_id: int, n: int) -> None:
+    rng = np.random.default_rng(scan_id)
+    categories = rng.integers(0, len(_CATEGORIES), n)
+    scores = np.round(rng.random(n), 3).tolist()  # rounded so ties on risk_score are common
+    start = datetime(2024, 1, 1)
+    with Session(engine) as session:
+        for lo in range(0, n, _INSERT_CHUNK):
+            rows = [
+                {
+                    "scan_id": scan_id,
+                    "category": _CATEGORIES[categories[i]],
+                    "source": "web",
+                    "title": f"Result {i}",
+                    "snippet": f"Snippet {i}",
+                    "url": f"https://example.com/{scan_id}/{i}",
+                    "confidence": 0.7,
+                    "risk_score": scores[i],
+                    "metadata_json": "{}",
+                    "created_at": start + timedelta(milliseconds=i // 4),
+                }
+                for i in range(lo, min(n, lo + _INSERT_CHUNK))
+            ]
+            session.execute(insert(Item.__table__), rows)  # type: ignore[attr-defined]
+        session.commit()
+
+
+def _median_ms(fn: Any, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - started) * 1000)
+    return round(statistics.median(timings), 3)
+
+
+def _bench(n: int, page: int, repeat: int) -> Dict[str, Any]:
+    init_db()
+    with Session(engine) as session:
+        scan = Scan(seeds_json="{}", status="completed")
+        other = Scan(seeds_json="{}", status="completed")
+        session.add(scan)
+        session.add(other)
+        session.commit()
+        scan_id, other_id = scan.id, other.id
+
+    started = time.perf_counter()
+    _populate(scan_id, n)
+    _populate(other_id, n // 10)  # another scan's rows share the indexes
+    with engine.connect() as conn:
+        if engine.dialect.name == "sqlite":
+            conn.execute(text("ANALYZE"))
+        else:
+            conn.execute(text("ANALYZE item"))
+        conn.commit()
+    populate_s = time.perf_counter() - started
+
+    columns = [getattr(Item, field) for field in ITEM_LIST_FIELDS]
+    depths = sorted({0, page * 10, n // 100, n // 10, n // 2, n - page})
+    results: List[Dict[str, Any]] = []
+
+    with TestClient(app) as client, Session(engine) as session:
+        for sort, order_by in (
+            ("risk_score", (Item.risk_score.desc(), Item.id.asc())),  # type: ignore[attr-defined, union-attr]
+            ("created_at", (Item.created_at.asc(), Item.id.asc())),  # type: ignore[attr-defined, union-attr]
+        ):
+            base = select(*columns, Item.created_at).where(Item.scan_id == scan_id).order_by(*order_by)
+            for depth in depths:
+                params: Dict[str, Any] = {"sort": sort, "limit": page}
+                if depth:
+                    # Untimed: find the row the previous page ended on.
+                    last = session.exec(base.offset(depth - 1).limit(1)).one()
+                    params["cursor"] = encode_cursor(getattr(last, sort), last.id)
+
+                def _cursor_page() -> None:
+                    resp = client.get(f"/scans/{scan_id}/items", params=params)
+                    assert resp.status_code == 200 and len(resp.json()) == page, resp.text
+
+                def _offset_page() -> None:
+                    assert len(session.exec(base.offset(depth).limit(page)).all()) == page
+
+                results.append(
+                    {
+                        "sort": sort,
+                        "depth": depth,
+                        "cursor_api_ms": _median_ms(_cursor_page, repeat),
+                        "offset_query_ms": _median_ms(_offset_page, repeat),
+                    }
+                )
+
+    return {
+        "backend": engine.dialect.name,
+        "items_in_scan": n,
+        "page_size": page,
+        "populate_seconds": round(populate_s, 1),
+        "pages": results,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--items", type=int, default=1_000_000)
+    parser.add_argument("--page-size", type=int, default=scans.ITEMS_PAGE_SIZE)
+    parser.add_argument("--repeat", type=int, default=5)
+    opts = parser.parse_args()
+    print(json.dumps(_bench(opts.items, opts.page_size, opts.repeat), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""Schema validation cost per /mcp/call: `jsonschema.validate` vs compiled validators.
+
+    cd backend && python -m benchmarks.bench_mcp_validation --items 1000
+"""
+
+import argparse
+import json
+import time
+from typing import Any, Callable, Dict
+
+import jsonschema
+
+from app.mcp_tools.registry import registry
+
+
+def _per_call_us(fn: Callable[[], Any], repeat: int) -> float:
+    started = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return round((time.perf_counter() - started) / repeat * 1e6, 1)
+
+
+def _bench(n: int, repeat: int) -> Dict[str, Any]:
+    spec = registry.get("scoreRisk")
+    assert spec is not None
+    args = {"items": [{"id": str(i), "category": "web_result", "confidence": 0.7} for i in range(n)]}
+    result = [
+        {"item_id": str(i), "risk_score": 0.14, "category": "web_result", "explanation": "Category web_result"}
+        for i in range(n)
+    ]
+
+    def _legacy() -> None:
+        jsonschema.validate(instance=args, schema=spec.input_schema)
+        jsonschema.validate(instance=result, schema=spec.output_schema)
+
+    def _compiled() -> None:
+        spec.input_validator.validate(args)
+        spec.output_validator.validate(result)
+
+    def _compiled_input_only() -> None:
+        spec.input_validator.validate(args)
+
+    return {
+        "items": n,
+        "validate_per_call_us": _per_call_us(_legacy, repeat),
+        "compiled_per_call_us": _per_call_us(_compiled, repeat),
+        "compiled_input_only_us": _per_call_us(_compiled_input_only, repeat),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--items", type=int, nargs="+", default=[1, 100, 1000])
+    parser.add_argument("--repeat", type=int, default=50)
+    opts = parser.parse_args()
+    print(json.dumps([_bench(n, opts.repeat) for n in opts.items], indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""Pseudonym map round trips: per-identifier queries vs the bulk, cached store.
+
+    cd backend && python -m benchmarks.bench_pseudonym_map --sizes 1000 10000
+
+`per_identifier` is the straightforward get-or-create (SELECT, then INSERT
+when missing) per identifier and one SELECT per token when re-identifying
+LLM output. `store` is `core.pseudonym_map` with a cold cache (as in
+another worker) and a warm one. SQLite answers in microseconds, so
+statements are reported next to wall time; `--db-latency-ms` adds a
+simulated round trip to every statement.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import tempfile
+import time
+from typing import Any, Dict, List, Tuple
+
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{tempfile.mkdtemp()}/bench.db")
+
+from sqlalchemy import event  # noqa: E402
+from sqlmodel import select  # noqa: E402
+
+from app.core.pseudonym_map import PseudonymMapStore  # noqa: E402
+from app.core.pseudonymize import pseudonym_for  # noqa: E402
+from app.db.models import PseudonymMap  # noqa: E402
+from app.db.session import async_engine, async_session, init_db  # noqa: E402
+
+
+_statements = 0
+
+
+def _instrument(latency_ms: float) -> None:
+    def _count(*_: Any) -> None:
+        global _statements
+        _statements += 1
+        if latency_ms:
+            time.sleep(latency_ms / 1000)
+
+    event.listen(async_engine.sync_engine, "before_cursor_execute", _count)
+
+
+async def _measure(fn: Any) -> Dict[str, Any]:
+    global _statements
+    _statements = 0
+    started = time.perf_counter()
+    async with async_session() as session:
+        await fn(session)
+        await session.commit()
+    return {"ms": round((time.perf_counter() - started) * 1000, 1), "statements": _statements}
+
+
+def _llm_output(tokens: List[str]) -> str:
+    return " ".join(f"Remove [{token}] from the listing." for token in tokens)
+
+
+async def _bench(n: int, opts: argparse.Namespace) -> Dict[str, Any]:
+    identifiers: List[Tuple[str, str]] = [("USER", f"bench-{n}-user-{i}") for i in range(n)]
+    tokens = [pseudonym_for(kind, value) for kind, value in identifiers]
+    text = _llm_output(tokens[: opts.tokens])
+    naive_scope, store_scope = f"naive:{n}", f"store:{n}"
+
+    async def _naive_create(session: Any) -> None:
+        for (kind, value), token in zip(identifiers, tokens):
+            existing = (
+                await session.exec(
+                    select(PseudonymMap.id).where(PseudonymMap.scope == naive_scope, PseudonymMap.token == token)
+                )
+            ).first()
+            if existing is None:
+                session.add(PseudonymMap(scope=naive_scope, token=token, kind=kind, value=value))
+                await session.flush()
+
+    async def _naive_reidentify(session: Any) -> None:
+        for token in tokens[: opts.tokens]:
+            (await session.exec(
+                select(PseudonymMap.value).where(PseudonymMap.scope == naive_scope, PseudonymMap.token == token)
+            )).first()
+
+    store = PseudonymMapStore(max(n, 1))
+    cold = PseudonymMapStore(max(n, 1))
+    return {
+        "identifiers": n,
+        "tokens_in_llm_output": opts.tokens,
+        "get_or_create": {
+            "per_identifier": await _measure(_naive_create),
+            "store": await _measure(lambda s: store.get_or_create(s, store_scope, identifiers)),
+            "store_again": await _measure(lambda s: store.get_or_create(s, store_scope, identifiers)),
+        },
+        "reidentify": {
+            "per_token": await _measure(_naive_reidentify),
+            "store_cold": await _measure(lambda s: cold.reidentify(s, store_scope, text)),
+            "store_warm": await _measure(lambda s: store.reidentify(s, store_scope, text)),
+        },
+    }
+
+
+async def _main(opts: argparse.Namespace) -> List[Dict[str, Any]]:
+    init_db()
+    _instrument(opts.db_latency_ms)
+    return [await _bench(n, opts) for n in opts.sizes]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000])
+    parser.add_argument("--tokens", type=int, default=50, help="distinct tokens in the re-identified text")
+    parser.add_argument("--db-latency-ms", type=float, default=0.0)
+    opts = parser.parse_args()
+    print(json.dumps(asyncio.run(_main(opts)), indent=2))
+
+
+if __name__ == "__main__":
+    main()
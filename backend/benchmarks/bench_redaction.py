@@ -0,0 +1,120 @@
+"""PII redaction throughput: one regex pass per pattern vs the compiled redactor.
+
+    cd backend && python -m benchmarks.bench_redaction --mb 16 --seeds 4 64
+
+Text is synthetic scan output (snippets with the seeds, other emails and
+phone numbers, dates and ids mixed into filler words). `per_pattern` is the
+straightforward implementation: one case-insensitive `re.sub` per seed plus
+the email and phone patterns, with an HMAC keyed from the salt per match.
+`compiled` and `stream` (`--chunk-kb` chunks) use `core.pseudonymize`.
+"""
+
+import argparse
+import hashlib
+import hmac
+import json
+import random
+import re
+import time
+from typing import Any, Callable, Dict, List
+
+from app.core import pseudonymize
+from app.core.pseudonymize import PSEUDONYM_SALT, redactor_for
+
+
+_WORDS = (
+    "profile posted account public photo comment thread review forum member "
+    "since joined location works company about contact page archive results"
+).split()
+
+
+def _seeds(n: int) -> Dict[str, Any]:
+    return {
+        "name": "Alex Smith",
+        "email": "alex.smith@example.com",
+        "usernames": ["alexsmith"] + [f"user_{i:03d}" for i in range(max(0, n - 3))],
+        "phones": ["+1 555 123 4567"],
+    }
+
+
+def _corpus(size: int, seeds: Dict[str, Any], rng: random.Random) -> str:
+    pii = [seeds["name"], seeds["email"], *seeds["usernames"], *seeds["phones"]]
+    other = ["jane@mail.test", "+44 20 7946 0958", "2023-11-14 22:13:20", "id 1700000000", "Alexander"]
+    parts: List[str] = []
+    total = 0
+    while total < size:
+        words = rng.choices(_WORDS, k=rng.randint(20, 60))
+        words.insert(rng.randrange(len(words)), rng.choice(pii))
+        words.insert(rng.randrange(len(words)), rng.choice(other))
+        snippet = " ".join(words) + ".\n"
+        parts.append(snippet)
+        total += len(snippet)
+    return "".join(parts)
+
+
+def _per_pattern(seeds: Dict[str, Any]) -> Callable[[str], str]:
+    values = [seeds["name"], seeds["email"], *seeds["usernames"], *seeds["phones"]]
+    patterns = [re.compile(rf"(?<!\w){re.escape(v)}(?!\w)", re.IGNORECASE) for v in values]
+    patterns.append(re.compile(pseudonymize._START + pseudonymize._EMAIL, re.IGNORECASE))
+    patterns.append(re.compile(pseudonymize._START + pseudonymize._PHONE))
+
+    def _token(match: "re.Match[str]") -> str:
+        digest = hmac.new(PSEUDONYM_SALT.encode("utf-8"), match.group().lower().encode("utf-8"), hashlib.sha256)
+        return f"[USER_{digest.hexdigest()[:10]}]"
+
+    def _redact(text: str) -> str:
+        for pattern in patterns:
+            text = pattern.sub(_token, text)
+        return text
+
+    return _redact
+
+
+def _best_of(repeat: int, fn: Callable[[], Any]) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def _bench(n_seeds: int, opts: argparse.Namespace) -> Dict[str, Any]:
+    rng = random.Random(opts.seed)
+    seeds = _seeds(n_seeds)
+    text = _corpus(int(opts.mb * 1024 * 1024), seeds, rng)
+    mb = len(text.encode("utf-8")) / (1024 * 1024)
+    chunk = opts.chunk_kb * 1024
+    chunks = [text[i : i + chunk] for i in range(0, len(text), chunk)]
+
+    started = time.perf_counter()
+    redactor = redactor_for(seeds)
+    compile_ms = (time.perf_counter() - started) * 1000
+
+    naive = _per_pattern(seeds)
+    modes = {
+        "per_pattern": lambda: naive(text),
+        "compiled": lambda: redactor.redact(text),
+        "stream": lambda: "".join(redactor.stream(chunks)),
+    }
+    results: Dict[str, Any] = {"seeds": n_seeds, "mb": round(mb, 2), "compile_ms": round(compile_ms, 2)}
+    for mode, fn in modes.items():
+        seconds = _best_of(opts.repeat, fn)
+        results[f"{mode}_mb_per_s"] = round(mb / seconds, 1)
+    results["tokens"] = redactor.redact(text).count("[")
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--mb", type=float, default=16.0)
+    parser.add_argument("--seeds", type=int, nargs="+", default=[4, 64])
+    parser.add_argument("--chunk-kb", type=int, default=8)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    opts = parser.parse_args()
+    print(json.dumps([_bench(n, opts) for n in opts.seeds], indent=2))
+
+
+if __name__ == "__main__":
+    main()
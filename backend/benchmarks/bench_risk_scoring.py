@@ -0,0 +1,80 @@
+"""Risk scoring throughput: per-item Python loop vs the NumPy batch engine.
+
+    cd backend && python -m benchmarks.bench_risk_scoring --sizes 10000 1000000
+"""
+
+import argparse
+import asyncio
+import json
+import time
+from typing import Any, Callable, Dict, List
+
+import numpy as np
+
+from app.core.risk_engine import engine
+from app.mcp_tools.score_risk import score_risk
+
+
+_CATEGORIES = ["breach", "github_profile", "web_result", "image_match", "social_post", "unknown"]
+
+
+def _legacy_score_risk(items: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """The pre-engine implementation: weights dict rebuilt per item."""
+
+    results = []
+    for item in items:
+        category = item.get("category", "unknown")
+        confidence = item.get("confidence", 0.5)
+        base_weights = {
+            "breach": 0.40,
+            "github_profile": 0.25,
+            "web_result": 0.20,
+            "image_match": 0.15,
+            "unknown": 0.10,
+        }
+        risk_score = base_weights.get(category, 0.10) * confidence
+        results.append(
+            {
+                "item_id": item.get("id"),
+                "risk_score": risk_score,
+                "category": category,
+                "explanation": f"Category {category} with confidence {confidence}",
+            }
+        )
+    return results
+
+
+def _timed(fn: Callable[[], Any]) -> float:
+    started = time.perf_counter()
+    fn()
+    return time.perf_counter() - started
+
+
+def _bench(n: int) -> Dict[str, Any]:
+    rng = np.random.default_rng(0)
+    categories = [_CATEGORIES[i] for i in rng.integers(0, len(_CATEGORIES), n)]
+    confidences = rng.random(n)
+    items = [{"id": str(i), "category": c, "confidence": float(x)} for i, (c, x) in enumerate(zip(categories, confidences))]
+    codes = engine.encode(categories)
+
+    timings = {
+        "legacy_loop": _timed(lambda: _legacy_score_risk(items)),
+        "score_risk_tool": _timed(lambda: asyncio.run(score_risk(items))),
+        "engine_batch": _timed(lambda: engine.score_batch(categories, confidences)),
+        "engine_columns": _timed(lambda: engine.score_columns(codes, confidences)),
+    }
+    return {
+        "items": n,
+        **{f"{name}_items_per_sec": round(n / seconds) for name, seconds in timings.items()},
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 1_000_000])
+    opts = parser.parse_args()
+    print(json.dumps([_bench(n) for n in opts.sizes], indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""Rows/sec for persisting a large scan: per-row ORM path vs bulk insert.
+
+    cd backend && python -m benchmarks.bench_scan_persistence --items 10000
+
+Uses a throwaway SQLite file unless DATABASE_URL is set (point it at a
+scratch Postgres to measure the multi-row INSERT ... RETURNING path).
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import tempfile
+import time
+from typing import Any, Dict, List
+
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{tempfile.mkdtemp()}/bench.db")
+os.environ.setdefault("MOCK_CONNECTORS", "true")
+
+from sqlmodel import Session  # noqa: E402
+
+from app.db.models import Item, Scan, ToolCall  # noqa: E402
+from app.db.session import async_session, engine, init_db  # noqa: E402
+from app.core import scan_runner, tool_dispatch  # noqa: E402
+from app.mcp_tools import score_risk  # noqa: E402
+
+
+def _fake_results(n: int) -> List[Dict[str, Any]]:
+    return [
+        {
+            "title": f"Result {i}",
+            "snippet": f"Snippet number {i} mentioning the seed",
+            "url": f"https://example.com/page/{i}",
+            "date": "2024-01-01",
+        }
+        for i in range(n)
+    ]
+
+
+def _new_scan(session: Session) -> int:
+    scan = Scan(seeds_json=json.dumps({"query": "bench"}), status="running")
+    session.add(scan)
+    session.commit()
+    return scan.id  # type: ignore[return-value]
+
+
+async def _legacy_persist(session: Session, scan_id: int, results: List[Dict[str, Any]]) -> None:
+    """The pre-bulk path: session.add per row, flush for ids, ORM score writes."""
+
+    created: List[Item] = []
+    for r in results:
+        item = Item(
+            scan_id=scan_id,
+            category="web_result",
+            source="web",
+            title=r["title"],
+            snippet=r["snippet"],
+            url=r["url"],
+            confidence=0.7,
+            risk_score=0.0,
+            metadata_json=json.dumps(r),
+        )
+        session.add(item)
+        created.append(item)
+    session.add(ToolCall(scan_id=scan_id, tool_name="searchWeb", args_json="{}", response_json=json.dumps(results)))
+    session.flush()
+    scores = await score_risk.score_risk(
+        [{"id": str(i.id), "category": i.category, "confidence": i.confidence} for i in created]
+    )
+    by_id = {s["item_id"]: s for s in scores}
+    for item in created:
+        item.risk_score = float(by_id[str(item.id)]["risk_score"])
+    session.commit()
+
+
+async def _bench(n: int) -> Dict[str, Any]:
+    init_db()
+    results = _fake_results(n)
+
+    with Session(engine) as session:
+        scan_id = _new_scan(session)
+        started = time.perf_counter()
+        await _legacy_persist(session, scan_id, results)
+        legacy_s = time.perf_counter() - started
+
+    async def _fake_search_web(**_: Any) -> List[Dict[str, Any]]:
+        return results
+
+    tool_dispatch.CONNECTOR_TOOLS["searchWeb"] = _fake_search_web
+
+    with Session(engine) as session:
+        scan_id = _new_scan(session)
+    async with async_session() as async_db:
+        started = time.perf_counter()
+        await scan_runner.run_scan_once(scan_id=scan_id, session=async_db)
+        bulk_s = time.perf_counter() - started
+
+    return {
+        "backend": engine.dialect.name,
+        "items": n,
+        "legacy_rows_per_sec": round(n / legacy_s),
+        "bulk_rows_per_sec": round(n / bulk_s),
+        "speedup": round(legacy_s / bulk_s, 2),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--items", type=int, default=10_000)
+    opts = parser.parse_args()
+    print(json.dumps(asyncio.run(_bench(opts.items)), indent=2))
+
+
+if __name__ == "__main__":
+    main()
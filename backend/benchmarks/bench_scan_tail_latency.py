@@ -0,0 +1,147 @@
+"""Scan latency percentiles with slow/failing providers: hedging and circuit breaking.
+
+    cd backend && python -m benchmarks.bench_scan_tail_latency --scans 300
+
+Connectors are replaced by fakes with lognormal latency plus a fraction of
+stragglers, and every scan runs one action per connector (web, breach,
+image), so one straggler makes the whole scan slow. The fakes aren't rate
+limited, so hedging is enabled for every provider (including HIBP). Each
+mode first runs `--warmup` unrecorded scans so latency quantiles are known.
+Modes:
+
+- `no_hedging` / `hedged`: the same straggler mix with hedging off and on.
+- `outage_no_breaker` / `outage_breaker`: checkBreach hangs for
+  `--outage-seconds` and then fails; with the breaker, the circuit opens
+  and later scans skip the action immediately (and are marked partial).
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import statistics
+import tempfile
+import time
+from typing import Any, Dict, List
+
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{tempfile.mkdtemp()}/bench.db")
+os.environ.setdefault("MOCK_CONNECTORS", "true")
+
+import httpx  # noqa: E402
+from sqlmodel import Session  # noqa: E402
+
+from app.core import resilience as resilience_module  # noqa: E402
+from app.core import scan_runner, tool_dispatch  # noqa: E402
+from app.db.models import Scan  # noqa: E402
+from app.db.session import async_session, engine, init_db  # noqa: E402
+
+
+def _latency(median_ms: float, straggler_ratio: float, straggler_ms: float) -> float:
+    if random.random() < straggler_ratio:
+        return straggler_ms / 1000
+    return random.lognormvariate(0, 0.3) * median_ms / 1000
+
+
+def _fake_connectors(opts: argparse.Namespace, outage: bool) -> None:
+    async def _search_web(query: str, limit: int = 10) -> List[Dict[str, Any]]:
+        await asyncio.sleep(_latency(opts.median_ms, opts.straggler_ratio, opts.straggler_ms))
+        return [{"title": query, "snippet": query, "url": f"https://example.com/{query}", "date": ""}]
+
+    async def _check_breach(email: str) -> Dict[str, Any]:
+        if outage:
+            await asyncio.sleep(opts.outage_seconds)
+            raise httpx.ConnectTimeout("simulated outage")
+        await asyncio.sleep(_latency(opts.median_ms, opts.straggler_ratio, opts.straggler_ms))
+        return {"pwned": False, "breaches": []}
+
+    async def _reverse_image_search(image_hash: str) -> List[Dict[str, Any]]:
+        await asyncio.sleep(_latency(opts.median_ms, opts.straggler_ratio, opts.straggler_ms))
+        return [{"url": f"https://example.com/{image_hash}.jpg", "similarity": 0.9, "context": ""}]
+
+    tool_dispatch.CONNECTOR_TOOLS.update(
+        searchWeb=_search_web,
+        checkBreach=_check_breach,
+        reverseImageSearch=_reverse_image_search,
+    )
+
+
+def _new_scans(mode: str, n: int) -> List[int]:
+    with Session(engine) as session:
+        scans = [
+            Scan(seeds_json=json.dumps({"query": f"{mode} {i}", "email": f"{mode}{i}@example.com", "image_hash": f"{mode}{i}"}))
+            for i in range(n)
+        ]
+        session.add_all(scans)
+        session.commit()
+        return [scan.id for scan in scans]  # type: ignore[misc]
+
+
+async def _run_scans(mode: str, n: int, warmup: int, concurrency: int) -> Dict[str, Any]:
+    durations: List[float] = []
+    partial = 0
+    limit = asyncio.Semaphore(concurrency)
+
+    async def _one(scan_id: int, record: bool) -> None:
+        nonlocal partial
+        async with limit, async_session() as session:
+            started = time.perf_counter()
+            result = await scan_runner.run_scan_once(scan_id=scan_id, session=session)
+            if record:
+                durations.append((time.perf_counter() - started) * 1000)
+                partial += result["partial"]
+
+    await asyncio.gather(*(_one(scan_id, False) for scan_id in _new_scans(f"{mode}-warmup", warmup)))
+    await asyncio.gather(*(_one(scan_id, True) for scan_id in _new_scans(mode, n)))
+    durations.sort()
+    return {
+        "mode": mode,
+        "p50_ms": round(statistics.median(durations), 1),
+        "p95_ms": round(durations[int(len(durations) * 0.95)], 1),
+        "p99_ms": round(durations[min(len(durations) - 1, int(len(durations) * 0.99))], 1),
+        "partial_scans": partial,
+        "providers": tool_dispatch.resilience.stats(),
+    }
+
+
+async def _bench(opts: argparse.Namespace) -> Dict[str, Any]:
+    init_db()
+    random.seed(opts.seed)
+    results = []
+    min_calls = resilience_module.CIRCUIT_MIN_CALLS
+    resilience_module.HEDGE_DISABLED_PROVIDERS = set()
+    for mode, hedging, outage, breaker in (
+        ("no_hedging", False, False, True),
+        ("hedged", True, False, True),
+        ("outage_no_breaker", True, True, False),
+        ("outage_breaker", True, True, True),
+    ):
+        resilience_module.HEDGE_ENABLED = hedging
+        resilience_module.CIRCUIT_MIN_CALLS = min_calls if breaker else 10**9
+        tool_dispatch.resilience = resilience_module.Resilience()
+        _fake_connectors(opts, outage)
+        results.append(await _run_scans(mode, opts.scans, opts.warmup, opts.concurrency))
+    return {
+        "scans_per_mode": opts.scans,
+        "straggler_ratio": opts.straggler_ratio,
+        "straggler_ms": opts.straggler_ms,
+        "results": results,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scans", type=int, default=300)
+    parser.add_argument("--warmup", type=int, default=50)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--median-ms", type=float, default=40.0)
+    parser.add_argument("--straggler-ratio", type=float, default=0.03)
+    parser.add_argument("--straggler-ms", type=float, default=2000.0)
+    parser.add_argument("--outage-seconds", type=float, default=0.25)
+    parser.add_argument("--seed", type=int, default=0)
+    opts = parser.parse_args()
+    print(json.dumps(asyncio.run(_bench(opts)), indent=2))
+
+
+if __name__ == "__main__":
+    main()
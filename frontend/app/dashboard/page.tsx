@@ -18,6 +18,7 @@ import {
   getScan,
   getScanItems,
   runScan,
+  subscribeScanEvents,
 } from "@/lib/api";
 
 interface ScanSummary {
@@ -109,20 +110,50 @@ export default function DashboardPage() {
       ]);
 
       const { scan_id } = await createScan(token, payload);
-      setCurrentScan({ id: scan_id, status: "pending" });
+      setCurrentScan({ id: scan_id, status: "created" });
       setAgentLog((log) => [...log, `Scan ${scan_id} created. Running agent loop...`]);
 
-      const runResult: any = await runScan(scan_id);
+      // The run is queued for a worker; follow its progress over SSE.
+      const finalStatus = await new Promise<string>((resolve, reject) => {
+        const source = subscribeScanEvents(scan_id, (event, data) => {
+          if (event === "status") {
+            setCurrentScan({ id: scan_id, status: data.status });
+            if (data.status === "completed" || data.status === "failed") {
+              source.close();
+              resolve(data.status);
+            }
+          } else if (event === "plan") {
+            setAgentLog((log) => [...log, `Planner chose ${data.actions.length} tool call(s).`]);
+          } else if (event === "tool_finished") {
+            setAgentLog((log) => [
+              ...log,
+              `${data.tool} ${data.ok ? "finished" : "failed"} in ${data.duration_ms} ms.`,
+            ]);
+          } else if (event === "items") {
+            setItems((prev) => [...prev, ...data.items]);
+          } else if (event === "scores") {
+            setItems(data.items);
+          } else if (event === "timeout") {
+            source.close();
+            reject(new Error(`Scan is still ${data.status}; check back later`));
+          }
+        });
+        source.onerror = () => {
+          source.close();
+          reject(new Error("Lost connection to scan progress stream"));
+        };
+        runScan(scan_id).catch((err) => {
+          source.close();
+          reject(err);
+        });
+      });
+
+      const it: any[] = await getScanItems(scan_id, { sort: "risk_score", limit: 500 });
+      setItems(it);
       setAgentLog((log) => [
         ...log,
-        `Agent executed tools and discovered ${runResult.items_created} relevant results.`,
+        `Scan ${finalStatus}: agent discovered ${it.length} relevant results.`,
       ]);
-
-      const s: any = await getScan(scan_id);
-      setCurrentScan({ id: scan_id, status: s.status });
-
-      const it: any[] = await getScanItems(scan_id);
-      setItems(it);
       setAgentLog((log) => [...log, `Scoring each finding based on category and confidence.`]);
     } catch (err: any) {
       setError(err.message ?? "Failed to run scan");
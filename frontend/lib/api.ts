@@ -66,8 +66,30 @@ export async function runScan(scanId: number) {
   return apiRequest(`/scans/${scanId}/run`, { method: "POST" });
 }
 
-export async function getScanItems(scanId: number) {
-  return apiRequest(`/scans/${scanId}/items`);
+const SCAN_EVENT_TYPES = ["status", "plan", "tool_started", "tool_finished", "items", "scores", "timeout"];
+
+export function subscribeScanEvents(
+  scanId: number,
+  onEvent: (event: string, data: any) => void
+): EventSource {
+  const source = new EventSource(`${API_BASE}/scans/${scanId}/events`);
+  for (const type of SCAN_EVENT_TYPES) {
+    source.addEventListener(type, (e) => onEvent(type, JSON.parse((e as MessageEvent).data)));
+  }
+  return source;
+}
+
+// One page of items; pass the response's X-Next-Cursor back as `cursor` for the next.
+export async function getScanItems(
+  scanId: number,
+  params: Record<string, string | number | undefined> = {}
+) {
+  const query = new URLSearchParams();
+  for (const [key, value] of Object.entries(params)) {
+    if (value !== undefined) query.set(key, String(value));
+  }
+  const qs = query.toString();
+  return apiRequest(`/scans/${scanId}/items${qs ? `?${qs}` : ""}`);
 }
 
 export async function getItem(itemId: number) {